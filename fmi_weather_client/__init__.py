@@ -1,10 +1,34 @@
-from typing import Optional
+import importlib
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Union
 
-import asyncio
+from fmi_weather_client.lazy import LazyModule
+from fmi_weather_client.models import Forecast, MergedWeather, Weather, WeatherAndForecast, RequestType
 
-from fmi_weather_client import http
-from fmi_weather_client.models import Weather, RequestType
-from fmi_weather_client.parsers import forecast as forecast_parser
+# Heavy dependencies are loaded on first use to keep importing the package fast
+asyncio = LazyModule('asyncio')
+http = LazyModule('fmi_weather_client.http')
+forecast_parser = LazyModule('fmi_weather_client.parsers.forecast')
+columns = LazyModule('fmi_weather_client.columns')
+timeseries = LazyModule('fmi_weather_client.timeseries')
+views = LazyModule('fmi_weather_client.views')
+
+# Streaming API is loaded when it is first accessed
+_LAZY_ATTRIBUTES = {
+    'stream_weather': 'fmi_weather_client.streaming',
+    'stream_forecasts': 'fmi_weather_client.streaming',
+    'stream_observations': 'fmi_weather_client.streaming',
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        return getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRIBUTES))
 
 
 def weather_by_coordinates(lat: float, lon: float) -> Optional[Weather]:
@@ -22,7 +46,7 @@ def weather_by_coordinates(lat: float, lon: float) -> Optional[Weather]:
         return None
 
     weather_state = forecast.forecasts[-1]
-    return Weather(forecast.place, forecast.lat, forecast.lon, weather_state)
+    return http.restore_coordinates(Weather(forecast.place, forecast.lat, forecast.lon, weather_state), lat, lon)
 
 
 async def async_weather_by_coordinates(lat: float, lon: float) -> Optional[Weather]:
@@ -73,7 +97,9 @@ def forecast_by_place_name(name: str, timestep_hours: int = 24, forecast_points:
     :return: Latest forecast
     """
     response = http.request_forecast_by_place(name, timestep_hours, forecast_points)
-    return forecast_parser.parse_fmi_response(response, RequestType.FORECAST)
+    forecast = forecast_parser.parse_fmi_response(response, RequestType.FORECAST)
+    timeseries.record(RequestType.FORECAST, name, forecast)
+    return forecast
 
 
 async def async_forecast_by_place_name(name: str, timestep_hours: int = 24, forecast_points: int = 4):
@@ -98,7 +124,9 @@ def forecast_by_coordinates(lat: float, lon: float, timestep_hours: int = 24, fo
     :return: Latest forecast
     """
     response = http.request_forecast_by_coordinates(lat, lon, timestep_hours, forecast_points)
-    return forecast_parser.parse_fmi_response(response, RequestType.FORECAST)
+    forecast = http.restore_coordinates(forecast_parser.parse_fmi_response(response, RequestType.FORECAST), lat, lon)
+    timeseries.record(RequestType.FORECAST, (lat, lon), forecast)
+    return forecast
 
 
 async def async_forecast_by_coordinates(lat: float, lon: float, timestep_hours: int = 24, forecast_points: int = 4):
@@ -114,54 +142,152 @@ async def async_forecast_by_coordinates(lat: float, lon: float, timestep_hours:
     return await loop.run_in_executor(None, forecast_by_coordinates, lat, lon, timestep_hours, forecast_points)
 
 
-def observation_by_station_id(fmi_sid: int) -> Optional[Weather]:
+def weather_and_forecast_by_coordinates(lat: float, lon: float, timestep_hours: int = 24,
+                                        forecast_points: int = 4) -> WeatherAndForecast:
+    """
+    Get the latest weather information and forecast by coordinates with a single request.
+    :param lat: Latitude (e.g. 25.67087)
+    :param lon: Longitude (e.g. 62.39758)
+    :param timestep_hours: Hours between forecasts
+    :param forecast_points: number of forcast points
+    :return: Latest weather information and forecast
+    """
+    now = datetime.now(timezone.utc)
+    response = http.request_weather_and_forecast_by_coordinates(lat, lon, timestep_hours, forecast_points, now)
+    forecast = http.restore_coordinates(forecast_parser.parse_fmi_response(response, RequestType.FORECAST), lat, lon)
+    return _split_weather_and_forecast(forecast, now, timestep_hours, forecast_points)
+
+
+async def async_weather_and_forecast_by_coordinates(lat: float, lon: float, timestep_hours: int = 24,
+                                                    forecast_points: int = 4) -> WeatherAndForecast:
+    """
+    Get the latest weather information and forecast by coordinates with a single request asynchronously.
+    :param lat: Latitude (e.g. 25.67087)
+    :param lon: Longitude (e.g. 62.39758)
+    :param timestep_hours: Hours between forecasts
+    :param forecast_points: number of forcast points
+    :return: Latest weather information and forecast
+    """
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, weather_and_forecast_by_coordinates, lat, lon, timestep_hours,
+                                      forecast_points)
+
+
+def weather_and_forecast_by_place_name(name: str, timestep_hours: int = 24,
+                                       forecast_points: int = 4) -> WeatherAndForecast:
+    """
+    Get the latest weather information and forecast by place name with a single request.
+    :param name: Place name (e.g. Kaisaniemi, Helsinki)
+    :param timestep_hours: Hours between forecasts
+    :param forecast_points: number of forcast points
+    :return: Latest weather information and forecast
+    """
+    now = datetime.now(timezone.utc)
+    response = http.request_weather_and_forecast_by_place(name, timestep_hours, forecast_points, now)
+    forecast = forecast_parser.parse_fmi_response(response, RequestType.FORECAST)
+    return _split_weather_and_forecast(forecast, now, timestep_hours, forecast_points)
+
+
+async def async_weather_and_forecast_by_place_name(name: str, timestep_hours: int = 24,
+                                                   forecast_points: int = 4) -> WeatherAndForecast:
+    """
+    Get the latest weather information and forecast by place name with a single request asynchronously.
+    :param name: Place name (e.g. Kaisaniemi, Helsinki)
+    :param timestep_hours: Hours between forecasts
+    :param forecast_points: number of forcast points
+    :return: Latest weather information and forecast
+    """
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, weather_and_forecast_by_place_name, name, timestep_hours,
+                                      forecast_points)
+
+
+def _split_weather_and_forecast(forecast: Forecast, now: datetime, timestep_hours: int,
+                                forecast_points: int) -> WeatherAndForecast:
+    """
+    Slice the combined response into the latest weather and the forecast points
+    :param forecast: Combined response in hourly steps
+    :param now: Time of the request
+    :param timestep_hours: Hours between forecasts
+    :param forecast_points: number of forcast points
+    :return: Latest weather information and forecast
+    """
+    # A weather request gets the latest 10 minute point, which is interpolated from the hours around it
+    weather_time = now.replace(minute=now.minute - now.minute % 10, second=0, microsecond=0)
+    weather_data = views.interpolate(columns.to_columns(forecast), weather_time)
+    weather = Weather(forecast.place, forecast.lat, forecast.lon, weather_data) if weather_data is not None else None
+
+    # Forecast points are the time points that a separate forecast request would get
+    first = http.first_forecast_time(now, timestep_hours)
+    step = timedelta(hours=timestep_hours)
+    points = [weather_state for weather_state in forecast.forecasts
+              if weather_state.time >= first and (weather_state.time - first) % step == timedelta(0)]
+    return WeatherAndForecast(weather, forecast._replace(forecasts=points[:forecast_points]))
+
+
+def observation_by_station_id(fmi_sid: int, merge_missing: bool = False) -> Optional[Union[Weather, MergedWeather]]:
     """
     Get the latest weather information of an observation station by station id.
     :param fmi_sid: Place fmiSID (https://www.ilmatieteenlaitos.fi/havaintoasemat)
+    :param merge_missing: Fill values missing from the latest observation with the newest older ones
     :return: Latest weather information if available, None otherwise
     """
 
     response = http.request_observation_by_station_id(fmi_sid)
     forecast = forecast_parser.parse_fmi_response(response, RequestType.OBSERVATION)
-
-    if forecast is None or len(forecast.forecasts) == 0:
-        return None
-
-    weather_state = forecast.forecasts[-1]
-    return Weather(forecast.place, forecast.lat, forecast.lon, weather_state)
+    timeseries.record(RequestType.OBSERVATION, fmi_sid, forecast)
+    return _latest_observation(forecast, merge_missing)
 
 
-async def async_observation_by_station_id(fmi_sid: int) -> Weather:
+async def async_observation_by_station_id(fmi_sid: int,
+                                          merge_missing: bool = False) -> Optional[Union[Weather, MergedWeather]]:
     """
     Get the latest weather information of an observation station by station id.
     :param fmi_sid: Place fmiSID (https://www.ilmatieteenlaitos.fi/havaintoasemat)
+    :param merge_missing: Fill values missing from the latest observation with the newest older ones
     :return: Latest weather information if available, None otherwise
     """
     loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, observation_by_station_id, fmi_sid)
+    return await loop.run_in_executor(None, observation_by_station_id, fmi_sid, merge_missing)
 
 
-def observation_by_place(place: str) -> Optional[Weather]:
+def observation_by_place(place: str, merge_missing: bool = False) -> Optional[Union[Weather, MergedWeather]]:
     """
     Get the latest weather information by place name
     :param place: Place name (e.g. Kaisaniemi, Helsinki)
+    :param merge_missing: Fill values missing from the latest observation with the newest older ones
     :return: Latest weather information if available, None otherwise
     """
     response = http.request_observation_by_place(place)
     forecast = forecast_parser.parse_fmi_response(response, RequestType.OBSERVATION)
-
-    if forecast is None or len(forecast.forecasts) == 0:
-        return None
-
-    weather_state = forecast.forecasts[-1]
-    return Weather(forecast.place, forecast.lat, forecast.lon, weather_state)
+    timeseries.record(RequestType.OBSERVATION, place, forecast)
+    return _latest_observation(forecast, merge_missing)
 
 
-async def async_observation_by_place(place: str) -> Optional[Weather]:
+async def async_observation_by_place(place: str,
+                                     merge_missing: bool = False) -> Optional[Union[Weather, MergedWeather]]:
     """
     Get the latest weather information by place name
     :param place: Place name (e.g. Kaisaniemi, Helsinki)
+    :param merge_missing: Fill values missing from the latest observation with the newest older ones
     :return: Latest weather information if available, None otherwise
     """
     loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(None, observation_by_place, place)
+    return await loop.run_in_executor(None, observation_by_place, place, merge_missing)
+
+
+def _latest_observation(forecast: Optional[Forecast], merge_missing: bool) -> Optional[Union[Weather, MergedWeather]]:
+    """
+    Pick the latest observation of the fetched window
+    :param forecast: Observations of the window
+    :param merge_missing: Fill missing values from older observations
+    :return: Latest observation if available, None otherwise
+    """
+    if forecast is None or len(forecast.forecasts) == 0:
+        return None
+
+    if merge_missing:
+        return columns.merge_latest(forecast)
+
+    weather_state = forecast.forecasts[-1]
+    return Weather(forecast.place, forecast.lat, forecast.lon, weather_state)
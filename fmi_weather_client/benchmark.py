@@ -0,0 +1,118 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, NamedTuple, Tuple
+
+import fmi_weather_client
+from fmi_weather_client import http
+from fmi_weather_client.latency import percentile
+from fmi_weather_client.standin import StandInServer, add_config_arguments, config_from_arguments
+
+
+class BenchmarkResult(NamedTuple):
+    """Represents throughput and latency of a benchmark run. Times are in seconds."""
+    requests: int
+    errors: int
+    duration: float
+    throughput: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+    def __str__(self):
+        return (f"{self.requests} requests, {self.errors} errors in {self.duration:.2f} s "
+                f"({self.throughput:.1f} req/s). Latency p50 {self.p50 * 1000:.1f} ms, "
+                f"p95 {self.p95 * 1000:.1f} ms, p99 {self.p99 * 1000:.1f} ms, max {self.max * 1000:.1f} ms")
+
+
+def run(func: Callable[..., Any], calls: Iterable[Tuple], concurrency: int = 8) -> BenchmarkResult:
+    """
+    Call a function concurrently and measure throughput and latency
+    :param func: Function to call, e.g. fmi_weather_client.weather_by_coordinates
+    :param calls: Positional arguments of each call
+    :param concurrency: Number of concurrent calls
+    :return: Benchmark result
+    """
+
+    def timed(args: Tuple) -> Tuple[float, bool]:
+        started = time.perf_counter()
+        try:
+            func(*args)
+            failed = False
+        except Exception:  # pylint: disable=broad-exception-caught
+            failed = True
+        return time.perf_counter() - started, failed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results: List[Tuple[float, bool]] = list(executor.map(timed, calls))
+    duration = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in results)
+    return BenchmarkResult(
+        requests=len(results),
+        errors=sum(1 for _, failed in results if failed),
+        duration=duration,
+        throughput=len(results) / duration if duration > 0 else 0.0,
+        p50=percentile(latencies, 0.50),
+        p95=percentile(latencies, 0.95),
+        p99=percentile(latencies, 0.99),
+        max=latencies[-1] if latencies else 0.0,
+    )
+
+
+def create_calls(kind: str, count: int) -> Tuple[Callable[..., Any], List[Tuple]]:
+    """
+    Create calls of a lookup that all request different locations
+    :param kind: 'weather', 'forecast' or 'observation'
+    :param count: Number of calls
+    :return: Function and positional arguments of each call
+    """
+    # Identical requests in flight at the same time are sent only once, so each call needs its own location
+    if kind == 'weather':
+        return fmi_weather_client.weather_by_coordinates, [_coordinates(idx) for idx in range(count)]
+    if kind == 'forecast':
+        return fmi_weather_client.forecast_by_coordinates, [(*_coordinates(idx), 1, 48) for idx in range(count)]
+    if kind == 'observation':
+        return fmi_weather_client.observation_by_station_id, [(100000 + idx,) for idx in range(count)]
+    raise ValueError(f"Unknown kind {kind}")
+
+
+def _coordinates(idx: int) -> Tuple[float, float]:
+    """Coordinates of the nth location of a benchmark, about 100 m apart"""
+    return round(60.17 + idx // 100 * 0.001, 5), round(24.94 + idx % 100 * 0.001, 5)
+
+
+def main():
+    """Benchmark the client against a local stand-in server"""
+    parser = argparse.ArgumentParser(description='Benchmark the client against a local FMI stand-in server')
+    parser.add_argument('--requests', type=int, default=1000, help='Number of requests')
+    parser.add_argument('--concurrency', type=int, default=8, help='Number of concurrent requests')
+    parser.add_argument('--kind', choices=('weather', 'forecast', 'observation'), default='forecast')
+    add_config_arguments(parser)
+    parser.add_argument('--hedge-budget', type=float, default=None, help='Fraction of requests that may be hedged')
+    parser.add_argument('--adaptive-timeout', action='store_true', help='Derive timeouts from latencies')
+    args = parser.parse_args()
+
+    func, arguments = create_calls(args.kind, args.requests)
+
+    config = config_from_arguments(args)
+    with StandInServer(config=config) as server:
+        http.set_base_url(server.url)
+        http.set_hedging(args.hedge_budget)
+        http.set_adaptive_timeout(args.adaptive_timeout)
+        try:
+            result = run(func, arguments, args.concurrency)
+        finally:
+            http.set_base_url()
+            http.set_hedging()
+            http.set_adaptive_timeout(False)
+
+    print(result)
+    if args.hedge_budget is not None:
+        print(f"{http.latency_tracker().hedges()} hedged requests")
+
+
+if __name__ == '__main__':
+    main()
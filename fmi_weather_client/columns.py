@@ -0,0 +1,109 @@
+import itertools
+from array import array
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+
+import math
+
+from fmi_weather_client.models import Forecast, MergedWeather, Value, WeatherData
+
+# All value fields of WeatherData, i.e. everything except the time
+FIELDS = WeatherData._fields[1:]
+
+
+class ForecastColumns(NamedTuple):
+    """Represents a forecast as one float column per weather field"""
+    place: str
+    lat: float
+    lon: float
+    times: List[datetime]
+
+    # Unit of each field
+    units: Dict[str, str]
+
+    # Values of each available field. Fields that FMI did not return are left out.
+    values: Dict[str, array]
+
+
+def to_columns(forecast: Forecast) -> ForecastColumns:
+    """
+    Convert forecast rows to columns
+    :param forecast: Forecast
+    :return: Forecast as columns
+    """
+    rows = forecast.forecasts
+    times = [row.time for row in rows]
+    units: Dict[str, str] = {}
+    values: Dict[str, array] = {}
+
+    for idx, field in enumerate(FIELDS, start=1):
+        column = [row[idx] for row in rows]
+        units[field] = column[0].unit if column else ''
+        if all(value.value is None for value in column):
+            continue
+        values[field] = array('d', [math.nan if value.value is None else value.value for value in column])
+
+    return ForecastColumns(forecast.place, forecast.lat, forecast.lon, times, units, values)
+
+
+def from_columns(columns: ForecastColumns) -> Forecast:
+    """
+    Convert columns back to forecast rows
+    :param columns: Forecast columns
+    :return: Forecast
+    """
+    rows = len(columns.times)
+    value_columns = []
+    for field in FIELDS:
+        unit = columns.units.get(field, '')
+        column = columns.values.get(field)
+        # Values are immutable, so a missing field can share one value on all rows
+        value_columns.append([Value(None, unit)] * rows if column is None
+                             else list(map(Value, column, itertools.repeat(unit, rows))))
+
+    forecasts = list(map(WeatherData, columns.times, *value_columns))
+
+    return Forecast(columns.place, columns.lat, columns.lon, forecasts)
+
+
+def take(columns: ForecastColumns, indices: List[int]) -> ForecastColumns:
+    """
+    Select rows from columns
+    :param columns: Forecast columns
+    :param indices: Row indices to select
+    :return: Columns with selected rows only
+    """
+    times = [columns.times[idx] for idx in indices]
+    values = {field: array('d', [column[idx] for idx in indices]) for field, column in columns.values.items()}
+    return columns._replace(times=times, values=values)
+
+
+def latest_rows(columns: ForecastColumns) -> Dict[str, int]:
+    """
+    Find the newest row that has a value for each field
+    :param columns: Forecast columns
+    :return: Row index by field. Fields without any value are left out.
+    """
+    latest = {}
+    for field, column in columns.values.items():
+        for idx in range(len(column) - 1, -1, -1):
+            if not math.isnan(column[idx]):
+                latest[field] = idx
+                break
+    return latest
+
+
+def merge_latest(forecast: Forecast) -> Optional[MergedWeather]:
+    """
+    Combine the newest available value of each field into a single weather
+    :param forecast: Observations or forecast
+    :return: Newest row with missing values filled from older rows; None if there are no rows
+    """
+    rows = forecast.forecasts
+    if not rows:
+        return None
+
+    latest = latest_rows(to_columns(forecast))
+    data = rows[-1]._replace(**{field: getattr(rows[idx], field) for field, idx in latest.items()})
+    times = {field: rows[idx].time for field, idx in latest.items()}
+    return MergedWeather(forecast.place, forecast.lat, forecast.lon, data, times)
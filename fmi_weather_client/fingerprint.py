@@ -0,0 +1,81 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, NamedTuple, Optional
+
+# Only the beginning of the body is searched for the response metadata
+_HEAD_SIZE = 4096
+
+# Time when the response was created. It changes on every request, even when the data does not.
+_TIMESTAMP = re.compile(r'\stimeStamp="[^"]*"')
+
+# Time when the forecast model run or the observations were published
+_RESULT_TIME = re.compile(r'<om:resultTime>\s*<gml:TimeInstant[^>]*>\s*<gml:timePosition>([^<]+)</gml:timePosition>')
+
+
+class Fingerprint(NamedTuple):
+    """Identifies the data of a response body"""
+
+    # Result time of the data if the response has one
+    result_time: Optional[str]
+
+    # Hash of the body without the response creation time
+    digest: str
+
+
+def fingerprint(body: str) -> Fingerprint:
+    """
+    Fingerprint a response body. Bodies of the same data have the same fingerprint,
+    even if they were created at different times.
+    :param body: Response body
+    :return: Fingerprint
+    """
+    head = body[:_HEAD_SIZE]
+    result_time = _RESULT_TIME.search(head)
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(_TIMESTAMP.sub('', head, count=1).encode())
+    digest.update(body[_HEAD_SIZE:].encode())
+    return Fingerprint(result_time.group(1) if result_time else None, digest.hexdigest())
+
+
+class FingerprintCache:
+    """Thread-safe LRU cache of values by fingerprint"""
+
+    def __init__(self, max_size: int = 64):
+        """
+        :param max_size: Maximum number of cached values
+        """
+        self._max_size = max_size
+        self._values: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Get a cached value
+        :param key: Fingerprint, possibly combined with other keys
+        :return: Cached value; None if not cached
+        """
+        with self._lock:
+            value = self._values.get(key)
+            if value is not None:
+                self._values.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """
+        Cache a value
+        :param key: Fingerprint, possibly combined with other keys
+        :param value: Value
+        """
+        with self._lock:
+            self._values[key] = value
+            self._values.move_to_end(key)
+            while len(self._values) > self._max_size:
+                self._values.popitem(last=False)
+
+    def clear(self):
+        """Forget all cached values"""
+        with self._lock:
+            self._values.clear()
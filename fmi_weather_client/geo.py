@@ -0,0 +1,78 @@
+from typing import Tuple
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+_DECIMALS = 6
+
+
+def geohash_encode(lat: float, lon: float, precision: int = 6) -> str:
+    """
+    Encode coordinates as a geohash
+    :param lat: Latitude
+    :param lon: Longitude
+    :param precision: Number of characters. Cells are about 1.2 km x 0.6 km at precision 6.
+    :return: Geohash
+    """
+    if precision < 1:
+        raise ValueError("Geohash precision must be at least 1")
+
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        # Bits alternate between longitude and latitude, starting with longitude
+        value, value_range = (lon, lon_range) if even else (lat, lat_range)
+        middle = (value_range[0] + value_range[1]) / 2
+        if value >= middle:
+            bits = bits * 2 + 1
+            value_range[0] = middle
+        else:
+            bits *= 2
+            value_range[1] = middle
+        even = not even
+
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return ''.join(chars)
+
+
+def geohash_decode(geohash: str) -> Tuple[float, float]:
+    """
+    Decode a geohash to the center of its cell
+    :param geohash: Geohash
+    :return: (lat, lon) of the cell center
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+
+    for char in geohash:
+        bits = _BASE32.index(char)
+        for shift in range(4, -1, -1):
+            value_range = lon_range if even else lat_range
+            middle = (value_range[0] + value_range[1]) / 2
+            value_range[0 if bits >> shift & 1 else 1] = middle
+            even = not even
+
+    return (round((lat_range[0] + lat_range[1]) / 2, _DECIMALS),
+            round((lon_range[0] + lon_range[1]) / 2, _DECIMALS))
+
+
+def snap_to_grid(lat: float, lon: float, grid: float) -> Tuple[float, float]:
+    """
+    Snap coordinates to the nearest point of a regular grid
+    :param lat: Latitude
+    :param lon: Longitude
+    :param grid: Grid spacing in degrees (e.g. 0.01)
+    :return: Snapped (lat, lon)
+    """
+    if grid <= 0:
+        raise ValueError("Grid spacing must be positive")
+    return round(round(lat / grid) * grid, _DECIMALS), round(round(lon / grid) * grid, _DECIMALS)
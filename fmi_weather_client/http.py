@@ -1,15 +1,176 @@
 import logging
+import math
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, Optional, Tuple
+from xml.etree import ElementTree
 
 import requests
 import xmltodict
 
+from fmi_weather_client import geo
 from fmi_weather_client.errors import ClientError, ServerError
+from fmi_weather_client.latency import LatencyTracker
 from fmi_weather_client.models import RequestType
 
 _LOGGER = logging.getLogger(__name__)
 
+FORECAST_QUERY_ID = 'fmi::forecast::edited::weather::scandinavia::point::multipointcoverage'
+FORECAST_PARAMETERS = ('Temperature,DewPoint,Pressure,Humidity,WindDirection,WindSpeedMS,'
+                       'WindUMS,WindVMS,WindGust,WeatherSymbol3,TotalCloudCover,LowCloudCover,'
+                       'MediumCloudCover,HighCloudCover,Precipitation1h,RadiationGlobalAccumulation,'
+                       'RadiationNetSurfaceSWAccumulation,RadiationNetSurfaceLWAccumulation,GeopHeight,LandSeaMask')
+
+OBSERVATION_QUERY_ID = 'fmi::observations::weather::multipointcoverage'
+OBSERVATION_PARAMETERS = ('Temperature,DewPoint,Pressure,Humidity,WindDirection,WindSpeedMS,'
+                          'WindGust,WeatherSymbol3,TotalCloudCover,Precipitation1h')
+
+_DEFAULT_URL = 'https://opendata.fmi.fi/wfs'
+_FEATURE_COLLECTION = '{http://www.opengis.net/wfs/2.0}FeatureCollection'
+_VALIDATE_CHUNK_SIZE = 4096
+_BASE_URL = _DEFAULT_URL
+
+# Coordinate quantization. Only one of them is set at a time.
+_COORDINATE_GRID: Optional[float] = None
+_GEOHASH_PRECISION: Optional[int] = None
+
+# Requests in flight by request key. Identical requests wait for the first one instead of sending their own.
+_IN_FLIGHT: Dict[Tuple, Future] = {}
+_IN_FLIGHT_LOCK = threading.Lock()
+
+# Request timeout in seconds. Adaptive timeouts stay within the limits.
+_TIMEOUT = 10.0
+_MIN_TIMEOUT = 1.0
+_TIMEOUT_MULTIPLIER = 4
+
+# Latencies of recent requests
+_LATENCY = LatencyTracker()
+
+# Hedging of slow requests. None budget disables hedging.
+_HEDGE_BUDGET: Optional[float] = None
+_HEDGE_PERCENTILE = 0.95
+_HEDGE_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_ADAPTIVE_TIMEOUT = False
+
+# Session that keeps connections to FMI open between requests. None sends each request on its own.
+_SESSION: Optional[requests.Session] = None
+
+
+def set_base_url(url: Optional[str] = None):
+    """
+    Send requests to another WFS service, e.g. a local stand-in server
+
+    :param url: WFS endpoint URL. None restores the FMI service.
+    """
+    global _BASE_URL  # pylint: disable=global-statement
+    _BASE_URL = url or _DEFAULT_URL
+
+
+def set_session(session: Optional[requests.Session] = None):
+    """
+    Send requests with a session, so that connections to FMI are reused
+    :param session: Session. None sends each request on its own.
+    """
+    global _SESSION  # pylint: disable=global-statement
+    _SESSION = session
+
+
+def set_hedging(budget: Optional[float] = None, delay_percentile: float = 0.95):
+    """
+    Send a duplicate of a request that has not been answered within the given percentile of recent
+    latencies, and use whichever response arrives first. The slower response is discarded.
+
+    :param budget: Maximum fraction of requests that are duplicated (e.g. 0.05). None disables hedging.
+    :param delay_percentile: Percentile of recent latencies to wait before the duplicate is sent
+    """
+    if budget is not None and not 0 < budget <= 1:
+        raise ValueError("Hedging budget must be between 0 and 1")
+
+    global _HEDGE_BUDGET, _HEDGE_PERCENTILE, _HEDGE_EXECUTOR  # pylint: disable=global-statement
+    _HEDGE_BUDGET = budget
+    _HEDGE_PERCENTILE = delay_percentile
+    if budget is not None and _HEDGE_EXECUTOR is None:
+        _HEDGE_EXECUTOR = ThreadPoolExecutor(max_workers=64, thread_name_prefix='fmi-hedge')
+
+
+def set_adaptive_timeout(enabled: bool = True):
+    """
+    Derive request timeouts from recent latencies instead of using a fixed 10 second timeout.
+    The timeout is a multiple of the 99th percentile latency, between 1 and 10 seconds.
+
+    :param enabled: True enables adaptive timeouts
+    """
+    global _ADAPTIVE_TIMEOUT  # pylint: disable=global-statement
+    _ADAPTIVE_TIMEOUT = enabled
+
+
+def latency_tracker() -> LatencyTracker:
+    """Get the record of recent request latencies"""
+    return _LATENCY
+
+
+def set_coordinate_precision(grid: Optional[float] = None, geohash_precision: Optional[int] = None):
+    """
+    Snap coordinates of requests, so that nearby locations share one request.
+    Without arguments coordinates are sent as they are.
+
+    :param grid: Grid spacing in degrees (e.g. 0.01)
+    :param geohash_precision: Geohash length. Coordinates are snapped to the center of the geohash cell.
+    """
+    if grid is not None and geohash_precision is not None:
+        raise ValueError("Use either grid or geohash precision, not both")
+    if grid is not None and grid <= 0:
+        raise ValueError("Grid spacing must be positive")
+    if geohash_precision is not None and geohash_precision < 1:
+        raise ValueError("Geohash precision must be at least 1")
+
+    global _COORDINATE_GRID, _GEOHASH_PRECISION  # pylint: disable=global-statement
+    _COORDINATE_GRID = grid
+    _GEOHASH_PRECISION = geohash_precision
+
+
+def snap_coordinates(lat: float, lon: float) -> Tuple[float, float]:
+    """
+    Get the coordinates that are sent in requests for the given location
+
+    :param lat: Latitude
+    :param lon: Longitude
+    :return: Snapped (lat, lon); the same coordinates if snapping is not enabled
+    """
+    if _COORDINATE_GRID is not None:
+        return geo.snap_to_grid(lat, lon, _COORDINATE_GRID)
+    if _GEOHASH_PRECISION is not None:
+        return geo.geohash_decode(geo.geohash_encode(lat, lon, _GEOHASH_PRECISION))
+    return lat, lon
+
+
+def restore_coordinates(result: Any, lat: float, lon: float) -> Any:
+    """
+    Report the requested coordinates in a result when coordinates of requests are snapped
+
+    :param result: Weather or forecast parsed from a response
+    :param lat: Requested latitude
+    :param lon: Requested longitude
+    :return: Result with the requested coordinates; the result as it is if snapping is not enabled
+    """
+    if _COORDINATE_GRID is None and _GEOHASH_PRECISION is None:
+        return result
+    return result._replace(lat=lat, lon=lon)
+
+
+def request_key(params: Dict[str, Any]) -> Tuple:
+    """
+    Get a key that is equal for requests of the same data.
+    Start and end times are compared to the minute.
+
+    :param params: Query parameters
+    :return: Hashable key
+    """
+    return tuple(sorted((name, str(value)[:16] if name in ('starttime', 'endtime') else str(value))
+                        for name, value in params.items()))
+
 
 def request_weather_by_coordinates(lat: float, lon: float) -> str:
     """
@@ -34,7 +195,8 @@ def request_weather_by_place(place: str) -> str:
     return _send_request(params)
 
 
-def request_forecast_by_coordinates(lat: float, lon: float, timestep_hours: int = 24, forecast_points: int = 4) -> str:
+def request_forecast_by_coordinates(lat: float, lon: float, timestep_hours: int = 24, forecast_points: int = 4,
+                                    start_time: Optional[datetime] = None) -> str:
     """
     Get the latest forecast by place coordinates
 
@@ -42,24 +204,82 @@ def request_forecast_by_coordinates(lat: float, lon: float, timestep_hours: int
     :param lon: Longitude (e.g. 62.39758)
     :param timestep_hours: Forecast steps in hours
     :param forecast_points: number of forcast points
+    :param start_time: Time of the first forecast point. Defaults to now.
     :return: Forecast response
     """
     timestep_minutes = timestep_hours * 60
-    params = _create_params(RequestType.FORECAST, timestep_minutes, forecast_points, lat=lat, lon=lon)
+    params = _create_params(RequestType.FORECAST, timestep_minutes, forecast_points, lat=lat, lon=lon,
+                            start_time=start_time)
     return _send_request(params)
 
 
-def request_forecast_by_place(place: str, timestep_hours: int = 24, forecast_points: int = 4) -> str:
+def request_forecast_by_place(place: str, timestep_hours: int = 24, forecast_points: int = 4,
+                              start_time: Optional[datetime] = None) -> str:
     """
     Get the latest forecast by place name
 
     :param place: Place name (e.g. Kaisaniemi,Helsinki)
     :param timestep_hours: Forecast steps in hours
     :param forecast_points: number of forcast points
+    :param start_time: Time of the first forecast point. Defaults to now.
     :return: Forecast response
     """
     timestep_minutes = timestep_hours * 60
-    params = _create_params(RequestType.FORECAST, timestep_minutes, forecast_points, place=place)
+    params = _create_params(RequestType.FORECAST, timestep_minutes, forecast_points, place=place,
+                            start_time=start_time)
+    return _send_request(params)
+
+
+def request_model_forecast(query_id: str, parameters: str, timestep_hours: int = 1, forecast_points: int = 24,
+                           start_time: Optional[datetime] = None, **location: Any) -> str:
+    """
+    Get a forecast of another forecast model by place name or coordinates
+
+    :param query_id: Stored query of the model
+    :param parameters: Comma separated FMI parameters
+    :param timestep_hours: Forecast steps in hours
+    :param forecast_points: number of forcast points
+    :param start_time: Time of the first forecast point. Defaults to now.
+    :param location: place or lat and lon
+    :return: Forecast response
+    """
+    params = _create_params(RequestType.FORECAST, timestep_hours * 60, forecast_points, start_time=start_time,
+                            **location)
+    params['storedquery_id'] = query_id
+    params['parameters'] = parameters
+    return _send_request(params)
+
+
+def request_weather_and_forecast_by_coordinates(lat: float, lon: float, timestep_hours: int = 24,
+                                                forecast_points: int = 4, now: Optional[datetime] = None) -> str:
+    """
+    Get the latest weather information and forecast by coordinates in one request.
+    The response has hourly steps from the start of the current hour to the last forecast point.
+
+    :param lat: Latitude (e.g. 25.67087)
+    :param lon: Longitude (e.g. 62.39758)
+    :param timestep_hours: Forecast steps in hours
+    :param forecast_points: number of forcast points
+    :param now: Current time. Defaults to now.
+    :return: Forecast response
+    """
+    params = _create_combined_params(timestep_hours, forecast_points, now, lat=lat, lon=lon)
+    return _send_request(params)
+
+
+def request_weather_and_forecast_by_place(place: str, timestep_hours: int = 24, forecast_points: int = 4,
+                                          now: Optional[datetime] = None) -> str:
+    """
+    Get the latest weather information and forecast by place name in one request.
+    The response has hourly steps from the start of the current hour to the last forecast point.
+
+    :param place: Place name (e.g. Kaisaniemi,Helsinki)
+    :param timestep_hours: Forecast steps in hours
+    :param forecast_points: number of forcast points
+    :param now: Current time. Defaults to now.
+    :return: Forecast response
+    """
+    params = _create_combined_params(timestep_hours, forecast_points, now, place=place)
     return _send_request(params)
 
 
@@ -86,13 +306,39 @@ def request_observation_by_place(place: str) -> str:
 
 
 # pylint: disable=too-many-arguments,too-many-positional-arguments
+def request_observation_stream(start_time: datetime,
+                               end_time: datetime,
+                               fmi_sid: Optional[int] = None,
+                               place: Optional[str] = None,
+                               bbox: Optional[Tuple[float, float, float, float]] = None,
+                               timestep_minutes: int = 10) -> Iterator[bytes]:
+    """
+    Get observations of a time range as a stream of response body chunks. The request is sent
+    when the first chunk is read. Parse the chunks with parsers.stream.
+
+    :param start_time: Start of the time range
+    :param end_time: End of the time range
+    :param fmi_sid: Place fmiSID (https://www.ilmatieteenlaitos.fi/havaintoasemat)
+    :param place: Place name (e.g. Kaisaniemi, Helsinki)
+    :param bbox: Bounding box (min lon, min lat, max lon, max lat) for observations of many stations
+    :param timestep_minutes: Minutes between observations
+    :return: Response body chunks
+    """
+    params = _create_params(RequestType.OBSERVATION, timestep_minutes, place=place, fmi_sid=fmi_sid, bbox=bbox)
+    params['starttime'] = start_time.astimezone(timezone.utc).isoformat(timespec='seconds')
+    params['endtime'] = end_time.astimezone(timezone.utc).isoformat(timespec='seconds')
+    return _send_streaming_request(params)
+
+
 def _create_params(request_type: RequestType,
                    timestep_minutes: int,
                    forecast_points: int = 4,
                    place: Optional[str] = None,
                    fmi_sid: Optional[int] = None,
                    lat: Optional[float] = None,
-                   lon: Optional[float] = None) -> Dict[str, Any]:
+                   lon: Optional[float] = None,
+                   bbox: Optional[Tuple[float, float, float, float]] = None,
+                   start_time: Optional[datetime] = None) -> Dict[str, Any]:
     """
     Create query parameters
     :param timestep_minutes: Timestamp minutes
@@ -100,34 +346,29 @@ def _create_params(request_type: RequestType,
     :param place: Place name
     :param lat: Latitude
     :param lon: Longitude
+    :param bbox: Bounding box (min lon, min lat, max lon, max lat)
+    :param start_time: Start of a forecast. Defaults to now.
     :return: Parameters
     """
 
-    if place is None and lat is None and lon is None and fmi_sid is None:
+    if place is None and lat is None and lon is None and fmi_sid is None and bbox is None:
         raise ValueError("Missing location parameter")
 
     if request_type is RequestType.WEATHER:
         end_time = datetime.now(timezone.utc)
         start_time = end_time - timedelta(minutes=10)
-        query_id = "fmi::forecast::edited::weather::scandinavia::point::multipointcoverage"
-        parameters = ('Temperature,DewPoint,Pressure,Humidity,WindDirection,WindSpeedMS,'
-                      'WindUMS,WindVMS,WindGust,WeatherSymbol3,TotalCloudCover,LowCloudCover,'
-                      'MediumCloudCover,HighCloudCover,Precipitation1h,RadiationGlobalAccumulation,'
-                      'RadiationNetSurfaceSWAccumulation,RadiationNetSurfaceLWAccumulation,GeopHeight,LandSeaMask')
+        query_id = FORECAST_QUERY_ID
+        parameters = FORECAST_PARAMETERS
     elif request_type is RequestType.FORECAST:
-        start_time = datetime.now(timezone.utc)
+        start_time = datetime.now(timezone.utc) if start_time is None else start_time.astimezone(timezone.utc)
         end_time = start_time + timedelta(minutes=timestep_minutes * forecast_points)
-        query_id = "fmi::forecast::edited::weather::scandinavia::point::multipointcoverage"
-        parameters = ('Temperature,DewPoint,Pressure,Humidity,WindDirection,WindSpeedMS,'
-                      'WindUMS,WindVMS,WindGust,WeatherSymbol3,TotalCloudCover,LowCloudCover,'
-                      'MediumCloudCover,HighCloudCover,Precipitation1h,RadiationGlobalAccumulation,'
-                      'RadiationNetSurfaceSWAccumulation,RadiationNetSurfaceLWAccumulation,GeopHeight,LandSeaMask')
+        query_id = FORECAST_QUERY_ID
+        parameters = FORECAST_PARAMETERS
     elif request_type is RequestType.OBSERVATION:
         end_time = datetime.now(timezone.utc)
         start_time = end_time - timedelta(minutes=20)
-        query_id = "fmi::observations::weather::multipointcoverage"
-        parameters = ('Temperature,DewPoint,Pressure,Humidity,WindDirection,WindSpeedMS,'
-                      'WindGust,WeatherSymbol3,TotalCloudCover,Precipitation1h')
+        query_id = OBSERVATION_QUERY_ID
+        parameters = OBSERVATION_PARAMETERS
     else:
         raise ValueError(f"Invalid request_type {request_type}")
 
@@ -146,24 +387,90 @@ def _create_params(request_type: RequestType,
         params['fmisid'] = fmi_sid
 
     if lat is not None and lon is not None:
+        lat, lon = snap_coordinates(lat, lon)
         params['latlon'] = f'{lat},{lon}'
 
     if place is not None:
         params['place'] = place.strip().replace(' ', '')
 
+    if bbox is not None:
+        params['bbox'] = ','.join(str(coordinate) for coordinate in bbox)
+
     return params
 
 
+def _create_combined_params(timestep_hours: int, forecast_points: int, now: Optional[datetime],
+                            **location: Any) -> Dict[str, Any]:
+    """
+    Create query parameters that cover both the weather and the forecast window
+    :param timestep_hours: Forecast steps in hours
+    :param forecast_points: number of forcast points
+    :param now: Current time. Defaults to now.
+    :param location: Location parameters of _create_params
+    :return: Parameters
+    """
+    now = datetime.now(timezone.utc) if now is None else now
+    # Hours around now for interpolating the weather, and the time points of a separate forecast request.
+    # Forecast points are on full hours, so hourly steps have them all.
+    start_time = now.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    end_time = first_forecast_time(now, timestep_hours) + timedelta(hours=timestep_hours * max(forecast_points - 1, 0))
+    hours = max(math.ceil((end_time - start_time) / timedelta(hours=1)), 1)
+    return _create_params(RequestType.FORECAST, 60, hours, start_time=start_time, **location)
+
+
+def first_forecast_time(now: datetime, timestep_hours: int) -> datetime:
+    """
+    Get the first time point of a forecast request. FMI aligns forecast time points to multiples of the timestep.
+    :param now: Start time of the request
+    :param timestep_hours: Forecast steps in hours
+    :return: First time point at or after now
+    """
+    step = timestep_hours * 3600
+    return datetime.fromtimestamp(math.ceil(now.timestamp() / step) * step, timezone.utc)
+
+
 def _send_request(params: Dict[str, Any]) -> str:
+    """
+    Send a request to FMI service and return the body. If an identical request is
+    already in flight, wait for its response instead of sending another one.
+    :param params: Query parameters
+    :return: Response body
+    """
+    key = request_key(params)
+    with _IN_FLIGHT_LOCK:
+        in_flight = _IN_FLIGHT.get(key)
+        if in_flight is None:
+            future: Future = Future()
+            _IN_FLIGHT[key] = future
+
+    if in_flight is not None:
+        _LOGGER.debug("Waiting for identical request in flight. Parameters: %s", params)
+        return in_flight.result()
+
+    try:
+        body = _fetch(params)
+    except BaseException as err:
+        # Waiters get any error, even an interrupt, instead of waiting forever
+        future.set_exception(err)
+        raise
+    finally:
+        with _IN_FLIGHT_LOCK:
+            del _IN_FLIGHT[key]
+
+    future.set_result(body)
+    return body
+
+
+def _fetch(params: Dict[str, Any]) -> str:
     """
     Send a request to FMI service and return the body
     :param params: Query parameters
     :return: Response body
     """
-    url = 'https://opendata.fmi.fi/wfs'
+    url = _BASE_URL
 
     _LOGGER.debug("GET request to %s. Parameters: %s", url, params)
-    response = requests.get(url, params=params, timeout=10)
+    response = _get(url, params)
 
     if response.status_code == 200:
         _validate_response(response)
@@ -177,14 +484,97 @@ def _send_request(params: Dict[str, Any]) -> str:
     return response.text
 
 
-def _validate_response(response: requests.Response):
-    """Validate response body"""
-    data = xmltodict.parse(response.text)
+def _get(url: str, params: Dict[str, Any]) -> requests.Response:
+    """Send a GET request. Hedge it if hedging is enabled and the request is slow."""
+    budget = _HEDGE_BUDGET
+    executor = _HEDGE_EXECUTOR
+    delay = _LATENCY.percentile(_HEDGE_PERCENTILE) if budget is not None else None
+    if budget is None or executor is None or delay is None:
+        return _timed_get(url, params)
+
+    _LATENCY.count_request()
+    primary = executor.submit(_timed_get, url, params)
+    done, _ = wait([primary], timeout=delay)
+    if done or not _LATENCY.try_hedge(budget):
+        return primary.result()
+
+    _LOGGER.debug("No response in %d ms, sending a hedged request", delay * 1000)
+    hedge = executor.submit(_timed_get, url, params)
+    done, _ = wait([primary, hedge], return_when=FIRST_COMPLETED)
+    first = done.pop()
+    other = hedge if first is primary else primary
+
+    if first.exception() is not None:
+        return other.result()
+    other.cancel()
+    return first.result()
+
+
+def _timed_get(url: str, params: Dict[str, Any]) -> requests.Response:
+    """Send a GET request and record its latency. Failed requests are recorded too, timed out ones with the timeout."""
+    timeout = _timeout()
+    started = time.perf_counter()
+    latency = None
+    try:
+        return _requester().get(url, params=params, timeout=timeout)
+    except requests.Timeout:
+        # Leaving out slow requests would make the timeout adapt to ever shorter latencies
+        latency = max(time.perf_counter() - started, timeout)
+        raise
+    finally:
+        _LATENCY.record(latency if latency is not None else time.perf_counter() - started)
+
+
+def _requester() -> Any:
+    """Session set with set_session, or the requests module"""
+    return _SESSION if _SESSION is not None else requests
+
+
+def _timeout() -> float:
+    """Get timeout of the next request in seconds"""
+    if not _ADAPTIVE_TIMEOUT:
+        return _TIMEOUT
+
+    latency = _LATENCY.percentile(0.99)
+    if latency is None:
+        return _TIMEOUT
+    return min(max(latency * _TIMEOUT_MULTIPLIER, _MIN_TIMEOUT), _TIMEOUT)
+
+
+def _send_streaming_request(params: Dict[str, Any], chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """
+    Send a request to FMI service and stream the body
+    :param params: Query parameters
+    :param chunk_size: Maximum size of a chunk in bytes
+    :return: Response body chunks
+    """
+    url = _BASE_URL
+
+    _LOGGER.debug("Streaming GET request to %s. Parameters: %s", url, params)
+    with _requester().get(url, params=params, timeout=_TIMEOUT, stream=True) as response:
+        if response.status_code != 200:
+            _handle_errors(response)
 
-    if ('wfs:FeatureCollection' in data and
-            '@numberMatched' in data['wfs:FeatureCollection'] and
-            data['wfs:FeatureCollection']['@numberMatched'] == '0'):
-        raise ClientError(200, "Valid data source not found with given parameters")
+        yield from response.iter_content(chunk_size)
+
+
+def _validate_response(response: requests.Response):
+    """Validate response body. Only the root element is parsed, the body is parsed in full later."""
+    parser = ElementTree.XMLPullParser(events=('start',))
+    text = response.text
+
+    try:
+        for offset in range(0, len(text), _VALIDATE_CHUNK_SIZE):
+            parser.feed(text[offset:offset + _VALIDATE_CHUNK_SIZE])
+            for _, root in parser.read_events():
+                if root.tag == _FEATURE_COLLECTION and root.get('numberMatched') == '0':
+                    raise ClientError(200, "Valid data source not found with given parameters")
+                return
+    except ElementTree.ParseError as err:
+        raise ServerError(response.status_code, text) from err
+
+    # The body ended before its root element
+    raise ServerError(response.status_code, text)
 
 
 def _handle_errors(response: requests.Response):
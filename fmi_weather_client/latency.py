@@ -0,0 +1,74 @@
+import math
+import threading
+from collections import deque
+from typing import Deque, Optional, Sequence
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """
+    Get a percentile with the nearest-rank method
+    :param values: Sorted values
+    :param fraction: Percentile as fraction (e.g. 0.95)
+    :return: Percentile value; zero if there are no values
+    """
+    if not values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(values)), 1)
+    return values[rank - 1]
+
+
+class LatencyTracker:
+    """Thread-safe record of recent request latencies and of hedged requests"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        """
+        :param window: Number of latest latencies kept
+        :param min_samples: Number of latencies needed before percentiles are reported
+        """
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._min_samples = min_samples
+        self._requests = 0
+        self._hedges = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float):
+        """
+        Record latency of a request
+        :param latency: Latency in seconds
+        """
+        with self._lock:
+            self._latencies.append(latency)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """
+        Get a percentile of recent latencies
+        :param fraction: Percentile as fraction (e.g. 0.95)
+        :return: Latency in seconds; None if there are not enough latencies yet
+        """
+        with self._lock:
+            if len(self._latencies) < self._min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        return percentile(latencies, fraction)
+
+    def count_request(self):
+        """Count a request that may be hedged"""
+        with self._lock:
+            self._requests += 1
+
+    def try_hedge(self, budget: float) -> bool:
+        """
+        Count a hedged request if it fits in the budget
+        :param budget: Maximum fraction of requests that are hedged
+        :return: True if the request may be hedged
+        """
+        with self._lock:
+            if self._hedges + 1 > budget * self._requests:
+                return False
+            self._hedges += 1
+            return True
+
+    def hedges(self) -> int:
+        """Get the number of hedged requests"""
+        with self._lock:
+            return self._hedges
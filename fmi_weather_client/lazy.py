@@ -0,0 +1,28 @@
+import importlib
+from types import ModuleType
+from typing import Any
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported when one of its attributes is first accessed.
+
+    Every attribute access is delegated to the real module, so patching the real module
+    works as usual. Importing is thread-safe, because the import system takes care of it.
+    """
+
+    def __init__(self, name: str):
+        """
+        :param name: Full module name
+        """
+        self._name = name
+
+    def load(self) -> ModuleType:
+        """Import the module"""
+        return importlib.import_module(self._name)
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        return f"<lazy module {self._name!r}>"
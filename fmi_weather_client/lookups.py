@@ -0,0 +1,34 @@
+from typing import Optional, Union
+
+from fmi_weather_client.models import Forecast, Lookup, RequestType, Weather
+
+
+def fetch(lookup: Lookup) -> Optional[Union[Weather, Forecast]]:
+    """
+    Run a lookup with the matching library function
+    :param lookup: Lookup
+    :return: Result of the library function
+    """
+    # The package imports this module through its streaming API
+    import fmi_weather_client  # pylint: disable=import-outside-toplevel,cyclic-import
+
+    location = lookup.location
+
+    if lookup.request_type is RequestType.WEATHER:
+        if isinstance(location, str):
+            return fmi_weather_client.weather_by_place_name(location)
+        return fmi_weather_client.weather_by_coordinates(*location)
+
+    if lookup.request_type is RequestType.FORECAST:
+        if isinstance(location, str):
+            return fmi_weather_client.forecast_by_place_name(location, lookup.timestep_hours, lookup.forecast_points)
+        return fmi_weather_client.forecast_by_coordinates(*location, lookup.timestep_hours, lookup.forecast_points)
+
+    if lookup.request_type is RequestType.OBSERVATION:
+        if isinstance(location, str):
+            return fmi_weather_client.observation_by_place(location)
+        if isinstance(location, int):
+            return fmi_weather_client.observation_by_station_id(location)
+        raise ValueError("Observations can be looked up only by station id or place name")
+
+    raise ValueError(f"Invalid request_type {lookup.request_type}")
@@ -1,6 +1,6 @@
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
-from typing import List, Optional, NamedTuple
+from typing import Dict, List, Optional, NamedTuple, Tuple, Union
 
 
 class RequestType(Enum):
@@ -10,6 +10,17 @@ class RequestType(Enum):
     OBSERVATION = 2
 
 
+class Lookup(NamedTuple):
+    """
+    Represents a single lookup. Location is a (lat, lon) tuple or a place name. Observations
+    can also be looked up by station id.
+    """
+    request_type: RequestType
+    location: Union[Tuple[float, float], str, int]
+    timestep_hours: int = 24
+    forecast_points: int = 4
+
+
 class FMIPlace(NamedTuple):
     """Represent a place in FMI response"""
     name: str
@@ -91,3 +102,33 @@ class Forecast(NamedTuple):
     lat: float
     lon: float
     forecasts: List[WeatherData]
+
+
+class WeatherAndForecast(NamedTuple):
+    """Represents the current weather and a forecast of the same location"""
+    weather: Optional[Weather]
+    forecast: Forecast
+
+
+class MergedWeather(NamedTuple):
+    """
+    Represents a weather combined from the newest available value of each field.
+    Times tell which row each value was taken from. Fields without any value are left out of the times.
+    """
+    place: str
+    lat: float
+    lon: float
+    data: WeatherData
+    times: Dict[str, datetime]
+
+
+class DailySummary(NamedTuple):
+    """Represents an aggregated summary of a single forecast day"""
+    date: date
+    temperature_min: Value
+    temperature_max: Value
+    wind_speed_max: Value
+    wind_gust_max: Value
+
+    # Total amount of rain during the day
+    precipitation_amount: Value
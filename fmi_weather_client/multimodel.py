@@ -0,0 +1,298 @@
+import logging
+import math
+from array import array
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from fmi_weather_client import http
+from fmi_weather_client.columns import FIELDS, ForecastColumns, from_columns, take
+from fmi_weather_client.models import Forecast, RequestType
+from fmi_weather_client.parsers.forecast import FIELD_PARAMETERS, ParsedResponse, _feels_like, parse_compact
+
+_LOGGER = logging.getLogger(__name__)
+
+# Merge rules
+PRIORITY = 'priority'
+BLEND = 'blend'
+
+# Fields that are never averaged. Blending takes them from the first model that has a value.
+_CATEGORICAL_FIELDS = frozenset({'symbol', 'land_sea_mask'})
+
+_UNITS = {field: unit for field, _, unit in FIELD_PARAMETERS}
+_FEELS_LIKE_PARAMETERS = [(field, parameter) for field, parameter, _ in FIELD_PARAMETERS
+                          if parameter in ('Temperature', 'WindSpeedMS', 'Humidity')]
+_UNITS['feels_like'] = '°C'
+
+
+class ForecastModel(NamedTuple):
+    """Forecast model of FMI and the weather fields it provides"""
+    name: str
+    query_id: str
+
+    # FMI parameter of each weather field
+    parameters: Dict[str, str]
+
+
+EDITED = ForecastModel('edited', http.FORECAST_QUERY_ID, {
+    field: parameter for field, parameter, _ in FIELD_PARAMETERS
+    if parameter in http.FORECAST_PARAMETERS.split(',')
+})
+
+HARMONIE = ForecastModel('harmonie', 'fmi::forecast::harmonie::surface::point::multipointcoverage', {
+    'temperature': 'Temperature',
+    'dew_point': 'DewPoint',
+    'pressure': 'Pressure',
+    'humidity': 'Humidity',
+    'wind_direction': 'WindDirection',
+    'wind_speed': 'WindSpeedMS',
+    'wind_u_component': 'WindUMS',
+    'wind_v_component': 'WindVMS',
+    'wind_gust': 'WindGust',
+    'cloud_cover': 'TotalCloudCover',
+    'cloud_low_cover': 'LowCloudCover',
+    'cloud_mid_cover': 'MediumCloudCover',
+    'cloud_high_cover': 'HighCloudCover',
+    # PrecipitationAmount of HARMONIE is accumulated over the forecast, so the hourly amount is used
+    'precipitation_amount': 'Precipitation1h',
+    'radiation_short_wave_acc': 'RadiationGlobalAccumulation',
+    'radiation_short_wave_surface_net_acc': 'RadiationNetSurfaceSWAccumulation',
+    'radiation_long_wave_surface_net_acc': 'RadiationNetSurfaceLWAccumulation',
+    'geopotential_height': 'GeopHeight',
+})
+
+ECMWF = ForecastModel('ecmwf', 'ecmwf::forecast::surface::point::multipointcoverage', {
+    'temperature': 'Temperature',
+    'dew_point': 'DewPoint',
+    'pressure': 'Pressure',
+    'humidity': 'Humidity',
+    'wind_direction': 'WindDirection',
+    'wind_speed': 'WindSpeedMS',
+    'cloud_cover': 'TotalCloudCover',
+    'precipitation_amount': 'Precipitation1h',
+})
+
+
+class ModelForecast(NamedTuple):
+    """Represents a forecast merged from many forecast models"""
+    forecast: Forecast
+
+    # Models that each value of each field came from. Rows without a value have no models.
+    sources: Dict[str, List[Tuple[str, ...]]]
+
+    # Errors of the models that failed and were left out, by model name
+    errors: Dict[str, Exception]
+
+
+# pylint: disable=too-many-arguments,too-many-positional-arguments
+def forecast_by_coordinates(lat: float, lon: float, models: Sequence[ForecastModel] = (EDITED, HARMONIE, ECMWF),
+                            timestep_hours: int = 1, forecast_points: int = 24, rule: str = PRIORITY,
+                            weights: Optional[Dict[str, float]] = None, fail_fast: bool = False) -> ModelForecast:
+    """
+    Get forecasts of many models by coordinates and merge them
+    :param lat: Latitude (e.g. 25.67087)
+    :param lon: Longitude (e.g. 62.39758)
+    :param models: Forecast models in priority order
+    :param timestep_hours: Hours between forecasts
+    :param forecast_points: number of forcast points
+    :param rule: PRIORITY takes each value from the first model that has it, BLEND averages the models
+    :param weights: Blending weight of each model by name. Models without a weight have weight 1.
+    :param fail_fast: Raise the error of the first model that fails instead of leaving the model out
+    :return: Merged forecast, the models of each value and the errors of the models that were left out
+    """
+    forecasts, errors = fetch_models(models, timestep_hours, forecast_points, fail_fast=fail_fast, lat=lat, lon=lon)
+    columns, sources = merge(forecasts, rule, weights)
+    return ModelForecast(http.restore_coordinates(from_columns(columns), lat, lon), sources, errors)
+
+
+def forecast_by_place_name(name: str, models: Sequence[ForecastModel] = (EDITED, HARMONIE, ECMWF),
+                           timestep_hours: int = 1, forecast_points: int = 24, rule: str = PRIORITY,
+                           weights: Optional[Dict[str, float]] = None, fail_fast: bool = False) -> ModelForecast:
+    """
+    Get forecasts of many models by place name and merge them
+    :param name: Place name
+    :param models: Forecast models in priority order
+    :param timestep_hours: Hours between forecasts
+    :param forecast_points: number of forcast points
+    :param rule: PRIORITY takes each value from the first model that has it, BLEND averages the models
+    :param weights: Blending weight of each model by name. Models without a weight have weight 1.
+    :param fail_fast: Raise the error of the first model that fails instead of leaving the model out
+    :return: Merged forecast, the models of each value and the errors of the models that were left out
+    """
+    forecasts, errors = fetch_models(models, timestep_hours, forecast_points, fail_fast=fail_fast, place=name)
+    columns, sources = merge(forecasts, rule, weights)
+    return ModelForecast(from_columns(columns), sources, errors)
+
+
+# pylint: disable-next=too-many-arguments,too-many-positional-arguments
+def fetch_models(models: Sequence[ForecastModel], timestep_hours: int = 1, forecast_points: int = 24,
+                 start_time: Optional[datetime] = None, fail_fast: bool = False,
+                 **location: Any) -> Tuple[Dict[str, ForecastColumns], Dict[str, Exception]]:
+    """
+    Get forecasts of many models in parallel. All models are requested for the same time points.
+    :param models: Forecast models
+    :param timestep_hours: Hours between forecasts
+    :param forecast_points: number of forcast points
+    :param start_time: Time of the first forecast point. Defaults to now.
+    :param fail_fast: Raise the error of the first model that fails instead of leaving the model out
+    :param location: place or lat and lon
+    :return: Forecast columns by model name, in the order of the models, and errors of the models that failed.
+             The error of the first model is raised if all models fail.
+    """
+    if not models:
+        raise ValueError("At least one forecast model is needed")
+
+    start_time = start_time or datetime.now(timezone.utc)
+    forecasts = {}
+    errors: Dict[str, Exception] = {}
+    executor = ThreadPoolExecutor(max_workers=len(models), thread_name_prefix='fmi-model')
+    futures = {executor.submit(fetch_model, model, timestep_hours, forecast_points, start_time, **location): model
+               for model in models}
+    if fail_fast:
+        for future in as_completed(futures):
+            if future.exception() is not None:
+                # Requests already sent are left to finish in the background
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise future.exception()
+
+    try:
+        for future, model in futures.items():
+            try:
+                forecasts[model.name] = future.result()
+            except Exception as err:  # pylint: disable=broad-exception-caught
+                _LOGGER.warning("Forecast of model %s failed: %s", model.name, err)
+                errors[model.name] = err
+    finally:
+        executor.shutdown()
+
+    if not forecasts:
+        raise errors[models[0].name]
+    return forecasts, errors
+
+
+def fetch_model(model: ForecastModel, timestep_hours: int = 1, forecast_points: int = 24,
+                start_time: Optional[datetime] = None, **location: Any) -> ForecastColumns:
+    """
+    Get a forecast of a single model as columns
+    :param model: Forecast model
+    :param timestep_hours: Hours between forecasts
+    :param forecast_points: number of forcast points
+    :param start_time: Time of the first forecast point. Defaults to now.
+    :param location: place or lat and lon
+    :return: Forecast columns with the fields of the model
+    """
+    body = http.request_model_forecast(model.query_id, ','.join(model.parameters.values()), timestep_hours,
+                                       forecast_points, start_time, **location)
+    return _model_columns(model, parse_compact(body, RequestType.FORECAST))
+
+
+def merge(forecasts: Dict[str, ForecastColumns], rule: str = PRIORITY,
+          weights: Optional[Dict[str, float]] = None) -> Tuple[ForecastColumns, Dict[str, List[Tuple[str, ...]]]]:
+    """
+    Merge forecast columns of many models onto the union of their time points
+    :param forecasts: Forecast columns by model name, in priority order
+    :param rule: PRIORITY takes each value from the first model that has it, BLEND averages the models
+    :param weights: Blending weight of each model by name. Models without a weight have weight 1.
+    :return: Merged columns and the models that each value of each field came from
+    """
+    if rule not in (PRIORITY, BLEND):
+        raise ValueError(f"Invalid merge rule {rule}")
+    if not forecasts:
+        raise ValueError("At least one forecast is needed")
+
+    first = next(iter(forecasts.values()))
+    times = sorted(set().union(*(columns.times for columns in forecasts.values())))
+
+    # Row of each merged time point in each model; -1 if the model does not have it
+    rows = {}
+    for name, columns in forecasts.items():
+        positions = {point_time: idx for idx, point_time in enumerate(columns.times)}
+        rows[name] = [positions.get(point_time, -1) for point_time in times]
+
+    values = {}
+    sources = {}
+    for field in FIELDS:
+        candidates = [(name, columns.values[field], rows[name], (weights or {}).get(name, 1.0))
+                      for name, columns in forecasts.items() if field in columns.values]
+        if not candidates:
+            continue
+        if rule == BLEND and field not in _CATEGORICAL_FIELDS:
+            values[field], sources[field] = _blend(field, candidates, len(times))
+        else:
+            values[field], sources[field] = _first(candidates, len(times))
+
+    # Feels like temperature is not a parameter of the models, so it is derived from the merged values
+    if 'temperature' in values:
+        values['feels_like'], sources['feels_like'] = _feels_like_column(values, sources, len(times))
+
+    units = {field: unit for columns in reversed(list(forecasts.values())) for field, unit in columns.units.items()}
+    return ForecastColumns(first.place, first.lat, first.lon, times, units, values), sources
+
+
+def _first(candidates: List[Tuple[str, Any, List[int], float]], count: int) -> Tuple[array, List[Tuple[str, ...]]]:
+    """Take each value from the first model that has it"""
+    column = array('d', [math.nan]) * count
+    sources: List[Tuple[str, ...]] = [()] * count
+    for name, values, rows, _ in reversed(candidates):
+        source = (name,)
+        for idx, row in enumerate(rows):
+            if row >= 0 and not math.isnan(values[row]):
+                column[idx] = values[row]
+                sources[idx] = source
+    return column, sources
+
+
+def _blend(field: str, candidates: List[Tuple[str, Any, List[int], float]],
+           count: int) -> Tuple[array, List[Tuple[str, ...]]]:
+    """Weighted mean of the models that have a value. Wind direction is averaged along the circle."""
+    column = array('d', [math.nan]) * count
+    sources: List[Tuple[str, ...]] = [()] * count
+    for idx in range(count):
+        present = [(name, values[rows[idx]], weight) for name, values, rows, weight in candidates
+                   if rows[idx] >= 0 and not math.isnan(values[rows[idx]])]
+        total = math.fsum(weight for _, _, weight in present)
+        if not present or total <= 0:
+            continue
+
+        if field == 'wind_direction':
+            sin = math.fsum(weight * math.sin(math.radians(value)) for _, value, weight in present)
+            cos = math.fsum(weight * math.cos(math.radians(value)) for _, value, weight in present)
+            column[idx] = math.degrees(math.atan2(sin, cos)) % 360
+        else:
+            column[idx] = math.fsum(weight * value for _, value, weight in present) / total
+        sources[idx] = tuple(name for name, _, _ in present)
+    return column, sources
+
+
+def _feels_like_column(values: Dict[str, array], sources: Dict[str, List[Tuple[str, ...]]],
+                       count: int) -> Tuple[array, List[Tuple[str, ...]]]:
+    """Feels like temperature of each row and the models of the values it is derived from"""
+    inputs = [(parameter, values[field], sources[field]) for field, parameter in _FEELS_LIKE_PARAMETERS
+              if field in values]
+    column = array('d', [math.nan]) * count
+    column_sources: List[Tuple[str, ...]] = [()] * count
+    for idx in range(count):
+        feels_like = _feels_like({parameter: input_values[idx] for parameter, input_values, _ in inputs})
+        column[idx] = math.nan if feels_like is None else feels_like
+        column_sources[idx] = tuple(dict.fromkeys(name for _, _, names in inputs for name in names[idx]))
+    return column, column_sources
+
+
+def _model_columns(model: ForecastModel, parsed: ParsedResponse) -> ForecastColumns:
+    """Columns of the weather fields of a model. Time points without any value are left out."""
+    type_count = len(parsed.types)
+    positions = {parameter: idx for idx, parameter in enumerate(parsed.types)}
+
+    values = {}
+    for field, parameter in model.parameters.items():
+        position = positions.get(parameter)
+        if position is not None:
+            values[field] = parsed.values[position::type_count]
+
+    place = parsed.place
+    columns = ForecastColumns(place.name, place.lat, place.lon,
+                              [datetime.fromtimestamp(timestamp, timezone.utc) for timestamp in parsed.times],
+                              dict(_UNITS), values)
+    rows = [idx for idx in range(len(columns.times))
+            if any(not math.isnan(column[idx]) for column in values.values())]
+    return columns if len(rows) == len(columns.times) else take(columns, rows)
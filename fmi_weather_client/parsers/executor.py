@@ -0,0 +1,59 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from fmi_weather_client.models import RequestType
+from fmi_weather_client.parsers import forecast as forecast_parser
+from fmi_weather_client.parsers.forecast import ParsedResponse
+
+
+class ParseExecutor:
+    """
+    Parse large response bodies in a process pool.
+
+    Parsing is pure Python, so threads parsing at the same time take turns on the GIL. Bodies that
+    are at least threshold characters long are parsed in worker processes instead. Workers return
+    the parsed response in compact form and the weather data is created in the calling process.
+    Smaller bodies are parsed inline, because sending them to a worker costs more than parsing them.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, threshold: int = 256 * 1024):
+        """
+        :param max_workers: Number of worker processes. Defaults to the number of processors.
+        :param threshold: Minimum body length that is parsed in a worker process
+        """
+        self.threshold = threshold
+        self._pool = ProcessPoolExecutor(max_workers=max_workers)
+
+    def offloads(self, body: str) -> bool:
+        """
+        Check if the body is parsed in a worker process
+        :param body: Response body
+        :return: True if the body is parsed in a worker process; False otherwise
+        """
+        return len(body) >= self.threshold
+
+    def parse(self, body: str, request_type: RequestType) -> ParsedResponse:
+        """
+        Parse a response body in a worker process
+        :param body: Response body
+        :param request_type: Request type
+        :return: Parsed response
+        """
+        return self._pool.submit(forecast_parser.parse_compact, body, request_type).result()
+
+    def install(self) -> 'ParseExecutor':
+        """Parse all large responses of the library with this executor"""
+        forecast_parser.set_parse_executor(self)
+        return self
+
+    def shutdown(self):
+        """Stop parsing with this executor and stop the worker processes"""
+        if forecast_parser.get_parse_executor() is self:
+            forecast_parser.set_parse_executor(None)
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self.install()
+
+    def __exit__(self, *args):
+        self.shutdown()
@@ -1,16 +1,98 @@
 from __future__ import annotations
 
 import logging
+from array import array
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Tuple
 
 import math
 import xmltodict
 
+from fmi_weather_client.fingerprint import FingerprintCache, fingerprint
 from fmi_weather_client.models import FMIPlace, Forecast, Value, WeatherData, RequestType
 
+if TYPE_CHECKING:
+    from fmi_weather_client.parsers.executor import ParseExecutor
+
 _LOGGER = logging.getLogger(__name__)
 
+# WeatherData field, FMI parameter and unit of each value read from the response.
+# Some fields were available in HIRLAM forecasts, but are not available in
+# HARMONIE forecasts. These fields are kept here for backward compatibility.
+# Value of those fields will always be None.
+FIELD_PARAMETERS: Tuple[Tuple[str, str, str], ...] = (
+    ('temperature', 'Temperature', '°C'),
+    ('dew_point', 'DewPoint', '°C'),
+    ('pressure', 'Pressure', 'hPa'),
+    ('humidity', 'Humidity', '%'),
+    ('wind_direction', 'WindDirection', '°'),
+    ('wind_speed', 'WindSpeedMS', 'm/s'),
+    ('wind_u_component', 'WindUMS', 'm/s'),
+    ('wind_v_component', 'WindVMS', 'm/s'),
+    ('wind_max', 'MaximumWind', 'm/s'),  # Not supported
+    ('wind_gust', 'WindGust', 'm/s'),
+    ('symbol', 'WeatherSymbol3', ''),
+    ('cloud_cover', 'TotalCloudCover', '%'),
+    ('cloud_low_cover', 'LowCloudCover', '%'),
+    ('cloud_mid_cover', 'MediumCloudCover', '%'),
+    ('cloud_high_cover', 'HighCloudCover', '%'),
+    ('precipitation_amount', 'Precipitation1h', 'mm/h'),
+    ('radiation_short_wave_acc', 'RadiationGlobalAccumulation', 'J/m²'),
+    ('radiation_short_wave_surface_net_acc', 'RadiationNetSurfaceSWAccumulation', 'J/m²'),
+    ('radiation_long_wave_acc', 'RadiationLWAccumulation', 'J/m²'),  # Not supported
+    ('radiation_long_wave_surface_net_acc', 'RadiationNetSurfaceLWAccumulation', 'J/m²'),
+    ('radiation_short_wave_diff_surface_acc', 'RadiationDiffuseAccumulation', 'J/m²'),  # Not supported
+    ('geopotential_height', 'GeopHeight', 'm'),
+    ('land_sea_mask', 'LandSeaMask', ''),  # Not supported
+)
+
+
+class ParsedResponse(NamedTuple):
+    """Parsed response in a compact form that is cheap to pass between processes"""
+    place: FMIPlace
+
+    # Time points as epoch seconds
+    times: List[int]
+    types: List[str]
+
+    # Values of all time points, one after another. Each time point has a value for each type.
+    values: array
+
+
+_PARSE_EXECUTOR: Optional[ParseExecutor] = None
+
+# Recently parsed forecasts by request type and body fingerprint. None disables the cache.
+_PARSED: Optional[FingerprintCache] = None
+
+
+def set_parse_executor(executor: Optional[ParseExecutor]):
+    """
+    Parse large response bodies with given executor, e.g. a ParseExecutor
+    :param executor: Parse executor. None parses everything inline.
+    """
+    global _PARSE_EXECUTOR  # pylint: disable=global-statement
+    _PARSE_EXECUTOR = executor
+
+
+def get_parse_executor() -> Optional[ParseExecutor]:
+    """Get the executor that parses large response bodies"""
+    return _PARSE_EXECUTOR
+
+
+def set_parse_cache(max_size: Optional[int] = 64):
+    """
+    Keep recently parsed forecasts, so that unchanged response bodies are not parsed again
+    :param max_size: Maximum number of cached forecasts. None disables the cache.
+    """
+    global _PARSED  # pylint: disable=global-statement
+    _PARSED = FingerprintCache(max_size) if max_size is not None else None
+
+
+def clear_cache():
+    """Forget recently parsed forecasts"""
+    if _PARSED is not None:
+        _PARSED.clear()
+
 
 def parse_fmi_response(body: str, request_type: RequestType):
     """
@@ -19,45 +101,89 @@ def parse_fmi_response(body: str, request_type: RequestType):
     :param request_type: Request type
     :return: Response body as dictionary or None when observation station does not exist/is invalid type/has no data
     """
+    # Polls return the same data until the next model run, so an unchanged body can reuse the parsed forecast
+    cache = _PARSED
+    key = (request_type, fingerprint(body)) if cache is not None else None
+    forecast = cache.get(key) if cache is not None else None
+    if forecast is not None:
+        _LOGGER.debug("Response has not changed since it was parsed")
+    else:
+        executor = _PARSE_EXECUTOR
+        if executor is not None and executor.offloads(body):
+            parsed = executor.parse(body, request_type)
+        else:
+            parsed = parse_compact(body, request_type)
+
+        forecast = _create_forecast(parsed)
+        if cache is not None:
+            cache.put(key, forecast)
+
+    # Every caller gets its own list of rows, so changing it does not change the cached forecast
+    return forecast._replace(forecasts=list(forecast.forecasts))
+
+
+def parse_compact(body: str, request_type: RequestType) -> ParsedResponse:
+    """
+    Parse FMI forecast response body to compact form
+    :param body: Forecast response body
+    :param request_type: Request type
+    :return: Parsed response
+    """
     data = xmltodict.parse(body)
 
     try:
         station = _get_place(data, request_type)
         _LOGGER.debug("Received place: %s (%d, %d)", station.name, station.lat, station.lon)
 
-        times = _get_datetimes(data)
+        times = _get_timestamps(data)
         _LOGGER.debug("Received time points: %d", len(times))
 
         types = _get_value_types(data)
         _LOGGER.debug("Received types: %d", len(types))
 
-        value_sets = _get_values(data)
-        _LOGGER.debug("Received value sets: %d", len(value_sets))
+        values = _get_values(data)
+        _LOGGER.debug("Received value sets: %d", len(values) // max(len(types), 1))
 
     except Exception as e:
         _LOGGER.error("couldn't parse response body:")
         _LOGGER.error(data)
         _LOGGER.error(body)
         raise e
-    # Combine values with types
-    typed_value_sets: List[Dict[str, float]] = []
-    for value_set in value_sets:
-        typed_value_set = {}
-        for idx, value in enumerate(value_set):
-            typed_value_set[types[idx]] = value
-        typed_value_sets.append(typed_value_set)
-
-    # Combine typed values with times
+
+    return ParsedResponse(station, times, types, values)
+
+
+def _create_forecast(parsed: ParsedResponse) -> Forecast:
+    """Create forecast from parsed response"""
+    types = parsed.types
+    values = parsed.values
+    type_count = len(types)
+
+    # Combine values with types and times
     forecasts = []
-    for idx, time in enumerate(times):
-        if _is_non_empty_forecast(typed_value_sets[idx]):
-            forecasts.append(_create_weather_data(time, typed_value_sets[idx]))
+    for idx, timestamp in enumerate(parsed.times):
+        weather_data = to_weather_data(timestamp, dict(zip(types, values[idx * type_count:(idx + 1) * type_count])))
+        if weather_data is not None:
+            forecasts.append(weather_data)
 
     _LOGGER.debug("Received non-empty value sets: %d", len(forecasts))
 
+    station = parsed.place
     return Forecast(station.name, station.lat, station.lon, forecasts)
 
 
+def to_weather_data(timestamp: int, typed_values: Dict[str, float]) -> Optional[WeatherData]:
+    """
+    Create weather data of a single time point
+    :param timestamp: Time as epoch seconds
+    :param typed_values: Values by FMI parameter name
+    :return: Weather data; None if all values are missing
+    """
+    if not _is_non_empty_forecast(typed_values):
+        return None
+    return _create_weather_data(datetime.fromtimestamp(timestamp, timezone.utc), typed_values)
+
+
 def _get_place(data: Dict[str, Any], request_type: RequestType) -> FMIPlace:
     place_data = (data['wfs:FeatureCollection']['wfs:member']['omso:GridSeriesObservation']
                       ['om:featureOfInterest']['sams:SF_SpatialSamplingFeature']['sams:shape']
@@ -73,7 +199,7 @@ def _get_place(data: Dict[str, Any], request_type: RequestType) -> FMIPlace:
     return FMIPlace(place_data['gml:name'], lat, lon)
 
 
-def _get_datetimes(data: Dict[str, Any]) -> List[datetime]:
+def _get_timestamps(data: Dict[str, Any]) -> List[int]:
     result = []
     forecast_datetimes = (data['wfs:FeatureCollection']['wfs:member']['omso:GridSeriesObservation']
                               ['om:result']['gmlcov:MultiPointCoverage']['gml:domainSet']
@@ -82,8 +208,7 @@ def _get_datetimes(data: Dict[str, Any]) -> List[datetime]:
         parts = forecast_datetime.strip().split()
         if not parts:
             continue
-        timestamp = datetime.fromtimestamp(int(parts[2]), timezone.utc).replace(tzinfo=timezone.utc)
-        result.append(timestamp)
+        result.append(int(parts[2]))
 
     return result
 
@@ -100,63 +225,18 @@ def _get_value_types(data) -> List[str]:
     return result
 
 
-def _get_values(data: Dict[str, Any]) -> List[List[float]]:
-    result = []
+def _get_values(data: Dict[str, Any]) -> array:
     value_sets = (data['wfs:FeatureCollection']['wfs:member']['omso:GridSeriesObservation']
                       ['om:result']['gmlcov:MultiPointCoverage']['gml:rangeSet']['gml:DataBlock']
-                      ['gml:doubleOrNilReasonTupleList'].split('\n'))
+                      ['gml:doubleOrNilReasonTupleList'])
 
-    for forecast_value_set in value_sets:
-        forecast_values = forecast_value_set.strip().split()
-        if not forecast_values:
-            continue
-        value_set = []
-        for value in forecast_values:
-            value_set.append(float(value))
-
-        result.append(value_set)
-
-    return result
+    return array('d', map(float, value_sets.split()))
 
 
 def _create_weather_data(time, values: Dict[str, float]) -> WeatherData:
     """Create weather data from raw values"""
-
-    def to_value(vals: Dict[str, float], variable_name: str, unit: str) -> Value:
-        value = vals.get(variable_name, None)
-        return Value(value, unit)
-
-    # Some fields were available in HIRLAM forecasts, but are not
-    # available in HARMONIE forecasts. These fields are kept here
-    # for backward compatibility. Value of those fields will
-    # always be None.
-    return WeatherData(
-        time=time,
-        temperature=to_value(values, 'Temperature', '°C'),
-        dew_point=to_value(values, 'DewPoint', '°C'),
-        pressure=to_value(values, 'Pressure', 'hPa'),
-        humidity=to_value(values, 'Humidity', '%'),
-        wind_direction=to_value(values, 'WindDirection', '°'),
-        wind_speed=to_value(values, 'WindSpeedMS', 'm/s'),
-        wind_u_component=to_value(values, 'WindUMS', 'm/s'),
-        wind_v_component=to_value(values, 'WindVMS', 'm/s'),
-        wind_max=to_value(values, 'MaximumWind', 'm/s'),  # Not supported
-        wind_gust=to_value(values, 'WindGust', 'm/s'),
-        symbol=to_value(values, 'WeatherSymbol3', ''),
-        cloud_cover=to_value(values, 'TotalCloudCover', '%'),
-        cloud_low_cover=to_value(values, 'LowCloudCover', '%'),
-        cloud_mid_cover=to_value(values, 'MediumCloudCover', '%'),
-        cloud_high_cover=to_value(values, 'HighCloudCover', '%'),
-        precipitation_amount=to_value(values, 'Precipitation1h', 'mm/h'),
-        radiation_short_wave_acc=to_value(values, 'RadiationGlobalAccumulation', 'J/m²'),
-        radiation_short_wave_surface_net_acc=to_value(values, 'RadiationNetSurfaceSWAccumulation', 'J/m²'),
-        radiation_long_wave_acc=to_value(values, 'RadiationLWAccumulation', 'J/m²'),  # Not supported
-        radiation_long_wave_surface_net_acc=to_value(values, 'RadiationNetSurfaceLWAccumulation', 'J/m²'),
-        radiation_short_wave_diff_surface_acc=to_value(values, 'RadiationDiffuseAccumulation', 'J/m²'),  # Not supported
-        geopotential_height=to_value(values, 'GeopHeight', 'm'),
-        land_sea_mask=to_value(values, 'LandSeaMask', ''),  # Not supported
-        feels_like=Value(_feels_like(values), '°C')
-        )
+    fields = {field: Value(values.get(parameter, None), unit) for field, parameter, unit in FIELD_PARAMETERS}
+    return WeatherData(time=time, **fields, feels_like=Value(_feels_like(values), '°C'))
 
 
 def _feels_like(vals: Dict[str, float]) -> float | None:
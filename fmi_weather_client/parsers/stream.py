@@ -0,0 +1,186 @@
+from array import array
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from urllib.parse import parse_qs, urlparse
+from xml.parsers import expat
+
+from fmi_weather_client.http import FORECAST_PARAMETERS, OBSERVATION_PARAMETERS
+from fmi_weather_client.models import FMIPlace, RequestType, WeatherData
+from fmi_weather_client.parsers.forecast import to_weather_data
+
+Source = Union[str, bytes, IO, Iterable[Union[str, bytes]]]
+
+_READ_SIZE = 64 * 1024
+
+
+class _StreamParser:  # pylint: disable=too-many-instance-attributes,too-few-public-methods
+    """
+    Incremental parser of multipointcoverage responses.
+
+    Rows are decoded while the tuple list is being read, so only the time axis of the response
+    is kept in memory (three numbers per row), never the rows themselves.
+    """
+
+    def __init__(self, fields: Sequence[str], fields_from_response: bool):
+        self._fields = list(fields)
+        self._fields_from_response = fields_from_response
+        self._parser = expat.ParserCreate()
+        self._parser.buffer_text = True
+        self._parser.StartElementHandler = self._start
+        self._parser.EndElementHandler = self._end
+        self._parser.CharacterDataHandler = self._characters
+
+        self._text_target: Optional[str] = None
+        self._text: List[str] = []
+        self._pending = ''
+        self._places: Dict[Tuple[float, float], str] = {}
+        self._point_name = ''
+        self._positions = array('d')
+        self._row: List[float] = []
+        self._row_index = 0
+        self._received_fields: List[str] = []
+        self.rows: List[Tuple[FMIPlace, WeatherData]] = []
+
+    def feed(self, data: Union[str, bytes], final: bool = False):
+        """Feed a chunk of the response. Decoded rows are appended to rows."""
+        self._parser.Parse(data, final)
+        if final and self._received_fields and self._received_fields != self._fields:
+            raise ValueError(f"Response has fields {self._received_fields}, expected {self._fields}")
+
+    def _start(self, name: str, attributes: Dict[str, str]):
+        if name in ('gml:name', 'gml:pos'):
+            self._text_target = name
+            self._text = []
+        elif name == 'gmlcov:positions':
+            self._text_target = name
+            self._pending = ''
+            self._positions = array('d')
+        elif name == 'gml:doubleOrNilReasonTupleList':
+            self._text_target = name
+            self._pending = ''
+            self._row = []
+            self._row_index = 0
+        elif name == 'gml:Point':
+            self._point_name = ''
+        elif name == 'om:observedProperty' and self._fields_from_response:
+            # Lists the value types in the order of the values. Unlike the data record, it comes before the values.
+            query = parse_qs(urlparse(attributes.get('xlink:href', '')).query)
+            if 'param' in query:
+                self._fields = query['param'][0].split(',')
+        elif name == 'swe:DataRecord':
+            self._received_fields = []
+        elif name == 'swe:field':
+            self._received_fields.append(attributes.get('name', ''))
+
+    def _end(self, name: str):
+        if name != self._text_target:
+            return
+        self._text_target = None
+
+        if name == 'gml:name':
+            self._point_name = ''.join(self._text).strip()
+        elif name == 'gml:pos':
+            lat, lon = (float(part) for part in ''.join(self._text).split()[:2])
+            self._places[(lat, lon)] = self._point_name
+        elif name == 'gmlcov:positions':
+            self._add_positions(self._pending.split())
+        elif name == 'gml:doubleOrNilReasonTupleList':
+            self._add_values(self._pending.split())
+
+    def _characters(self, data: str):
+        if self._text_target in ('gml:name', 'gml:pos'):
+            self._text.append(data)
+        elif self._text_target in ('gmlcov:positions', 'gml:doubleOrNilReasonTupleList'):
+            # The last token may continue in the next chunk
+            tokens = (self._pending + data).split()
+            self._pending = '' if data[-1:].isspace() else tokens.pop() if tokens else ''
+            if self._text_target == 'gmlcov:positions':
+                self._add_positions(tokens)
+            else:
+                self._add_values(tokens)
+
+    def _add_positions(self, tokens: List[str]):
+        self._positions.extend(float(token) for token in tokens)
+
+    def _add_values(self, tokens: List[str]):
+        field_count = len(self._fields)
+        for token in tokens:
+            self._row.append(float(token))
+            if len(self._row) < field_count:
+                continue
+
+            offset = self._row_index * 3
+            lat, lon, timestamp = self._positions[offset:offset + 3]
+            weather_data = to_weather_data(int(timestamp), dict(zip(self._fields, self._row)))
+            if weather_data is not None:
+                self.rows.append((FMIPlace(self._places.get((lat, lon), ''), lat, lon), weather_data))
+            self._row = []
+            self._row_index += 1
+
+
+def iter_weather_data(source: Source, request_type: RequestType,
+                      fields: Optional[Sequence[str]] = None) -> Iterator[Tuple[FMIPlace, WeatherData]]:
+    """
+    Parse FMI response incrementally and yield rows as soon as they are decoded.
+
+    Value types are read from the observed property of the response. If the response does not
+    have one, they default to the parameters this library requests. When the value types listed
+    after the values do not match, ValueError is raised at the end of the response.
+
+    :param source: Response body as text, bytes, file-like object or iterable of chunks
+    :param request_type: Request type
+    :param fields: FMI parameter names in the order of the values. Overrides the ones in the response.
+    :return: Iterator of (place, weather data) pairs
+    """
+    fields_from_response = fields is None
+    if fields is None:
+        parameters = OBSERVATION_PARAMETERS if request_type is RequestType.OBSERVATION else FORECAST_PARAMETERS
+        fields = parameters.split(',')
+
+    parser = _StreamParser(fields, fields_from_response)
+    for chunk in _chunks(source):
+        parser.feed(chunk)
+        yield from parser.rows
+        parser.rows.clear()
+
+    parser.feed(b'', final=True)
+    yield from parser.rows
+
+
+def iter_station_batches(source: Source, request_type: RequestType, fields: Optional[Sequence[str]] = None,
+                         batch_size: int = 1000) -> Iterator[Tuple[FMIPlace, List[WeatherData]]]:
+    """
+    Parse FMI response incrementally and yield rows in batches of the same station.
+
+    :param source: Response body as text, bytes, file-like object or iterable of chunks
+    :param request_type: Request type
+    :param fields: FMI parameter names in the order of the values
+    :param batch_size: Maximum number of rows in a batch
+    :return: Iterator of (place, rows) pairs
+    """
+    place: Optional[FMIPlace] = None
+    batch: List[WeatherData] = []
+
+    for row_place, weather_data in iter_weather_data(source, request_type, fields):
+        if batch and (row_place != place or len(batch) >= batch_size):
+            yield place, batch
+            batch = []
+        place = row_place
+        batch.append(weather_data)
+
+    if batch:
+        yield place, batch
+
+
+def _chunks(source: Source) -> Iterator[Union[str, bytes]]:
+    """Get source as chunks"""
+    if isinstance(source, (str, bytes)):
+        for offset in range(0, len(source), _READ_SIZE):
+            yield source[offset:offset + _READ_SIZE]
+    elif hasattr(source, 'read'):
+        while True:
+            chunk = source.read(_READ_SIZE)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        yield from source
@@ -0,0 +1,31 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """Token bucket that allows given number of requests per second"""
+
+    def __init__(self, rate: float):
+        """
+        :param rate: Requests per second. The bucket holds at least one token, so rates below one are allowed too.
+        """
+        self._rate = rate
+        self._capacity = max(rate, 1.0)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        """Take a token if one is available"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def rate(self) -> float:
+        """Get the allowed number of requests per second"""
+        return self._rate
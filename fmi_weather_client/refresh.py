@@ -0,0 +1,258 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from fmi_weather_client.lookups import fetch
+from fmi_weather_client.models import Lookup, RequestType
+
+_LOGGER = logging.getLogger(__name__)
+
+# How often FMI publishes new data for each request type and how long after the
+# full cadence step the new data is usually available, both in seconds. Current
+# weather is interpolated from the forecast in 10 minute steps.
+CADENCES: Dict[RequestType, Tuple[int, int]] = {
+    RequestType.WEATHER: (10 * 60, 0),
+    RequestType.FORECAST: (60 * 60, 5 * 60),
+    RequestType.OBSERVATION: (10 * 60, 3 * 60),
+}
+
+# Delay of the first retry after a failed refresh. Doubles on every failure, but a
+# failed lookup is always retried by the next update of FMI at the latest.
+_RETRY_DELAY = 30
+
+# Tie breaker for refreshes that are due at the same time
+_SEQUENCE = itertools.count()
+
+
+class RefreshState(NamedTuple):
+    """Represents the last good value of a watched lookup"""
+    value: Any
+
+    # Time of the latest successful fetch as epoch seconds. None if none succeeded yet.
+    fetched_at: Optional[float]
+    expires_at: float
+
+    # Error of the latest refresh if it failed
+    error: Optional[Exception]
+
+    # Whether the latest refresh got different data than the one before it
+    changed: bool = False
+
+
+class _Entry:
+    """Book-keeping of a single watched lookup"""
+
+    def __init__(self):
+        self.state: Optional[RefreshState] = None
+        self.refreshing: bool = False
+        self.failures: int = 0
+        self.due: Optional[float] = None
+        self.ready = threading.Event()
+
+    def is_stale(self, now: float) -> bool:
+        """Check if the value has expired"""
+        return self.state is None or now >= self.state.expires_at
+
+    def store(self, state: RefreshState):
+        """Store the result of a finished refresh"""
+        self.state = state
+        self.failures = 0 if state.error is None else self.failures + 1
+        self.refreshing = False
+
+
+def next_update(now: float, request_type: RequestType) -> float:
+    """
+    Get the time when FMI publishes the next update
+    :param now: Current time as epoch seconds
+    :param request_type: Request type
+    :return: Next update time as epoch seconds
+    """
+    cadence, delay = CADENCES[request_type]
+    return ((now - delay) // cadence + 1) * cadence + delay
+
+
+def _same(value: Any, previous: Any) -> bool:
+    """Check if a refresh got the same data as before"""
+    # Missing values are NaN, which is never equal to itself, so data with missing values is compared by representation
+    return value == previous or repr(value) == repr(previous)
+
+
+class RefreshScheduler:  # pylint: disable=too-many-instance-attributes
+    """
+    Keep watched lookups fresh in the background.
+
+    Watched lookups are re-fetched when FMI is expected to have published new data. Callers always
+    get the last good value immediately. Only the very first lookup of a location waits for the
+    response. When a refresh fails, the previous value is kept and the refresh is retried.
+    """
+
+    def __init__(self, max_workers: int = 4, clock: Callable[[], float] = time.time):
+        """
+        :param max_workers: Maximum number of concurrent refreshes
+        :param clock: Function that returns the current time as epoch seconds
+        """
+        self._clock = clock
+        self._max_workers = max_workers
+
+        # Created on the first refresh, so that the scheduler can be started again after stop
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._entries: Dict[Lookup, _Entry] = {}
+        self._queue: List[Tuple[float, int, Lookup]] = []
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+    def start(self):
+        """Start refreshing in a background thread"""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+
+        self._thread = threading.Thread(target=self._run, name='fmi-refresh-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread and wait for running refreshes. The scheduler can be started again."""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        with self._condition:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def watch(self, lookup: Lookup) -> Lookup:
+        """
+        Start refreshing a lookup. The first fetch starts immediately in the background.
+        :param lookup: Lookup to watch
+        :return: The lookup
+        """
+        with self._condition:
+            if lookup not in self._entries:
+                self._entries[lookup] = _Entry()
+                self._schedule(lookup, self._clock())
+        return lookup
+
+    def unwatch(self, lookup: Lookup):
+        """
+        Stop refreshing a lookup and forget its value
+        :param lookup: Lookup to forget
+        """
+        with self._condition:
+            self._entries.pop(lookup, None)
+
+    def watched(self) -> Set[Lookup]:
+        """Get currently watched lookups"""
+        with self._condition:
+            return set(self._entries)
+
+    def get(self, lookup: Lookup, timeout: Optional[float] = None) -> Any:
+        """
+        Get the last good value of a lookup. The lookup is watched from now on.
+        :param lookup: Lookup
+        :param timeout: Maximum time in seconds to wait for the first value
+        :return: Last good value
+        """
+        state = self.state(lookup, timeout)
+        if state is None:
+            raise TimeoutError(f"No value available for {lookup}")
+        if state.fetched_at is None and state.error is not None:
+            raise state.error
+        return state.value
+
+    def state(self, lookup: Lookup, timeout: Optional[float] = None) -> Optional[RefreshState]:
+        """
+        Get the last good value of a lookup with its metadata. The lookup is watched from now on.
+        :param lookup: Lookup
+        :param timeout: Maximum time in seconds to wait for the first value
+        :return: Refresh state; None if the first value was not received in time
+        """
+        self.watch(lookup)
+        with self._condition:
+            entry = self._entries[lookup]
+            now = self._clock()
+            if entry.is_stale(now) and not entry.refreshing and entry.due is None:
+                self._schedule(lookup, now)
+
+        if not self._running:
+            self.run_pending()
+
+        entry.ready.wait(timeout)
+        return entry.state
+
+    def run_pending(self) -> int:
+        """
+        Start refreshes that are due
+        :return: Number of started refreshes
+        """
+        started = 0
+        with self._condition:
+            now = self._clock()
+            while self._queue and self._queue[0][0] <= now:
+                due, _, lookup = heapq.heappop(self._queue)
+                entry = self._entries.get(lookup)
+                if entry is None or entry.refreshing or entry.due != due:
+                    continue
+                entry.refreshing = True
+                entry.due = None
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self._max_workers,
+                                                        thread_name_prefix='fmi-refresh')
+                self._executor.submit(self._refresh, lookup, entry)
+                started += 1
+
+        return started
+
+    def _run(self):
+        """Background thread loop"""
+        while True:
+            self.run_pending()
+            with self._condition:
+                if not self._running:
+                    return
+                timeout = self._queue[0][0] - self._clock() if self._queue else None
+                self._condition.wait(timeout)
+
+    def _refresh(self, lookup: Lookup, entry: _Entry):
+        """Fetch a lookup and store the result"""
+        try:
+            value = fetch(lookup)
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            _LOGGER.warning("Refreshing %s failed: %s", lookup, err)
+            with self._condition:
+                now = self._clock()
+                previous = entry.state
+                entry.store(previous._replace(error=err, changed=False) if previous is not None
+                            else RefreshState(None, None, now, err))
+                if self._entries.get(lookup) is entry:
+                    retry_at = now + _RETRY_DELAY * 2 ** (entry.failures - 1)
+                    self._schedule(lookup, min(retry_at, next_update(now, lookup.request_type)))
+            entry.ready.set()
+            return
+
+        with self._condition:
+            now = self._clock()
+            expires_at = next_update(now, lookup.request_type)
+            previous = entry.state
+            changed = previous is None or previous.fetched_at is None or not _same(value, previous.value)
+            entry.store(RefreshState(value, now, expires_at, None, changed))
+            if self._entries.get(lookup) is entry:
+                self._schedule(lookup, expires_at)
+        entry.ready.set()
+        _LOGGER.debug("Refreshed %s. Next refresh at %d", lookup, expires_at)
+
+    def _schedule(self, lookup: Lookup, due: float):
+        """Queue a refresh, replacing the earlier one. Must be called while holding the lock."""
+        self._entries[lookup].due = due
+        heapq.heappush(self._queue, (due, next(_SEQUENCE), lookup))
+        self._condition.notify_all()
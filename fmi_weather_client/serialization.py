@@ -0,0 +1,213 @@
+import struct
+import sys
+from array import array
+from datetime import datetime, timezone
+from typing import List, Sequence, Union
+
+from fmi_weather_client.columns import FIELDS, ForecastColumns, from_columns, to_columns
+from fmi_weather_client.models import Forecast, Weather
+
+# Layout, little-endian:
+# - header: magic b'FMIB', format version (u8), kind (u8), reserved (u16), number of records (u32)
+# - each record: place name (u16 length + UTF-8), lat and lon (f64), number of rows (u32) and
+#   number of fields (u16), then for each field its index in columns.FIELDS (u8), whether it has
+#   a column (u8) and unit (u8 length + UTF-8). Padding to 8 bytes is followed by the time axis
+#   as epoch seconds (f64 per row) and one f64 column per field that has one. Missing values are NaN.
+# Big-endian hosts swap the bytes of the columns, so they read columns as copies instead of in place.
+MAGIC = b'FMIB'
+VERSION = 1
+
+_FORECAST = 1
+_WEATHER = 2
+_FORECAST_LIST = 3
+_WEATHER_LIST = 4
+
+_HEADER = struct.Struct('<4sBBHI')
+_RECORD = struct.Struct('<ddIH')
+_FIELD_INDEX = {field: idx for idx, field in enumerate(FIELDS)}
+_SWAP = sys.byteorder != 'little'
+
+Serializable = Union[Forecast, Weather, Sequence[Forecast], Sequence[Weather]]
+
+
+def dumps(value: Serializable) -> bytes:
+    """
+    Encode a forecast, weather or a list of either
+    :param value: Forecast, weather or list of forecasts or weathers of many locations
+    :return: Encoded bytes
+    """
+    if isinstance(value, Forecast):
+        return dumps_columns([to_columns(value)], _FORECAST)
+    if isinstance(value, Weather):
+        return dumps_columns([_weather_columns(value)], _WEATHER)
+
+    items = list(value)
+    if all(isinstance(item, Forecast) for item in items):
+        return dumps_columns([to_columns(item) for item in items], _FORECAST_LIST)
+    if all(isinstance(item, Weather) for item in items):
+        return dumps_columns([_weather_columns(item) for item in items], _WEATHER_LIST)
+    raise TypeError("Only forecasts, weathers and lists of either can be encoded")
+
+
+def loads(data: Union[bytes, bytearray, memoryview]) -> Serializable:
+    """
+    Decode a value encoded with dumps
+    :param data: Encoded bytes
+    :return: Forecast, weather or list of either
+    """
+    kind, records = _decode(data)
+    if kind == _FORECAST:
+        return from_columns(records[0])
+    if kind == _WEATHER:
+        return _weather(records[0])
+    if kind == _FORECAST_LIST:
+        return [from_columns(columns) for columns in records]
+    return [_weather(columns) for columns in records]
+
+
+def dumps_columns(records: Sequence[ForecastColumns], kind: int = _FORECAST_LIST) -> bytes:
+    """
+    Encode forecast columns
+    :param records: Columns of each location
+    :param kind: Type of the value the columns represent
+    :return: Encoded bytes
+    """
+    out = bytearray(_HEADER.pack(MAGIC, VERSION, kind, 0, len(records)))
+
+    for columns in records:
+        fields = [field for field in FIELDS if field in columns.values or field in columns.units]
+        out += _string(columns.place, 'H')
+        out += _RECORD.pack(columns.lat, columns.lon, len(columns.times), len(fields))
+        for field in fields:
+            out.append(_FIELD_INDEX[field])
+            out.append(field in columns.values)
+            out += _string(columns.units.get(field, ''), 'B')
+
+        # Align the columns, so that they can be read in place
+        out += bytes(-len(out) % 8)
+        out += _little_endian(array('d', [point_time.timestamp() for point_time in columns.times]))
+        for field in fields:
+            if field in columns.values:
+                out += _little_endian(_column(columns.values[field]))
+
+    return bytes(out)
+
+
+def loads_columns(data: Union[bytes, bytearray, memoryview]) -> List[ForecastColumns]:
+    """
+    Decode columns without copying the values. Values of each field are memoryviews of the data,
+    so the data must be kept unchanged while the columns are used. Big-endian hosts get copies instead.
+    :param data: Encoded bytes
+    :return: Columns of each location
+    """
+    return _decode(data)[1]
+
+
+def _decode(data: Union[bytes, bytearray, memoryview]):
+    """Decode kind and columns of each record"""
+    view = memoryview(data).cast('B')
+    if len(view) < _HEADER.size:
+        raise ValueError("Data is too short")
+
+    magic, version, kind, _, count = _HEADER.unpack_from(view, 0)
+    if magic != MAGIC:
+        raise ValueError("Data is not an encoded forecast")
+    if version != VERSION:
+        raise ValueError(f"Unsupported format version {version}")
+    if kind not in (_FORECAST, _WEATHER, _FORECAST_LIST, _WEATHER_LIST):
+        raise ValueError(f"Unknown kind {kind}")
+
+    offset = _HEADER.size
+    records = []
+    for _ in range(count):
+        columns, offset = _read_record(view, offset)
+        records.append(columns)
+
+    return kind, records
+
+
+def _read_record(view: memoryview, offset: int):
+    """Read columns of a single location. Returns the columns and the offset after them."""
+    place, offset = _read_string(view, offset, 'H')
+    _check_size(view, offset, _RECORD.size)
+    lat, lon, rows, field_count = _RECORD.unpack_from(view, offset)
+    offset += _RECORD.size
+
+    fields = []
+    units = {}
+    for _ in range(field_count):
+        _check_size(view, offset, 2)
+        if view[offset] >= len(FIELDS):
+            raise ValueError(f"Unknown field index {view[offset]}")
+        field = FIELDS[view[offset]]
+        if view[offset + 1]:
+            fields.append(field)
+        units[field], offset = _read_string(view, offset + 2, 'B')
+    offset += -offset % 8
+
+    timestamps, offset = _read_column(view, offset, rows)
+    times = [datetime.fromtimestamp(timestamp, timezone.utc) for timestamp in timestamps]
+
+    values = {}
+    for field in fields:
+        values[field], offset = _read_column(view, offset, rows)
+
+    return ForecastColumns(place, lat, lon, times, units, values), offset
+
+
+def _weather_columns(weather: Weather) -> ForecastColumns:
+    """Weather as columns of a single row"""
+    return to_columns(Forecast(weather.place, weather.lat, weather.lon, [weather.data]))
+
+
+def _weather(columns: ForecastColumns) -> Weather:
+    """Weather from columns of a single row"""
+    forecast = from_columns(columns)
+    return Weather(forecast.place, forecast.lat, forecast.lon, forecast.forecasts[0])
+
+
+def _column(values) -> array:
+    """Column as a float64 array"""
+    return values if isinstance(values, array) and values.typecode == 'd' else array('d', values)
+
+
+def _little_endian(column: array) -> bytes:
+    """Bytes of a float64 column in little-endian order"""
+    if _SWAP:
+        column = array('d', column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _read_column(view: memoryview, offset: int, rows: int):
+    """Read a float64 column. Returns the column and the offset after it."""
+    size = rows * 8
+    _check_size(view, offset, size)
+    if not _SWAP:
+        return view[offset:offset + size].cast('d'), offset + size
+
+    column = array('d', view[offset:offset + size].tobytes())
+    column.byteswap()
+    return column, offset + size
+
+
+def _check_size(view: memoryview, offset: int, size: int):
+    """Check that the data has size bytes left at offset"""
+    if offset + size > len(view):
+        raise ValueError("Data is truncated")
+
+
+def _string(text: str, length_format: str) -> bytes:
+    """Length-prefixed UTF-8 string"""
+    encoded = text.encode()
+    return struct.pack('<' + length_format, len(encoded)) + encoded
+
+
+def _read_string(view: memoryview, offset: int, length_format: str):
+    """Read a length-prefixed UTF-8 string. Returns the string and the offset after it."""
+    length_size = struct.calcsize('<' + length_format)
+    _check_size(view, offset, length_size)
+    (length,) = struct.unpack_from('<' + length_format, view, offset)
+    offset += length_size
+    _check_size(view, offset, length)
+    return bytes(view[offset:offset + length]).decode(), offset + length
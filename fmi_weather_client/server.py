@@ -0,0 +1,41 @@
+import threading
+from http.server import ThreadingHTTPServer
+from typing import Optional
+
+
+class BackgroundServer(ThreadingHTTPServer):
+    """HTTP server that can serve in a background thread"""
+
+    daemon_threads = True
+    thread_name = 'fmi-server'
+
+    _thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, name=self.thread_name, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and close the socket"""
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def run(self):
+        """Serve in the current thread until interrupted"""
+        try:
+            self.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
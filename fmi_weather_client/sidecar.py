@@ -0,0 +1,335 @@
+import argparse
+import json
+import logging
+import math
+import os
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, quote, urlparse
+from xml.etree import ElementTree
+from xml.parsers.expat import ExpatError
+
+import requests
+
+from fmi_weather_client import http
+from fmi_weather_client.errors import ClientError, ServerError
+from fmi_weather_client.lookups import fetch
+from fmi_weather_client.models import Forecast, Lookup, RequestType, Weather, WeatherData
+from fmi_weather_client.ratelimit import TokenBucket
+from fmi_weather_client.refresh import next_update
+from fmi_weather_client.server import BackgroundServer
+
+_LOGGER = logging.getLogger(__name__)
+
+# Errors of bodies that FMI sent but that could not be parsed
+_PARSE_ERRORS = (ElementTree.ParseError, ExpatError, KeyError, IndexError, ValueError)
+
+_PATHS = {
+    '/weather': RequestType.WEATHER,
+    '/forecast': RequestType.FORECAST,
+    '/observation': RequestType.OBSERVATION,
+}
+
+
+class SidecarStats(NamedTuple):
+    """Counters of the sidecar"""
+
+    # Lookups asked from the cache
+    requests: int
+    hits: int
+
+    # Lookups that waited for the same lookup in flight
+    coalesced: int
+
+    # Lookups fetched from FMI
+    upstream: int
+    errors: int
+
+    # Lookups refused by the rate limit. Stale values are returned when available.
+    throttled: int
+    entries: int
+
+
+class _CacheEntry(NamedTuple):
+    value: Any
+    expires_at: float
+
+
+class SidecarCache:
+    """
+    Cache of lookups shared by all clients of the sidecar.
+
+    Values are kept until FMI is expected to publish new data. Concurrent lookups of the same
+    location wait for a single fetch, and fetches from FMI are rate limited.
+    """
+
+    def __init__(self, rate_limit: Optional[float] = None, max_entries: int = 10000,
+                 clock: Callable[[], float] = time.time):
+        """
+        :param rate_limit: Maximum number of fetches from FMI per second. None disables the limit.
+        :param max_entries: Maximum number of cached lookups
+        :param clock: Function that returns the current time as epoch seconds
+        """
+        self._bucket = TokenBucket(rate_limit) if rate_limit else None
+        self._max_entries = max_entries
+        self._clock = clock
+        self._entries: Dict[Lookup, _CacheEntry] = {}
+        self._in_flight: Dict[Lookup, Future] = {}
+        self._counters = dict.fromkeys(('requests', 'hits', 'coalesced', 'upstream', 'errors', 'throttled'), 0)
+        self._lock = threading.Lock()
+
+    def get(self, lookup: Lookup) -> Any:
+        """
+        Get the value of a lookup from the cache or from FMI
+        :param lookup: Lookup
+        :return: Value of the lookup
+        """
+        with self._lock:
+            self._counters['requests'] += 1
+            entry = self._entries.get(lookup)
+            if entry is not None and self._clock() < entry.expires_at:
+                self._counters['hits'] += 1
+                return entry.value
+
+            in_flight = self._in_flight.get(lookup)
+            if in_flight is None:
+                future: Future = Future()
+                self._in_flight[lookup] = future
+            else:
+                self._counters['coalesced'] += 1
+
+        if in_flight is not None:
+            return in_flight.result()
+
+        try:
+            value = self._fetch(lookup, entry)
+        except BaseException as err:
+            # Waiters get any error, even an interrupt, instead of waiting forever
+            future.set_exception(err)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[lookup]
+
+        future.set_result(value)
+        return value
+
+    def stats(self) -> SidecarStats:
+        """Get counters"""
+        with self._lock:
+            return SidecarStats(entries=len(self._entries), **self._counters)
+
+    def clear(self):
+        """Forget all cached values"""
+        with self._lock:
+            self._entries.clear()
+
+    def _fetch(self, lookup: Lookup, stale: Optional[_CacheEntry]) -> Any:
+        """Fetch a lookup from FMI and cache it"""
+        if self._bucket is not None and not self._bucket.take():
+            with self._lock:
+                self._counters['throttled'] += 1
+            if stale is not None:
+                return stale.value
+            raise ClientError(429, "Request limit of the sidecar exceeded")
+
+        with self._lock:
+            self._counters['upstream'] += 1
+
+        try:
+            value = fetch(lookup)
+        except Exception:
+            with self._lock:
+                self._counters['errors'] += 1
+            raise
+
+        now = self._clock()
+        with self._lock:
+            self._entries.pop(lookup, None)
+            self._entries[lookup] = _CacheEntry(value, next_update(now, lookup.request_type))
+            if len(self._entries) > self._max_entries:
+                self._evict(now)
+        return value
+
+    def _evict(self, now: float):
+        """Drop expired entries, then the oldest ones. Must be called while holding the lock."""
+        for lookup in [lookup for lookup, entry in self._entries.items() if entry.expires_at <= now]:
+            del self._entries[lookup]
+        while len(self._entries) > self._max_entries:
+            del self._entries[next(iter(self._entries))]
+
+
+class SidecarServer(BackgroundServer):
+    """
+    Local HTTP API of the library lookups, shared by many application processes.
+
+    Endpoints:
+    - /weather?lat=60.17&lon=24.94 or /weather?place=Helsinki
+    - /forecast?lat=60.17&lon=24.94&timestep_hours=24&forecast_points=4 or /forecast?place=Helsinki
+    - /observation?fmisid=101004 or /observation?place=Helsinki
+    - /stats
+
+    Results are JSON. Run it from the command line with `python -m fmi_weather_client.sidecar`.
+    """
+
+    thread_name = 'fmi-sidecar'
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, cache: Optional[SidecarCache] = None,
+                 unix_socket: Optional[str] = None):
+        """
+        :param host: Host to bind to
+        :param port: Port to bind to. Zero picks a free port.
+        :param cache: Shared cache
+        :param unix_socket: Path of a Unix socket to listen to instead of TCP
+        """
+        self.unix_socket = unix_socket
+        if unix_socket is not None:
+            self.address_family = socket.AF_UNIX
+        super().__init__(unix_socket if unix_socket is not None else (host, port), _Handler)
+        self.cache = cache if cache is not None else SidecarCache()
+
+    def server_bind(self):
+        if self.unix_socket is None:
+            super().server_bind()
+            return
+
+        if os.path.exists(self.unix_socket):
+            os.unlink(self.unix_socket)
+        socketserver.TCPServer.server_bind(self)
+        self.server_name = 'localhost'
+        self.server_port = 0
+
+    @property
+    def url(self) -> str:
+        """Base URL of the server. Unix sockets have a http+unix URL with the quoted path of the socket."""
+        if self.unix_socket is not None:
+            return f'http+unix://{quote(self.unix_socket, safe="")}'
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def server_close(self):
+        super().server_close()
+        if self.unix_socket is not None and os.path.exists(self.unix_socket):
+            os.unlink(self.unix_socket)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Request handler of the sidecar"""
+
+    server: SidecarServer
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Answer an API request"""
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self._send(*self._response(url.path, params))
+
+    def _response(self, path: str, params: Dict[str, str]) -> Tuple[int, Any]:
+        """Status and body of an API request"""
+        if path == '/stats':
+            return 200, self.server.cache.stats()._asdict()
+
+        request_type = _PATHS.get(path)
+        if request_type is None:
+            return 404, {'error': f'Unknown path {path}'}
+
+        try:
+            lookup = _lookup(request_type, params)
+        except (KeyError, ValueError) as err:
+            return 400, {'error': f'Invalid parameters: {err}'}
+
+        try:
+            return 200, to_json(self.server.cache.get(lookup))
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            return _error_response(lookup, err)
+
+    def _send(self, status: int, body: Any):
+        data = json.dumps(body, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Do not log every request"""
+
+
+def _error_response(lookup: Lookup, err: Exception) -> Tuple[int, Any]:
+    """Status and body of a failed lookup"""
+    if isinstance(err, ClientError):
+        return err.status_code, {'error': err.message}
+    if isinstance(err, ServerError):
+        return 502, {'error': f'FMI service failed with status {err.status_code}'}
+    if isinstance(err, (requests.ConnectionError, requests.Timeout)):
+        return 502, {'error': f'FMI service could not be reached: {err}'}
+    if isinstance(err, _PARSE_ERRORS):
+        return 502, {'error': f'Invalid response from FMI service: {err}'}
+
+    _LOGGER.error("Lookup %s failed", lookup, exc_info=err)
+    return 500, {'error': 'Internal error of the sidecar'}
+
+
+def _lookup(request_type: RequestType, params: Dict[str, str]) -> Lookup:
+    """Create lookup from query parameters"""
+    if request_type is RequestType.OBSERVATION and 'fmisid' in params:
+        location: Any = int(params['fmisid'])
+    elif 'place' in params:
+        location = params['place']
+    else:
+        location = (float(params['lat']), float(params['lon']))
+
+    if request_type is RequestType.FORECAST:
+        return Lookup(request_type, location, int(params.get('timestep_hours', 24)),
+                      int(params.get('forecast_points', 4)))
+    return Lookup(request_type, location)
+
+
+def to_json(value: Any) -> Any:
+    """
+    Convert a weather or forecast to JSON compatible values. Missing values are null.
+    :param value: Weather, forecast or None
+    :return: Dictionary
+    """
+    if isinstance(value, Weather):
+        return {'place': value.place, 'lat': value.lat, 'lon': value.lon, 'data': _weather_data_json(value.data)}
+    if isinstance(value, Forecast):
+        return {'place': value.place, 'lat': value.lat, 'lon': value.lon,
+                'forecasts': [_weather_data_json(weather_data) for weather_data in value.forecasts]}
+    return value
+
+
+def _weather_data_json(weather_data: WeatherData) -> Dict[str, Any]:
+    """Convert weather data to JSON compatible values"""
+    data: Dict[str, Any] = {'time': weather_data.time.isoformat()}
+    for field, value in zip(WeatherData._fields[1:], weather_data[1:]):
+        missing = value.value is None or math.isnan(value.value)
+        data[field] = {'value': None if missing else value.value, 'unit': value.unit}
+    return data
+
+
+def main():
+    """Run the sidecar from the command line"""
+    parser = argparse.ArgumentParser(description='Local caching API of FMI weather lookups')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--socket', default=None, help='Listen to a Unix socket instead of TCP')
+    parser.add_argument('--rate-limit', type=float, default=None, help='Requests per second to FMI')
+    parser.add_argument('--max-entries', type=int, default=10000, help='Maximum number of cached lookups')
+    args = parser.parse_args()
+
+    # Connections to FMI are kept open between the fetches of all clients
+    http.set_session(requests.Session())
+    cache = SidecarCache(rate_limit=args.rate_limit, max_entries=args.max_entries)
+    server = SidecarServer(args.host, args.port, cache, unix_socket=args.socket)
+    print(f'Serving FMI sidecar at {server.url}')
+    server.run()
+
+
+if __name__ == '__main__':
+    main()
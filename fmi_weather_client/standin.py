@@ -0,0 +1,382 @@
+import argparse
+import math
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+from fmi_weather_client.models import FMIPlace
+from fmi_weather_client.ratelimit import TokenBucket
+from fmi_weather_client.server import BackgroundServer
+
+FORECAST_QUERY = 'fmi::forecast::edited::weather::scandinavia::point::multipointcoverage'
+OBSERVATION_QUERY = 'fmi::observations::weather::multipointcoverage'
+
+# Typical level and variation of each parameter. Unknown parameters get values between 0 and 100.
+_PARAMETER_RANGES: Dict[str, Tuple[float, float]] = {
+    'Temperature': (5.0, 10.0),
+    'DewPoint': (2.0, 8.0),
+    'Pressure': (1010.0, 15.0),
+    'Humidity': (75.0, 20.0),
+    'WindDirection': (180.0, 180.0),
+    'WindSpeedMS': (5.0, 4.0),
+    'WindUMS': (0.0, 5.0),
+    'WindVMS': (0.0, 5.0),
+    'WindGust': (8.0, 5.0),
+    'WeatherSymbol3': (2.0, 1.0),
+    'TotalCloudCover': (50.0, 50.0),
+    'LowCloudCover': (50.0, 50.0),
+    'MediumCloudCover': (50.0, 50.0),
+    'HighCloudCover': (50.0, 50.0),
+    'Precipitation1h': (0.5, 0.5),
+    'RadiationGlobalAccumulation': (500000.0, 500000.0),
+    'RadiationNetSurfaceSWAccumulation': (400000.0, 400000.0),
+    'RadiationNetSurfaceLWAccumulation': (-200000.0, 100000.0),
+    'GeopHeight': (100.0, 0.0),
+    'LandSeaMask': (0.5, 0.0),
+}
+
+_HEADER = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+           '<wfs:FeatureCollection timeStamp="{timestamp}" numberMatched="{matched}" numberReturned="{matched}" '
+           'xmlns:wfs="http://www.opengis.net/wfs/2.0" xmlns:xlink="http://www.w3.org/1999/xlink" '
+           'xmlns:om="http://www.opengis.net/om/2.0" xmlns:omso="http://inspire.ec.europa.eu/schemas/omso/3.0" '
+           'xmlns:gml="http://www.opengis.net/gml/3.2" xmlns:swe="http://www.opengis.net/swe/2.0" '
+           'xmlns:gmlcov="http://www.opengis.net/gmlcov/1.0" xmlns:sam="http://www.opengis.net/sampling/2.0" '
+           'xmlns:sams="http://www.opengis.net/samplingSpatial/2.0">\n')
+
+_EXCEPTION = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+              '<ExceptionReport xmlns="http://www.opengis.net/ows/1.1" version="2.0.0" xml:lang="eng">\n'
+              '  <Exception exceptionCode="{code}">\n'
+              '    <ExceptionText>{message}</ExceptionText>\n'
+              '    <ExceptionText>URI: {uri}</ExceptionText>\n'
+              '  </Exception>\n'
+              '</ExceptionReport>\n')
+
+
+class StandInConfig(NamedTuple):
+    """Behaviour of the stand-in server"""
+
+    # Response latency in seconds and maximum random addition to it
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+
+    # Fraction of requests that take slow latency seconds longer, i.e. the latency tail
+    slow_rate: float = 0.0
+    slow_latency: float = 0.0
+
+    # Fraction of requests answered with 500 Internal Server Error
+    error_rate: float = 0.0
+
+    # Requests per second before answering 429 Too Many Requests. None disables throttling.
+    rate_limit: Optional[float] = None
+
+    # Number of time steps in each response. None derives it from the requested time window.
+    points: Optional[int] = None
+
+    # Number of stations in each response
+    stations: int = 1
+
+    # Fraction of values reported as missing
+    nan_rate: float = 0.0
+
+    # Place names that are answered with a "no locations found" error
+    unknown_places: FrozenSet[str] = frozenset({'unknown'})
+
+    # Station ids that are answered with an empty result
+    invalid_station_ids: FrozenSet[int] = frozenset({0})
+
+    seed: Optional[int] = None
+
+
+class StandInStats(NamedTuple):
+    """Request counters of the stand-in server"""
+    requests: int
+    responses: int
+    errors: int
+    throttled: int
+
+
+class StandInServer(BackgroundServer):
+    """
+    Local stand-in for the FMI WFS service.
+
+    Answers the stored queries used by this library with synthetic multipointcoverage responses of
+    configurable size, latency, error rate and throttling, so that the client can be load tested
+    without touching FMI. Run it from the command line with `python -m fmi_weather_client.standin`.
+    """
+
+    thread_name = 'fmi-standin'
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, config: StandInConfig = StandInConfig()):
+        """
+        :param host: Host to bind to
+        :param port: Port to bind to. Zero picks a free port.
+        :param config: Server behaviour
+        """
+        super().__init__((host, port), _Handler)
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.bucket = TokenBucket(config.rate_limit) if config.rate_limit else None
+        self._counters = {'requests': 0, 'responses': 0, 'errors': 0, 'throttled': 0}
+        self._counter_lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        """WFS endpoint URL of the server"""
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/wfs'
+
+    def stats(self) -> StandInStats:
+        """Get request counters"""
+        with self._counter_lock:
+            return StandInStats(**self._counters)
+
+    def count(self, counter: str):
+        """Increment a request counter"""
+        with self._counter_lock:
+            self._counters[counter] += 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Request handler of the stand-in server"""
+
+    server: StandInServer
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Answer a WFS request"""
+        server = self.server
+        config = server.config
+        server.count('requests')
+
+        delay = config.latency + server.random.uniform(0, config.latency_jitter)
+        if server.random.random() < config.slow_rate:
+            delay += config.slow_latency
+        if delay > 0:
+            time.sleep(delay)
+
+        if server.bucket is not None and not server.bucket.take():
+            server.count('throttled')
+            self._exception(429, 'TooManyRequests', f'Request limit of {server.bucket.rate()} requests '
+                                                    f'per second exceeded')
+            return
+
+        if server.random.random() < config.error_rate:
+            server.count('errors')
+            self._send(500, 'text/plain', 'Internal Server Error')
+            return
+
+        params = {key: values[0] for key, values in parse_qs(urlparse(self.path).query).items()}
+        status, body = _respond(params, config, server.random)
+        if status != 200:
+            self._exception(status, 'OperationParsingFailed', body)
+            return
+
+        server.count('responses')
+        self._send(200, 'text/xml; charset=UTF-8', body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Keep quiet. Load tests send a lot of requests."""
+
+    def _exception(self, status: int, code: str, message: str):
+        """Send an exception report"""
+        self._send(status, 'text/xml; charset=UTF-8',
+                   _EXCEPTION.format(code=code, message=escape(message), uri=escape(self.path)))
+
+    def _send(self, status: int, content_type: str, body: str):
+        """Send a response"""
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _respond(params: Dict[str, str], config: StandInConfig, rng: random.Random) -> Tuple[int, str]:
+    """
+    Build the response of a stored query
+    :param params: Query parameters
+    :param config: Server behaviour
+    :param rng: Random number generator
+    :return: Status code and response body, or error message when status code is not 200
+    """
+    query_id = params.get('storedquery_id')
+    if query_id not in (FORECAST_QUERY, OBSERVATION_QUERY):
+        return 400, f'Unknown stored query: {query_id}'
+
+    try:
+        stations = _stations(params, config)
+        times = _times(params, config)
+    except ValueError as err:
+        return 400, str(err)
+
+    fields = params.get('parameters', 'Temperature').split(',')
+    if not stations:
+        return 200, _HEADER.format(timestamp=_timestamp(), matched=0) + '</wfs:FeatureCollection>\n'
+
+    return 200, multipointcoverage(stations, times, fields, query_id == OBSERVATION_QUERY, config.nan_rate, rng)
+
+
+def _stations(params: Dict[str, str], config: StandInConfig) -> List[FMIPlace]:
+    """Get the stations that answer the query"""
+    if 'latlon' in params:
+        try:
+            lat, lon = (float(part) for part in params['latlon'].split(','))
+        except ValueError as err:
+            raise ValueError(f"Invalid latlon: {params['latlon']}") from err
+        if not -90 <= lat <= 90 or not -180 <= lon <= 180:
+            raise ValueError(f'Invalid lon-lat given to WorldTimeZones::zone_name: {lon},{lat}')
+        name = 'Stand-in'
+    elif 'place' in params:
+        if params['place'].lower() in config.unknown_places:
+            raise ValueError('No locations found for the place with the requested language!')
+        lat, lon, name = 60.17, 24.94, params['place']
+    elif 'bbox' in params:
+        try:
+            min_lon, min_lat, max_lon, max_lat = (float(part) for part in params['bbox'].split(','))
+        except ValueError as err:
+            raise ValueError(f"Invalid bbox: {params['bbox']}") from err
+        lat, lon, name = round((min_lat + max_lat) / 2, 5), round((min_lon + max_lon) / 2, 5), 'Stand-in'
+    elif 'fmisid' in params:
+        if int(params['fmisid']) in config.invalid_station_ids:
+            return []
+        lat, lon, name = 60.17, 24.94, f"Station {params['fmisid']}"
+    else:
+        raise ValueError('No location given')
+
+    return [FMIPlace(name if idx == 0 else f'{name} {idx + 1}', round(lat + idx * 0.01, 5), round(lon + idx * 0.01, 5))
+            for idx in range(config.stations)]
+
+
+def _times(params: Dict[str, str], config: StandInConfig) -> List[int]:
+    """Get the time steps of the query as epoch seconds"""
+    try:
+        timestep = int(params.get('timestep', 60)) * 60
+        start = datetime.fromisoformat(params['starttime'].replace('Z', '+00:00')).timestamp()
+        end = datetime.fromisoformat(params['endtime'].replace('Z', '+00:00')).timestamp()
+    except (KeyError, ValueError) as err:
+        raise ValueError('Invalid time parameters') from err
+
+    if timestep <= 0:
+        raise ValueError('Invalid timestep')
+
+    first = int(math.ceil(start / timestep) * timestep)
+    count = config.points if config.points is not None else max(int((end - first) // timestep) + 1, 1)
+    return [first + idx * timestep for idx in range(count)]
+
+
+# pylint: disable=too-many-arguments,too-many-positional-arguments
+def multipointcoverage(stations: List[FMIPlace], times: List[int], fields: List[str],
+                       observation: bool = False, nan_rate: float = 0.0,
+                       rng: Optional[random.Random] = None) -> str:
+    """
+    Build a synthetic multipointcoverage response
+    :param stations: Stations of the response
+    :param times: Time steps as epoch seconds
+    :param fields: Parameter names
+    :param observation: True for an observation response; False for a forecast response
+    :param nan_rate: Fraction of values reported as missing
+    :param rng: Random number generator
+    :return: Response body
+    """
+    rng = rng or random.Random()
+    members_tag = 'gml:pointMember' if observation else 'gml:pointMembers'
+    points = ''.join(f'<gml:Point gml:id="point-{idx}"><gml:name>{escape(station.name)}</gml:name>'
+                     f'<gml:pos>{station.lat} {station.lon} </gml:pos></gml:Point>'
+                     for idx, station in enumerate(stations))
+
+    positions = []
+    rows = []
+    for station in stations:
+        for timestamp in times:
+            positions.append(f'{station.lat} {station.lon}  {timestamp}')
+            rows.append(' '.join(_value(field, timestamp, nan_rate, rng) for field in fields))
+
+    field_elements = ''.join(f'<swe:field name="{escape(field)}"/>' for field in fields)
+    period_start = _timestamp(times[0] if times else time.time())
+    period_end = _timestamp(times[-1] if times else time.time())
+
+    return (_HEADER.format(timestamp=_timestamp(), matched=1) +
+            '<wfs:member><omso:GridSeriesObservation gml:id="standin-1">'
+            f'<om:phenomenonTime><gml:TimePeriod gml:id="time-1"><gml:beginPosition>{period_start}</gml:beginPosition>'
+            f'<gml:endPosition>{period_end}</gml:endPosition></gml:TimePeriod></om:phenomenonTime>'
+            f'<om:resultTime><gml:TimeInstant gml:id="time-2"><gml:timePosition>{period_start}</gml:timePosition>'
+            '</gml:TimeInstant></om:resultTime>'
+            f'<om:observedProperty xlink:href="https://opendata.fmi.fi/meta?observableProperty='
+            f'{"observation" if observation else "forecast"}&amp;param={escape(",".join(fields))}&amp;language=eng"/>'
+            '<om:featureOfInterest><sams:SF_SpatialSamplingFeature gml:id="sf-1"><sams:shape>'
+            f'<gml:MultiPoint gml:id="mp-1"><{members_tag}>{points}</{members_tag}></gml:MultiPoint>'
+            '</sams:shape></sams:SF_SpatialSamplingFeature></om:featureOfInterest>'
+            '<om:result><gmlcov:MultiPointCoverage gml:id="mpcv-1"><gml:domainSet>'
+            '<gmlcov:SimpleMultiPoint gml:id="smp-1" srsDimension="3"><gmlcov:positions>\n' +
+            '\n'.join(positions) +
+            '\n</gmlcov:positions></gmlcov:SimpleMultiPoint></gml:domainSet>'
+            '<gml:rangeSet><gml:DataBlock><gml:rangeParameters/><gml:doubleOrNilReasonTupleList>\n' +
+            '\n'.join(rows) +
+            '\n</gml:doubleOrNilReasonTupleList></gml:DataBlock></gml:rangeSet>'
+            f'<gmlcov:rangeType><swe:DataRecord>{field_elements}</swe:DataRecord></gmlcov:rangeType>'
+            '</gmlcov:MultiPointCoverage></om:result></omso:GridSeriesObservation></wfs:member>'
+            '</wfs:FeatureCollection>\n')
+
+
+def _value(field: str, timestamp: int, nan_rate: float, rng: random.Random) -> str:
+    """Get a synthetic value that follows a daily cycle"""
+    if nan_rate and rng.random() < nan_rate:
+        return 'NaN'
+    level, variation = _PARAMETER_RANGES.get(field, (50.0, 50.0))
+    return str(round(level + variation * math.sin(2 * math.pi * (timestamp % 86400) / 86400), 1))
+
+
+def _timestamp(epoch: Optional[float] = None) -> str:
+    """Format epoch seconds the way FMI does"""
+    moment = datetime.fromtimestamp(time.time() if epoch is None else epoch, timezone.utc)
+    return moment.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def add_config_arguments(parser: argparse.ArgumentParser):
+    """
+    Add command line arguments of the stand-in behaviour
+    :param parser: Argument parser
+    """
+    parser.add_argument('--latency', type=float, default=0.0, help='Response latency in seconds')
+    parser.add_argument('--latency-jitter', type=float, default=0.0, help='Maximum random addition to latency')
+    parser.add_argument('--slow-rate', type=float, default=0.0, help='Fraction of slow responses')
+    parser.add_argument('--slow-latency', type=float, default=0.0, help='Additional latency of slow responses')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of 500 responses')
+    parser.add_argument('--rate-limit', type=float, default=None, help='Requests per second before 429 responses')
+    parser.add_argument('--points', type=int, default=None, help='Time steps in each response')
+    parser.add_argument('--stations', type=int, default=1, help='Stations in each response')
+    parser.add_argument('--nan-rate', type=float, default=0.0, help='Fraction of missing values')
+    parser.add_argument('--seed', type=int, default=None)
+
+
+def config_from_arguments(args: argparse.Namespace) -> StandInConfig:
+    """
+    Create stand-in configuration from parsed command line arguments
+    :param args: Arguments added with add_config_arguments
+    :return: Configuration
+    """
+    return StandInConfig(latency=args.latency, latency_jitter=args.latency_jitter, slow_rate=args.slow_rate,
+                         slow_latency=args.slow_latency, error_rate=args.error_rate, rate_limit=args.rate_limit,
+                         points=args.points, stations=args.stations, nan_rate=args.nan_rate, seed=args.seed)
+
+
+def main():
+    """Run the stand-in server from the command line"""
+    parser = argparse.ArgumentParser(description='Local stand-in for the FMI WFS service')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = StandInServer(args.host, args.port, config_from_arguments(args))
+    print(f'Serving FMI stand-in at {server.url}')
+    server.run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Iterable, Iterator, Tuple, Union
+
+from fmi_weather_client.lookups import fetch
+from fmi_weather_client.models import Lookup, RequestType
+
+Location = Union[Tuple[float, float], str, int]
+
+# Marks a finished worker in the result queue
+_DONE = object()
+
+
+async def stream_weather(locations: Iterable[Location],
+                         concurrency: int = 10) -> AsyncIterator[Tuple[Location, Any]]:
+    """
+    Get the latest weather information of many locations as each one completes.
+
+    :param locations: (lat, lon) tuples or place names
+    :param concurrency: Maximum number of concurrent requests
+    :return: Async iterator of (location, weather or error) pairs
+    """
+    lookups = (Lookup(RequestType.WEATHER, location) for location in locations)
+    async for result in _stream(lookups, concurrency):
+        yield result
+
+
+async def stream_forecasts(locations: Iterable[Location], timestep_hours: int = 24, forecast_points: int = 4,
+                           concurrency: int = 10) -> AsyncIterator[Tuple[Location, Any]]:
+    """
+    Get the latest forecasts of many locations as each one completes.
+
+    :param locations: (lat, lon) tuples or place names
+    :param timestep_hours: Hours between forecasts
+    :param forecast_points: number of forcast points
+    :param concurrency: Maximum number of concurrent requests
+    :return: Async iterator of (location, forecast or error) pairs
+    """
+    lookups = (Lookup(RequestType.FORECAST, location, timestep_hours, forecast_points) for location in locations)
+    async for result in _stream(lookups, concurrency):
+        yield result
+
+
+async def stream_observations(locations: Iterable[Location],
+                              concurrency: int = 10) -> AsyncIterator[Tuple[Location, Any]]:
+    """
+    Get the latest observations of many stations as each one completes.
+
+    :param locations: Station ids or place names
+    :param concurrency: Maximum number of concurrent requests
+    :return: Async iterator of (location, weather or error) pairs
+    """
+    lookups = (Lookup(RequestType.OBSERVATION, location) for location in locations)
+    async for result in _stream(lookups, concurrency):
+        yield result
+
+
+async def _stream(lookups: Iterator[Lookup], concurrency: int) -> AsyncIterator[Tuple[Location, Any]]:
+    """
+    Run lookups concurrently and yield results in completion order.
+
+    Results are passed through a queue of the same size as concurrency. When the consumer is
+    slower than the requests, workers wait for room in the queue instead of starting new
+    requests. Closing or cancelling the iterator cancels the workers.
+    """
+    if concurrency < 1:
+        raise ValueError("Concurrency must be at least 1")
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='fmi-stream')
+
+    async def worker():
+        error = None
+        try:
+            for lookup in lookups:
+                try:
+                    result = await loop.run_in_executor(executor, fetch, lookup)
+                except Exception as err:  # pylint: disable=broad-exception-caught
+                    result = err
+                await queue.put((lookup.location, result))
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            # Iterating the locations failed
+            error = err
+        await queue.put((_DONE, error))
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+    try:
+        running = len(workers)
+        while running:
+            location, result = await queue.get()
+            if location is _DONE:
+                running -= 1
+                if result is not None:
+                    raise result
+                continue
+            yield location, result
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        executor.shutdown(wait=False)
@@ -0,0 +1,250 @@
+import asyncio
+import heapq
+import inspect
+import itertools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+
+from fmi_weather_client.lookups import fetch
+from fmi_weather_client.models import Lookup
+
+_LOGGER = logging.getLogger(__name__)
+
+# Called with the lookup and the fetched value, or the error if fetching failed.
+# Coroutine functions are run as tasks.
+Callback = Callable[[Lookup, Any], Any]
+
+# Tie breaker for polls that are due at the same time
+_SEQUENCE = itertools.count()
+
+
+class Subscription:
+    """Handle of a registered consumer"""
+
+    def __init__(self, hub: 'SubscriptionHub', lookup: Lookup, max_staleness: float, callback: Callback):
+        self.lookup = lookup
+        self.max_staleness = max_staleness
+        self.callback = callback
+        self._hub = hub
+
+    def cancel(self):
+        """Stop receiving results"""
+        self._hub.unsubscribe(self)
+
+    def __repr__(self):
+        return f"Subscription({self.lookup}, max_staleness={self.max_staleness})"
+
+
+class _Plan:
+    """Polling plan of a single lookup shared by its subscribers"""
+
+    def __init__(self):
+        self.subscribers: Set[Subscription] = set()
+        self.interval: float = 0.0
+        self.due: Optional[float] = None
+        self.fetching: bool = False
+        self.polled_at: Optional[float] = None
+
+        # Latest successfully fetched value
+        self.received: bool = False
+        self.value: Any = None
+
+    def update_interval(self):
+        """Poll at the interval of the subscriber that allows the least staleness"""
+        self.interval = min(subscription.max_staleness for subscription in self.subscribers)
+
+    def next_due(self, now: float) -> float:
+        """Time of the next poll"""
+        return now if self.polled_at is None else max(self.polled_at + self.interval, now)
+
+
+class SubscriptionHub:  # pylint: disable=too-many-instance-attributes
+    """
+    Poll each subscribed lookup once for all of its subscribers.
+
+    Subscriptions of the same lookup are merged into one polling plan that runs at the shortest
+    interval any of them needs. Results are fanned out to all subscribers of the lookup. Polling
+    stops when the last subscriber leaves. All plans are driven by a single task, so the hub scales
+    to tens of thousands of subscriptions on one event loop.
+    """
+
+    def __init__(self, concurrency: int = 10):
+        """
+        :param concurrency: Maximum number of concurrent requests
+        """
+        if concurrency < 1:
+            raise ValueError("Concurrency must be at least 1")
+
+        # Created on start, so that the hub can be started again after close
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._concurrency = concurrency
+        self._plans: Dict[Lookup, _Plan] = {}
+        self._queue: List[Tuple[float, int, Lookup]] = []
+        self._tasks: Set[asyncio.Future] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._runner: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start polling on the running event loop"""
+        if self._runner is not None:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._executor = ThreadPoolExecutor(max_workers=self._concurrency, thread_name_prefix='fmi-hub')
+        self._semaphore = asyncio.Semaphore(self._concurrency)
+        self._wakeup = asyncio.Event()
+        for lookup, plan in self._plans.items():
+            self._schedule(lookup, plan.next_due(self._loop.time()))
+        self._runner = asyncio.ensure_future(self._run())
+
+    async def close(self):
+        """Stop polling and wait for running callbacks"""
+        if self._runner is not None:
+            self._runner.cancel()
+            await asyncio.gather(self._runner, return_exceptions=True)
+            self._runner = None
+
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+        # Polls cancelled by closing are started again on the next start
+        self._loop = None
+        for plan in self._plans.values():
+            plan.fetching = False
+
+    async def __aenter__(self) -> 'SubscriptionHub':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    def subscribe(self, lookup: Lookup, max_staleness: Union[timedelta, float], callback: Callback) -> Subscription:
+        """
+        Register a consumer. If the lookup already has a value, it is delivered to the new consumer right away.
+        :param lookup: Lookup to poll
+        :param max_staleness: Maximum age of the delivered data as timedelta or seconds
+        :param callback: Function that is called with the lookup and each new value or error
+        :return: Subscription handle
+        """
+        if isinstance(max_staleness, timedelta):
+            max_staleness = max_staleness.total_seconds()
+        if max_staleness <= 0:
+            raise ValueError("Maximum staleness must be positive")
+
+        subscription = Subscription(self, lookup, max_staleness, callback)
+        plan = self._plans.setdefault(lookup, _Plan())
+        plan.subscribers.add(subscription)
+        previous_interval = plan.interval
+        plan.update_interval()
+
+        if self._loop is not None:
+            if plan.received:
+                self._loop.call_soon(self._deliver, subscription, plan.value)
+            if not plan.fetching and (plan.due is None or plan.interval < previous_interval):
+                self._schedule(lookup, plan.next_due(self._loop.time()))
+
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """
+        Remove a consumer. Polling of the lookup stops when its last consumer is removed.
+        :param subscription: Subscription handle
+        """
+        plan = self._plans.get(subscription.lookup)
+        if plan is None or subscription not in plan.subscribers:
+            return
+
+        plan.subscribers.discard(subscription)
+        if not plan.subscribers:
+            # Queued polls of a removed plan are skipped
+            del self._plans[subscription.lookup]
+        elif subscription.max_staleness <= plan.interval:
+            plan.update_interval()
+
+    def subscriptions(self) -> int:
+        """Get the number of subscriptions"""
+        return sum(len(plan.subscribers) for plan in self._plans.values())
+
+    def polled(self) -> Set[Lookup]:
+        """Get the lookups that are currently polled"""
+        return set(self._plans)
+
+    async def _run(self):
+        """Start polls that are due"""
+        while True:
+            now = self._loop.time()
+            while self._queue and self._queue[0][0] <= now:
+                due, _, lookup = heapq.heappop(self._queue)
+                plan = self._plans.get(lookup)
+                if plan is None or plan.fetching or plan.due != due:
+                    continue
+                plan.fetching = True
+                plan.due = None
+                self._track(self._poll(lookup, plan))
+
+            self._wakeup.clear()
+            timeout = self._queue[0][0] - now if self._queue else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self, lookup: Lookup, plan: _Plan):
+        """Fetch a lookup and fan the result out to its subscribers"""
+        async with self._semaphore:
+            try:
+                value = await self._loop.run_in_executor(self._executor, fetch, lookup)
+            except Exception as err:  # pylint: disable=broad-exception-caught
+                _LOGGER.warning("Polling %s failed: %s", lookup, err)
+                value = err
+
+        plan.fetching = False
+        plan.polled_at = self._loop.time()
+        if not isinstance(value, Exception):
+            plan.received = True
+            plan.value = value
+
+        if self._plans.get(lookup) is not plan:
+            return
+
+        for subscription in list(plan.subscribers):
+            self._deliver(subscription, value)
+        self._schedule(lookup, plan.next_due(plan.polled_at))
+
+    def _deliver(self, subscription: Subscription, value: Any):
+        """Call the callback of a subscription"""
+        try:
+            result = subscription.callback(subscription.lookup, value)
+        except Exception:  # pylint: disable=broad-exception-caught
+            _LOGGER.exception("Callback of %s failed", subscription)
+            return
+
+        if inspect.isawaitable(result):
+            self._track(result)
+
+    def _track(self, awaitable):
+        """Run an awaitable as a task that is cancelled on close"""
+        task = asyncio.ensure_future(awaitable)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+
+    def _task_done(self, task: asyncio.Future):
+        """Forget a finished task and log its error"""
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            _LOGGER.error("Subscription task failed", exc_info=task.exception())
+
+    def _schedule(self, lookup: Lookup, due: float):
+        """Queue a poll, replacing the earlier one"""
+        self._plans[lookup].due = due
+        heapq.heappush(self._queue, (due, next(_SEQUENCE), lookup))
+        self._wakeup.set()
@@ -0,0 +1,310 @@
+import bisect
+import json
+import logging
+import math
+import mmap
+import os
+import threading
+import time
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import quote
+
+from fmi_weather_client.columns import FIELDS, ForecastColumns, from_columns, to_columns
+from fmi_weather_client.models import Forecast, RequestType
+
+_LOGGER = logging.getLogger(__name__)
+
+# Layout: <path>/<kind>/<series>/ has meta.json with the place, coordinates and units of the series,
+# and one <field>.f64 file per weather field. Data files are appended (epoch seconds, value) pairs of
+# native float64. Compaction sorts the pairs by time, keeps the latest value of each time and drops
+# pairs older than the retention. The sorted prefix is searched by bisection, the appended tail is scanned.
+_KINDS = {RequestType.FORECAST: 'forecast', RequestType.OBSERVATION: 'observation'}
+_META = 'meta.json'
+_PAIR_SIZE = 16
+
+# Fields that are downsampled with the latest value instead of the mean
+_CATEGORICAL_FIELDS = frozenset({'symbol', 'land_sea_mask'})
+
+# Store that results of the library functions are written to. None disables writing.
+_STORE: Optional['TimeSeriesStore'] = None
+
+Location = Union[Tuple[float, float], str, int]
+
+
+class TimeSeriesStore:
+    """
+    Append-only local store of observations and forecasts.
+
+    Each location has one series per request type, and each series one file per weather field.
+    Values of the same time are overwritten by later writes, so repeated forecasts keep the latest run.
+    """
+
+    def __init__(self, path: str, observation_retention: Optional[timedelta] = None,
+                 forecast_retention: Optional[timedelta] = None, compact_after: int = 10000,
+                 clock: Callable[[], float] = time.time):
+        """
+        :param path: Directory of the store. It is created if it does not exist.
+        :param observation_retention: How long observations are kept. None keeps them forever.
+        :param forecast_retention: How long forecasts are kept. None keeps them forever.
+        :param compact_after: Number of appended values after which a series is compacted
+        :param clock: Function that returns the current time as epoch seconds
+        """
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self._retention = {RequestType.OBSERVATION: observation_retention,
+                           RequestType.FORECAST: forecast_retention}
+        self._compact_after = compact_after
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def append(self, request_type: RequestType, location: Location, forecast: Forecast):
+        """
+        Append a result to its series
+        :param request_type: Observation or forecast
+        :param location: Station id, place name or (lat, lon) the result was requested with
+        :param forecast: Observations or forecast
+        """
+        columns = to_columns(forecast)
+        if not columns.times:
+            return
+
+        directory = self._series_path(request_type, location)
+        timestamps = [point_time.timestamp() for point_time in columns.times]
+
+        with self._lock:
+            os.makedirs(directory, exist_ok=True)
+            meta = _read_meta(directory) or {'units': {}, 'sorted': {}, 'pending': 0}
+            meta.update(place=columns.place, lat=columns.lat, lon=columns.lon)
+            meta['units'].update({field: unit for field, unit in columns.units.items() if unit})
+
+            for field, column in columns.values.items():
+                # Missing values are not written, so they never hide a value written earlier
+                pairs = array('d')
+                for timestamp, value in zip(timestamps, column):
+                    if not math.isnan(value):
+                        pairs.append(timestamp)
+                        pairs.append(value)
+                with open(os.path.join(directory, f'{field}.f64'), 'ab') as file:
+                    pairs.tofile(file)
+                meta['pending'] += len(pairs) // 2
+
+            if meta['pending'] >= self._compact_after:
+                self._compact_series(request_type, directory, meta)
+            else:
+                _write_meta(directory, meta)
+
+    # pylint: disable-next=too-many-arguments,too-many-positional-arguments
+    def query_columns(self, request_type: RequestType, location: Location, start: Optional[datetime] = None,
+                      end: Optional[datetime] = None, step: Optional[timedelta] = None,
+                      fields: Optional[Iterable[str]] = None) -> Optional[ForecastColumns]:
+        """
+        Get stored values of a series as columns
+        :param request_type: Observation or forecast
+        :param location: Station id, place name or (lat, lon) the results were requested with
+        :param start: First time to include. None starts from the oldest value.
+        :param end: Time to stop before. None includes the newest value.
+        :param step: Downsample to means over steps of this length. None returns every stored time.
+        :param fields: Weather fields to get. None gets all fields.
+        :return: Columns on a shared time axis, NaN where a field has no value; None if nothing is stored
+        """
+        directory = self._series_path(request_type, location)
+        start_ts = max(start.timestamp() if start is not None else -math.inf, self._cutoff(request_type))
+        end_ts = end.timestamp() if end is not None else math.inf
+
+        with self._lock:
+            meta = _read_meta(directory)
+            if meta is None:
+                return None
+            series = {field: _read_field(directory, field, meta['sorted'].get(field, 0), start_ts, end_ts)
+                      for field in (fields if fields is not None else FIELDS)}
+
+        timestamps = sorted(set().union(*series.values()))
+        values = {field: array('d', [points.get(timestamp, math.nan) for timestamp in timestamps])
+                  for field, points in series.items() if points}
+        columns = ForecastColumns(meta['place'], meta['lat'], meta['lon'],
+                                  [datetime.fromtimestamp(timestamp, timezone.utc) for timestamp in timestamps],
+                                  meta['units'], values)
+        return downsample(columns, step) if step is not None else columns
+
+    def query(self, request_type: RequestType, location: Location, start: Optional[datetime] = None,
+              end: Optional[datetime] = None, step: Optional[timedelta] = None) -> Optional[Forecast]:
+        """
+        Get stored values of a series
+        :param request_type: Observation or forecast
+        :param location: Station id, place name or (lat, lon) the results were requested with
+        :param start: First time to include. None starts from the oldest value.
+        :param end: Time to stop before. None includes the newest value.
+        :param step: Downsample to means over steps of this length. None returns every stored time.
+        :return: Stored values as a forecast; None if nothing is stored
+        """
+        columns = self.query_columns(request_type, location, start, end, step)
+        return from_columns(columns) if columns is not None else None
+
+    def compact(self):
+        """Compact all series and drop values older than the retention"""
+        with self._lock:
+            for request_type, kind in _KINDS.items():
+                kind_path = os.path.join(self.path, kind)
+                if not os.path.isdir(kind_path):
+                    continue
+                for name in os.listdir(kind_path):
+                    directory = os.path.join(kind_path, name)
+                    meta = _read_meta(directory)
+                    if meta is not None:
+                        self._compact_series(request_type, directory, meta)
+
+    def _compact_series(self, request_type: RequestType, directory: str, meta: dict):
+        """Rewrite data files of a series sorted and without overwritten values. Call while holding the lock."""
+        cutoff = self._cutoff(request_type)
+        for field in FIELDS:
+            path = os.path.join(directory, f'{field}.f64')
+            if not os.path.exists(path):
+                continue
+
+            points = _read_field(directory, field, meta['sorted'].get(field, 0), cutoff, math.inf)
+            pairs = array('d')
+            for timestamp in sorted(points):
+                pairs.append(timestamp)
+                pairs.append(points[timestamp])
+
+            with open(path + '.tmp', 'wb') as file:
+                pairs.tofile(file)
+            os.replace(path + '.tmp', path)
+            meta['sorted'][field] = len(points)
+
+        meta['pending'] = 0
+        _write_meta(directory, meta)
+
+    def _cutoff(self, request_type: RequestType) -> float:
+        """Epoch seconds of the oldest value kept"""
+        retention = self._retention.get(request_type)
+        return self._clock() - retention.total_seconds() if retention is not None else -math.inf
+
+    def _series_path(self, request_type: RequestType, location: Location) -> str:
+        """Directory of a series"""
+        if request_type not in _KINDS:
+            raise ValueError(f"Only observations and forecasts are stored, not {request_type}")
+
+        if isinstance(location, int):
+            name = f'station-{location}'
+        elif isinstance(location, str):
+            name = f'place-{location.lower()}'
+        else:
+            name = f'latlon-{location[0]},{location[1]}'
+        return os.path.join(self.path, _KINDS[request_type], quote(name, safe=''))
+
+
+def set_store(store: Optional[TimeSeriesStore]):
+    """
+    Write the results of observation and forecast functions to a store
+
+    :param store: Time-series store. None stops writing.
+    """
+    global _STORE  # pylint: disable=global-statement
+    _STORE = store
+
+
+def record(request_type: RequestType, location: Location, forecast: Optional[Forecast]):
+    """
+    Write a result to the store set with set_store. Failed writes are logged and do not fail the lookup.
+    :param request_type: Observation or forecast
+    :param location: Station id, place name or (lat, lon) the result was requested with
+    :param forecast: Parsed observations or forecast
+    """
+    store = _STORE
+    if store is None or forecast is None:
+        return
+
+    try:
+        store.append(request_type, location, forecast)
+    except Exception as err:  # pylint: disable=broad-exception-caught
+        # e.g. a full disk or a corrupted series
+        _LOGGER.warning("Writing %s of %s to the time-series store failed: %s", request_type.name, location, err)
+
+
+def downsample(columns: ForecastColumns, step: timedelta) -> ForecastColumns:
+    """
+    Aggregate columns over fixed steps. Values are averaged, wind direction along the circle,
+    and weather symbols and land-sea mask take the latest value.
+    :param columns: Forecast columns
+    :param step: Length of a step. Steps are aligned to the epoch.
+    :return: Columns with one row per step that has values, timed at the start of the step
+    """
+    seconds = step.total_seconds()
+    if seconds <= 0:
+        raise ValueError("Step must be positive")
+
+    buckets: Dict[float, List[int]] = {}
+    for idx, point_time in enumerate(columns.times):
+        buckets.setdefault(math.floor(point_time.timestamp() / seconds) * seconds, []).append(idx)
+    starts = sorted(buckets)
+
+    values = {field: array('d', [_aggregate(field, [column[idx] for idx in buckets[bucket]]) for bucket in starts])
+              for field, column in columns.values.items()}
+    return columns._replace(times=[datetime.fromtimestamp(bucket, timezone.utc) for bucket in starts], values=values)
+
+
+def _aggregate(field: str, values: List[float]) -> float:
+    """Aggregate the values of a step"""
+    present = [value for value in values if not math.isnan(value)]
+    if not present:
+        return math.nan
+    if field in _CATEGORICAL_FIELDS:
+        return present[-1]
+    if field == 'wind_direction':
+        sin = math.fsum(math.sin(math.radians(value)) for value in present)
+        cos = math.fsum(math.cos(math.radians(value)) for value in present)
+        return math.degrees(math.atan2(sin, cos)) % 360
+    return math.fsum(present) / len(present)
+
+
+def _read_field(directory: str, field: str, sorted_count: int, start: float, end: float) -> Dict[float, float]:
+    """Read values of a field between start and end. Later writes of the same time win."""
+    path = os.path.join(directory, f'{field}.f64')
+    try:
+        size = os.path.getsize(path)
+    except FileNotFoundError:
+        return {}
+
+    # A write that was cut short leaves a partial pair at the end
+    size -= size % _PAIR_SIZE
+    if size == 0:
+        return {}
+
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), size, access=mmap.ACCESS_READ) as mapped:
+        with memoryview(mapped) as raw, raw.cast('d') as view:
+            points = _pairs(view[_sorted_range(view, sorted_count, start, end)].tolist())
+            tail = _pairs(view[sorted_count * 2:].tolist())
+
+    points.update((timestamp, value) for timestamp, value in tail.items() if start <= timestamp < end)
+    return points
+
+
+def _sorted_range(view: memoryview, sorted_count: int, start: float, end: float) -> slice:
+    """Slice of the pairs of the sorted prefix between start and end, found by bisection on their times"""
+    with view[0:sorted_count * 2:2] as sorted_times:
+        return slice(bisect.bisect_left(sorted_times, start) * 2, bisect.bisect_left(sorted_times, end) * 2)
+
+
+def _pairs(values: List[float]) -> Dict[float, float]:
+    """Values by time from interleaved (time, value) pairs. Later pairs of the same time win."""
+    return dict(zip(values[0::2], values[1::2]))
+
+
+def _read_meta(directory: str) -> Optional[dict]:
+    """Read metadata of a series; None if the series does not exist"""
+    try:
+        with open(os.path.join(directory, _META), encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def _write_meta(directory: str, meta: dict):
+    """Replace metadata of a series"""
+    path = os.path.join(directory, _META)
+    with open(path + '.tmp', 'w', encoding='utf-8') as file:
+        json.dump(meta, file)
+    os.replace(path + '.tmp', path)
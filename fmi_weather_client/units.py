@@ -0,0 +1,106 @@
+import itertools
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Union
+
+from fmi_weather_client.columns import ForecastColumns
+from fmi_weather_client.models import Forecast, MergedWeather, Value, Weather, WeatherData
+
+
+class Conversion(NamedTuple):
+    """Linear conversion to another unit: converted = value * scale + offset"""
+    unit: str
+    scale: float
+    offset: float = 0.0
+
+
+# Conversions by the unit they convert from. Units without a conversion are kept as they are.
+UnitProfile = Dict[str, Conversion]
+
+# Units of FMI
+METRIC: UnitProfile = {}
+
+IMPERIAL: UnitProfile = {
+    '°C': Conversion('°F', 1.8, 32.0),
+    'm/s': Conversion('mph', 3600 / 1609.344),
+    'hPa': Conversion('inHg', 100 / 3386.389),
+    'mm/h': Conversion('in/h', 1 / 25.4),
+    'J/m²': Conversion('BTU/ft²', 0.09290304 / 1055.05585262),
+    'm': Conversion('ft', 1 / 0.3048),
+}
+
+Convertible = Union[Forecast, Weather, MergedWeather, ForecastColumns]
+
+
+def convert(value: Union[Convertible, Sequence[Convertible]],
+            profile: UnitProfile) -> Union[Convertible, List[Convertible]]:
+    """
+    Convert all values of a result to the units of a profile
+    :param value: Forecast, weather, forecast columns or a list of them, e.g. results of many locations
+    :param profile: Unit profile, e.g. IMPERIAL
+    :return: Result of the same type with converted values and units
+    """
+    if isinstance(value, ForecastColumns):
+        return convert_columns(value, profile)
+    if isinstance(value, Forecast):
+        return convert_forecast(value, profile)
+    if isinstance(value, (Weather, MergedWeather)):
+        return value._replace(data=convert_forecast(Forecast(value.place, value.lat, value.lon, [value.data]),
+                                                    profile).forecasts[0])
+    return [convert(item, profile) for item in value]
+
+
+def convert_columns(columns: ForecastColumns, profile: UnitProfile) -> ForecastColumns:
+    """
+    Convert forecast columns to the units of a profile. Each converted field is converted as a whole column.
+    :param columns: Forecast columns
+    :param profile: Unit profile
+    :return: Columns with converted values and units
+    """
+    units = dict(columns.units)
+    values = dict(columns.values)
+    for field, unit in columns.units.items():
+        conversion = profile.get(unit)
+        if conversion is None:
+            continue
+        units[field] = conversion.unit
+        if field in values:
+            values[field] = _convert_column(values[field], conversion)
+
+    return columns._replace(units=units, values=values)
+
+
+def convert_forecast(forecast: Forecast, profile: UnitProfile) -> Forecast:
+    """
+    Convert forecast rows to the units of a profile. Values of fields that are not converted are reused.
+    :param forecast: Forecast
+    :param profile: Unit profile
+    :return: Forecast with converted values and units
+    """
+    rows = forecast.forecasts
+    if not rows:
+        return forecast
+
+    columns: List[Iterable] = list(zip(*rows))
+    for idx in range(1, len(columns)):
+        # All rows of a field share the unit
+        conversion = profile.get(columns[idx][0].unit)
+        if conversion is not None:
+            columns[idx] = _convert_values(columns[idx], conversion)
+
+    return forecast._replace(forecasts=list(map(WeatherData, *columns)))
+
+
+def _convert_column(column: Iterable[float], conversion: Conversion) -> array:
+    """Convert a float column. NaN stays NaN."""
+    scale, offset = conversion.scale, conversion.offset
+    if offset:
+        return array('d', [value * scale + offset for value in column])
+    return array('d', [value * scale for value in column])
+
+
+def _convert_values(column: Sequence[Value], conversion: Conversion) -> List[Value]:
+    """Convert a column of values. Missing values stay missing."""
+    scale, offset = conversion.scale, conversion.offset
+    converted: List[Optional[float]] = [None if value.value is None else value.value * scale + offset
+                                        for value in column]
+    return list(map(Value, converted, itertools.repeat(conversion.unit, len(converted))))
@@ -0,0 +1,332 @@
+import bisect
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Callable, Dict, Hashable, List, NamedTuple, Optional
+
+import math
+
+from fmi_weather_client import http
+from fmi_weather_client.columns import ForecastColumns, from_columns, take, to_columns
+from fmi_weather_client.models import DailySummary, Forecast, RequestType, Value, Weather, WeatherData
+from fmi_weather_client.parsers import forecast as forecast_parser
+
+# Fields that are picked from the nearest point instead of interpolated
+_CATEGORICAL_FIELDS = frozenset({'symbol', 'land_sea_mask'})
+
+# FMI parameter of each WeatherData field
+_PARAMETERS = {field: parameter for field, parameter, _ in forecast_parser.FIELD_PARAMETERS}
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _CachedSeries(NamedTuple):
+    """Hourly forecast series stored by the view"""
+    fetched_at: float
+
+    # Time of the first point and number of hours covered after it
+    start: datetime
+    hours: int
+    columns: ForecastColumns
+
+    def covers(self, start: datetime, hours: int) -> bool:
+        """Check if the series covers given hours from the given start"""
+        return self.start <= start and self.start + timedelta(hours=self.hours) >= start + timedelta(hours=hours)
+
+
+class ForecastView:
+    """
+    Serve forecasts from a single cached hourly series per location.
+
+    Forecasts with a coarser timestep are subsampled from the hourly series and daily summaries are
+    aggregated from it, so asking for several timestep variants of the same location costs one request.
+    Current weather is interpolated from the series too. The series starts at the beginning of the
+    current hour, so that it always has points before and after the current time.
+    """
+
+    def __init__(self, max_age: timedelta = timedelta(minutes=30),
+                 clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc)):
+        """
+        :param max_age: How long a fetched hourly series is used before it is fetched again
+        :param clock: Function that returns the current time
+        """
+        self._max_age = max_age.total_seconds()
+        self._clock = clock
+        self._series: Dict[Hashable, _CachedSeries] = {}
+        self._lock = threading.Lock()
+
+    def forecast_by_coordinates(self, lat: float, lon: float, timestep_hours: int = 24,
+                                forecast_points: int = 4) -> Forecast:
+        """
+        Get the latest forecast by coordinates.
+        :param lat: Latitude (e.g. 25.67087)
+        :param lon: Longitude (e.g. 62.39758)
+        :param timestep_hours: Hours between forecasts
+        :param forecast_points: number of forcast points
+        :return: Latest forecast
+        """
+        forecast = self._forecast(_coordinates_key(lat, lon), _coordinates_request(lat, lon), timestep_hours,
+                                  forecast_points)
+        return http.restore_coordinates(forecast, lat, lon)
+
+    def forecast_by_place_name(self, name: str, timestep_hours: int = 24, forecast_points: int = 4) -> Forecast:
+        """
+        Get the latest forecast by place name.
+        :param name: Place name
+        :param timestep_hours: Hours between forecasts
+        :param forecast_points: number of forcast points
+        :return: Latest forecast
+        """
+        return self._forecast(('place', _place_key(name)), _place_request(name), timestep_hours, forecast_points)
+
+    def daily_by_coordinates(self, lat: float, lon: float, days: int = 4,
+                             tz: tzinfo = timezone.utc) -> List[DailySummary]:
+        """
+        Get daily forecast summaries by coordinates.
+        :param lat: Latitude (e.g. 25.67087)
+        :param lon: Longitude (e.g. 62.39758)
+        :param days: Number of days
+        :param tz: Time zone that defines the day boundaries
+        :return: Daily summaries
+        """
+        columns = self._upcoming(self._hourly(_coordinates_key(lat, lon), days * 24, _coordinates_request(lat, lon)))
+        return daily_summaries(columns, tz)[:days]
+
+    def daily_by_place_name(self, name: str, days: int = 4, tz: tzinfo = timezone.utc) -> List[DailySummary]:
+        """
+        Get daily forecast summaries by place name.
+        :param name: Place name
+        :param days: Number of days
+        :param tz: Time zone that defines the day boundaries
+        :return: Daily summaries
+        """
+        columns = self._upcoming(self._hourly(('place', _place_key(name)), days * 24, _place_request(name)))
+        return daily_summaries(columns, tz)[:days]
+
+    def weather_by_coordinates(self, lat: float, lon: float) -> Optional[Weather]:
+        """
+        Get the current weather by coordinates, interpolated from the hourly series.
+        The series is fetched only when none is cached for the location.
+        :param lat: Latitude (e.g. 25.67087)
+        :param lon: Longitude (e.g. 62.39758)
+        :return: Current weather information if available; None otherwise
+        """
+        weather = self._nowcast(_coordinates_key(lat, lon), _coordinates_request(lat, lon))
+        if weather is None:
+            # pylint: disable=import-outside-toplevel,cyclic-import
+            import fmi_weather_client
+            return fmi_weather_client.weather_by_coordinates(lat, lon)
+        return http.restore_coordinates(weather, lat, lon)
+
+    def weather_by_place_name(self, name: str) -> Optional[Weather]:
+        """
+        Get the current weather by place name, interpolated from the hourly series.
+        The series is fetched only when none is cached for the location.
+        :param name: Place name (e.g. Kaisaniemi, Helsinki)
+        :return: Current weather information if available; None otherwise
+        """
+        weather = self._nowcast(('place', _place_key(name)), _place_request(name))
+        if weather is None:
+            # pylint: disable=import-outside-toplevel,cyclic-import
+            import fmi_weather_client
+            return fmi_weather_client.weather_by_place_name(name)
+        return weather
+
+    def clear(self):
+        """Forget all cached series"""
+        with self._lock:
+            self._series.clear()
+
+    def _forecast(self, key: Hashable, request: Callable[[datetime, int], str], timestep_hours: int,
+                  forecast_points: int) -> Forecast:
+        """Subsample a forecast from the hourly series on the same time points as a forecast request gets"""
+        now = self._clock()
+        first = http.first_forecast_time(now, timestep_hours)
+        hours = _hours_needed(now, first + timedelta(hours=timestep_hours * max(forecast_points - 1, 0)))
+        columns = self._upcoming(self._hourly(key, hours, request))
+        return from_columns(subsample(columns, timestep_hours, forecast_points, first))
+
+    def _nowcast(self, key: Hashable, request: Callable[[datetime, int], str]) -> Optional[Weather]:
+        """Interpolate current weather from the cached series, fetching a short one if needed"""
+        now = self._clock()
+        with self._lock:
+            cached = self._series.get(key)
+
+        if cached is not None and time.monotonic() - cached.fetched_at < self._max_age:
+            columns = cached.columns
+        else:
+            columns = self._hourly(key, 1, request)
+
+        weather_data = interpolate(columns, now)
+        if weather_data is None:
+            return None
+        return Weather(columns.place, columns.lat, columns.lon, weather_data)
+
+    def _hourly(self, key: Hashable, hours: int, request: Callable[[datetime, int], str]) -> ForecastColumns:
+        """
+        Get an hourly series that covers at least the given number of hours after the current one
+        :param key: Location key
+        :param hours: Number of hours needed
+        :param request: Function that requests given number of hourly forecast points from the given time
+        :return: Hourly series as columns
+        """
+        start = self._clock().astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        with self._lock:
+            cached = self._series.get(key)
+
+        now = time.monotonic()
+        fresh = cached is not None and now - cached.fetched_at < self._max_age
+        if fresh and cached.covers(start, hours):
+            return cached.columns
+
+        # Grow the series to the longest one requested so far, so that the next variant is a cache hit too
+        if fresh:
+            hours = max(hours, cached.hours)
+
+        # One extra point, so that the current hour is covered too
+        _LOGGER.debug("Fetching %d hourly forecast points for %s", hours + 1, key)
+        response = request(start, hours + 1)
+        columns = to_columns(forecast_parser.parse_fmi_response(response, RequestType.FORECAST))
+
+        with self._lock:
+            self._series[key] = _CachedSeries(now, start, hours, columns)
+
+        return columns
+
+    def _upcoming(self, columns: ForecastColumns) -> ForecastColumns:
+        """Drop points that are already in the past"""
+        now = self._clock()
+        return take(columns, [idx for idx, point_time in enumerate(columns.times) if point_time >= now])
+
+
+def interpolate(columns: ForecastColumns, at: datetime) -> Optional[WeatherData]:
+    """
+    Interpolate weather at the given time linearly between the two surrounding points.
+
+    Wind direction is interpolated along the shorter arc and weather symbols are taken from
+    the nearest point. Feels like temperature is derived from the interpolated values.
+    :param columns: Series
+    :param at: Time
+    :return: Interpolated weather data; None if the series does not cover the time
+    """
+    after = bisect.bisect_left(columns.times, at)
+    if after == len(columns.times):
+        return None
+    if columns.times[after] == at:
+        before = after
+    elif after == 0:
+        return None
+    else:
+        before = after - 1
+
+    span = (columns.times[after] - columns.times[before]).total_seconds()
+    fraction = (at - columns.times[before]).total_seconds() / span if span else 0.0
+
+    typed_values = {}
+    for field, column in columns.values.items():
+        parameter = _PARAMETERS.get(field)
+        if parameter is not None:
+            typed_values[parameter] = _interpolate_value(field, column[before], column[after], fraction)
+
+    return forecast_parser.to_weather_data(int(at.timestamp()), typed_values)
+
+
+def _interpolate_value(field: str, first: float, second: float, fraction: float) -> float:
+    """Interpolate a single value. A missing value is replaced with the other one."""
+    if math.isnan(first) or math.isnan(second) or field in _CATEGORICAL_FIELDS:
+        nearest, other = (first, second) if fraction < 0.5 else (second, first)
+        return other if math.isnan(nearest) else nearest
+
+    if field == 'wind_direction':
+        delta = (second - first + 180) % 360 - 180
+        return (first + delta * fraction) % 360
+
+    return first + (second - first) * fraction
+
+
+def subsample(columns: ForecastColumns, timestep_hours: int, forecast_points: int,
+              first: Optional[datetime] = None) -> ForecastColumns:
+    """
+    Pick every nth hour from an hourly series
+    :param columns: Hourly series
+    :param timestep_hours: Hours between picked points
+    :param forecast_points: Maximum number of picked points
+    :param first: Time of the first picked point. Defaults to the first point of the series.
+    :return: Subsampled series
+    """
+    if not columns.times:
+        return columns
+
+    step = timedelta(hours=timestep_hours)
+    first = columns.times[0] if first is None else first
+    indices = [idx for idx, point_time in enumerate(columns.times)
+               if point_time >= first and (point_time - first) % step == timedelta(0)]
+    return take(columns, indices[:forecast_points])
+
+
+def daily_summaries(columns: ForecastColumns, tz: tzinfo = timezone.utc) -> List[DailySummary]:
+    """
+    Aggregate an hourly series into daily summaries
+    :param columns: Hourly series
+    :param tz: Time zone that defines the day boundaries
+    :return: Summary of each day in the series
+    """
+    summaries = []
+    for day, rows in _day_ranges(columns.times, tz):
+        summaries.append(DailySummary(
+            date=day,
+            temperature_min=_aggregate(columns, 'temperature', rows, min),
+            temperature_max=_aggregate(columns, 'temperature', rows, max),
+            wind_speed_max=_aggregate(columns, 'wind_speed', rows, max),
+            wind_gust_max=_aggregate(columns, 'wind_gust', rows, max),
+            precipitation_amount=_aggregate(columns, 'precipitation_amount', rows, math.fsum, 'mm'),
+        ))
+
+    return summaries
+
+
+def _day_ranges(times: List[datetime], tz: tzinfo):
+    """Yield date and row slice of each consecutive day in the time axis"""
+    start = 0
+    for idx in range(1, len(times) + 1):
+        if idx == len(times) or times[idx].astimezone(tz).date() != times[start].astimezone(tz).date():
+            yield times[start].astimezone(tz).date(), slice(start, idx)
+            start = idx
+
+
+def _aggregate(columns: ForecastColumns, field: str, rows: slice, func: Callable, unit: Optional[str] = None) -> Value:
+    """Aggregate a slice of a column, ignoring missing values"""
+    unit = columns.units.get(field, '') if unit is None else unit
+    column = columns.values.get(field)
+    if column is None:
+        return Value(None, unit)
+
+    values = [value for value in column[rows] if not math.isnan(value)]
+    return Value(func(values) if values else None, unit)
+
+
+def _hours_needed(now: datetime, last: datetime) -> int:
+    """Number of hours after the current one needed to reach the last forecast point"""
+    current_hour = now.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return max(math.ceil((last - current_hour) / timedelta(hours=1)), 1)
+
+
+def _coordinates_key(lat: float, lon: float) -> Hashable:
+    """Cache key of coordinates. Nearby coordinates share the key when requests snap coordinates."""
+    return ('coordinates', *http.snap_coordinates(lat, lon))
+
+
+def _coordinates_request(lat: float, lon: float) -> Callable[[datetime, int], str]:
+    """Create function that requests an hourly series by coordinates"""
+    return lambda start, points: http.request_forecast_by_coordinates(lat, lon, 1, points, start_time=start)
+
+
+def _place_request(name: str) -> Callable[[datetime, int], str]:
+    """Create function that requests an hourly series by place name"""
+    return lambda start, points: http.request_forecast_by_place(name, 1, points, start_time=start)
+
+
+def _place_key(name: str) -> str:
+    """Normalize place name the same way the request does"""
+    return name.strip().replace(' ', '').lower()
@@ -54,10 +54,12 @@ def mock_server_error_response(*args, **kwargs):
     return MockResponse("Internal Server Error", 500)
 
 
-def __mock_response(filename, status_code, *args, **kwargs):
+def read(filename):
     dirname = os.path.dirname(__file__)
     xml_file = os.path.join(dirname, filename)
     with open(xml_file, 'r') as mock_file:
-        xml = mock_file.read()
+        return mock_file.read()
+
 
-    return MockResponse(xml, status_code)
+def __mock_response(filename, status_code, *args, **kwargs):
+    return MockResponse(read(filename), status_code)
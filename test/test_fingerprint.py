@@ -0,0 +1,29 @@
+import unittest
+
+import test.test_data as test_data
+from fmi_weather_client.fingerprint import FingerprintCache, fingerprint
+
+
+class FingerprintTest(unittest.TestCase):
+
+    def test_result_time(self):
+        body = test_data.read('valid_place_forecast_response.xml')
+        self.assertEqual(fingerprint(body).result_time, '2022-09-19T12:06:30Z')
+        self.assertIsNone(fingerprint('<data/>').result_time)
+
+    def test_creation_time_is_ignored(self):
+        body = test_data.read('valid_place_forecast_response.xml')
+        later = body.replace('timeStamp="2022-09-19T13:03:18Z"', 'timeStamp="2022-09-19T14:03:18Z"')
+        self.assertEqual(fingerprint(body), fingerprint(later))
+        self.assertNotEqual(fingerprint(body), fingerprint(body.replace('12.3', '13.3', 1)))
+
+    def test_cache_evicts_least_recently_used(self):
+        cache = FingerprintCache(max_size=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
@@ -0,0 +1,21 @@
+import unittest
+
+from fmi_weather_client import geo
+
+
+class GeoTest(unittest.TestCase):
+
+    def test_geohash_encode(self):
+        self.assertEqual(geo.geohash_encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(geo.geohash_encode(60.1699, 24.9384), geo.geohash_encode(60.1701, 24.9386))
+
+    def test_geohash_decode(self):
+        lat, lon = geo.geohash_decode('u4pruydqqvj')
+        self.assertAlmostEqual(lat, 57.64911, places=4)
+        self.assertAlmostEqual(lon, 10.40744, places=4)
+
+    def test_snap_to_grid(self):
+        self.assertEqual(geo.snap_to_grid(60.1699, 24.9384, 0.01), (60.17, 24.94))
+        self.assertEqual(geo.snap_to_grid(60.1701, 24.9386, 0.01), (60.17, 24.94))
+        with self.assertRaises(ValueError):
+            geo.snap_to_grid(60.17, 24.94, 0)
@@ -1,7 +1,17 @@
+import threading
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from unittest import mock
+
+import requests
+
 import fmi_weather_client.http as http
+import test.test_data as test_data
+from fmi_weather_client.latency import LatencyTracker
 from fmi_weather_client.http import RequestType
-from fmi_weather_client.errors import ClientError
+from fmi_weather_client.errors import ClientError, ServerError
 from collections import namedtuple
 
 
@@ -27,3 +37,162 @@ class HTTPTest(unittest.TestCase):
             Response = namedtuple("Response", ['status_code', 'text'])
             mock_response = Response(status_code=status_code, text=text)
             http._handle_errors(mock_response)
+
+    def test_empty_or_invalid_body_is_rejected(self):
+        for body in ('', '   ', '<wfs:FeatureCollection', 'not xml'):
+            with mock.patch('requests.get', return_value=test_data.MockResponse(body, 200)):
+                with self.assertRaises(ServerError, msg=repr(body)):
+                    http.request_weather_by_place('Iisalmi')
+
+    def test_create_params_snaps_coordinates(self):
+        http.set_coordinate_precision(grid=0.01)
+        try:
+            params = http._create_params(RequestType.WEATHER, 10, lat=60.1699, lon=24.9384)
+        finally:
+            http.set_coordinate_precision()
+
+        self.assertEqual(params['latlon'], '60.17,24.94')
+
+    def test_set_coordinate_precision_both(self):
+        with self.assertRaises(ValueError):
+            http.set_coordinate_precision(grid=0.01, geohash_precision=6)
+
+    def test_snap_coordinates_geohash(self):
+        http.set_coordinate_precision(geohash_precision=6)
+        try:
+            first = http.snap_coordinates(60.1699, 24.9384)
+            second = http.snap_coordinates(60.1701, 24.9386)
+        finally:
+            http.set_coordinate_precision()
+
+        self.assertEqual(first, second)
+        self.assertEqual(http.snap_coordinates(60.1699, 24.9384), (60.1699, 24.9384))
+
+    def test_first_forecast_time(self):
+        now = datetime(2022, 9, 19, 9, 25, tzinfo=timezone.utc)
+        self.assertEqual(http.first_forecast_time(now, 1), datetime(2022, 9, 19, 10, tzinfo=timezone.utc))
+        self.assertEqual(http.first_forecast_time(now, 24), datetime(2022, 9, 20, tzinfo=timezone.utc))
+        self.assertEqual(http.first_forecast_time(now.replace(minute=0), 1), now.replace(minute=0))
+
+    def test_request_key_ignores_seconds(self):
+        first = {'latlon': '60.17,24.94', 'starttime': '2022-09-19T09:20:01+00:00'}
+        second = {'latlon': '60.17,24.94', 'starttime': '2022-09-19T09:20:59+00:00'}
+        third = {'latlon': '60.17,24.94', 'starttime': '2022-09-19T09:21:00+00:00'}
+        self.assertEqual(http.request_key(first), http.request_key(second))
+        self.assertNotEqual(http.request_key(first), http.request_key(third))
+
+    def test_identical_requests_are_coalesced(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_response(*args, **kwargs):
+            started.set()
+            release.wait(5)
+            return test_data.mock_coordinate_forecast_response(*args, **kwargs)
+
+        params = http._create_params(RequestType.WEATHER, 10, lat=60.17, lon=24.94)
+        with mock.patch('requests.get', side_effect=slow_response) as mock_get:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                first = executor.submit(http._send_request, dict(params))
+                started.wait(5)
+                second = executor.submit(http._send_request, dict(params))
+                # Give the second request time to find the first one in flight
+                time.sleep(0.05)
+                release.set()
+
+            self.assertEqual(first.result(), second.result())
+            self.assertEqual(mock_get.call_count, 1)
+
+    def test_waiters_get_interrupts_of_the_leader(self):
+        class Interrupted(BaseException):
+            pass
+
+        started = threading.Event()
+        release = threading.Event()
+
+        def interrupted_response(*args, **kwargs):
+            started.set()
+            release.wait(5)
+            raise Interrupted()
+
+        params = http._create_params(RequestType.WEATHER, 10, lat=60.17, lon=24.94)
+        with mock.patch('requests.get', side_effect=interrupted_response):
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                first = executor.submit(http._send_request, dict(params))
+                started.wait(5)
+                second = executor.submit(http._send_request, dict(params))
+                time.sleep(0.05)
+                release.set()
+
+            with self.assertRaises(Interrupted):
+                first.result(5)
+            with self.assertRaises(Interrupted):
+                second.result(5)
+
+    def test_slow_request_is_hedged(self):
+        tracker = LatencyTracker(min_samples=1)
+        tracker.record(0.01)
+        calls = []
+
+        def response(*args, **kwargs):
+            calls.append(time.perf_counter())
+            if len(calls) == 1:
+                time.sleep(0.5)
+            return test_data.mock_coordinate_forecast_response(*args, **kwargs)
+
+        params = http._create_params(RequestType.WEATHER, 10, lat=60.17, lon=24.94)
+        http.set_hedging(1.0)
+        try:
+            with mock.patch.object(http, '_LATENCY', tracker), mock.patch('requests.get', side_effect=response):
+                started = time.perf_counter()
+                http._send_request(params)
+                elapsed = time.perf_counter() - started
+        finally:
+            http.set_hedging()
+
+        self.assertEqual(len(calls), 2)
+        self.assertLess(elapsed, 0.4)
+        self.assertEqual(tracker.hedges(), 1)
+
+    def test_failed_requests_are_recorded(self):
+        tracker = LatencyTracker(min_samples=1)
+        params = http._create_params(RequestType.WEATHER, 10, lat=60.17, lon=24.94)
+        with mock.patch.object(http, '_LATENCY', tracker):
+            with mock.patch('requests.get', side_effect=requests.ConnectionError):
+                with self.assertRaises(requests.ConnectionError):
+                    http._send_request(params)
+            self.assertIsNotNone(tracker.percentile(0.99))
+
+            with mock.patch('requests.get', side_effect=requests.Timeout):
+                with self.assertRaises(requests.Timeout):
+                    http._send_request(params)
+            self.assertEqual(tracker.percentile(0.99), 10)
+
+    def test_session(self):
+        session = mock.Mock(spec=requests.Session)
+        session.get.side_effect = test_data.mock_coordinate_forecast_response
+        params = http._create_params(RequestType.WEATHER, 10, lat=60.17, lon=24.94)
+        http.set_session(session)
+        try:
+            with mock.patch('requests.get') as mock_get:
+                http._send_request(params)
+        finally:
+            http.set_session()
+
+        session.get.assert_called_once()
+        mock_get.assert_not_called()
+
+    def test_adaptive_timeout(self):
+        tracker = LatencyTracker(min_samples=1)
+        with mock.patch.object(http, '_LATENCY', tracker):
+            self.assertEqual(http._timeout(), 10)
+            http.set_adaptive_timeout()
+            try:
+                self.assertEqual(http._timeout(), 10)
+                tracker.record(0.5)
+                self.assertEqual(http._timeout(), 2)
+                tracker.record(0.01)
+                tracker.record(30)
+                self.assertEqual(http._timeout(), 10)
+            finally:
+                http.set_adaptive_timeout(False)
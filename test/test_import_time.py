@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+import unittest
+
+# Maximum cumulative import time of the package in microseconds. The default is generous, several
+# times the lazy import on a busy machine but well below eagerly importing requests alone, so it
+# catches a heavy dependency being imported eagerly again. Set FMI_IMPORT_TIME_BUDGET_US to tighten it.
+IMPORT_TIME_BUDGET_US = int(os.environ.get('FMI_IMPORT_TIME_BUDGET_US', 50000))
+
+HEAVY_MODULES = ('asyncio', 'requests', 'xmltodict', 'concurrent.futures', 'fmi_weather_client.http',
+                 'fmi_weather_client.parsers.forecast', 'fmi_weather_client.streaming')
+
+
+def import_package(code=''):
+    return subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import fmi_weather_client\n{code}'],
+                          capture_output=True, text=True, check=True,
+                          cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class ImportTimeTest(unittest.TestCase):
+
+    def test_import_time_budget(self):
+        # Best of a few runs to smooth out noise from a busy machine
+        cumulative = min(self.cumulative_import_time(import_package().stderr) for _ in range(3))
+        self.assertLess(cumulative, IMPORT_TIME_BUDGET_US,
+                        f"Importing fmi_weather_client took {cumulative} us, budget is {IMPORT_TIME_BUDGET_US} us")
+
+    def test_heavy_modules_are_not_imported(self):
+        result = import_package(f'import sys\nprint(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))')
+        self.assertEqual(result.stdout.strip(), '')
+
+    def test_heavy_modules_are_imported_on_first_use(self):
+        result = import_package('import sys\n'
+                                'fmi_weather_client.stream_weather\n'
+                                'fmi_weather_client.http.set_base_url()\n'
+                                'fmi_weather_client.forecast_parser.set_parse_executor(None)\n'
+                                f'print(",".join(m for m in {HEAVY_MODULES!r} if m not in sys.modules))')
+        self.assertEqual(result.stdout.strip(), '')
+
+    def cumulative_import_time(self, output):
+        for line in output.splitlines():
+            parts = line.split('|')
+            if len(parts) == 3 and parts[2].strip() == 'fmi_weather_client':
+                return int(parts[1].strip())
+        self.fail(f"Import time of fmi_weather_client not found in:\n{output}")
@@ -2,6 +2,8 @@ import unittest
 from unittest import mock
 
 import asyncio
+import math
+from datetime import datetime, timezone
 
 import fmi_weather_client
 import test.test_data as test_data
@@ -49,12 +51,61 @@ class FMIWeatherTest(unittest.TestCase):
         forecast = fmi_weather_client.forecast_by_coordinates(29.742731, 67.583988)
         self.assert_coordinate_forecast(forecast)
 
+    @mock.patch('requests.get', side_effect=test_data.mock_coordinate_forecast_response)
+    def test_snapped_request_reports_requested_coordinates(self, mock_get):
+        fmi_weather_client.http.set_coordinate_precision(grid=0.01)
+        try:
+            weather = fmi_weather_client.weather_by_coordinates(67.583988, 29.742731)
+            forecast = fmi_weather_client.forecast_by_coordinates(67.583988, 29.742731)
+            with mock.patch('fmi_weather_client.datetime') as mock_datetime:
+                mock_datetime.now.return_value = datetime(2022, 9, 19, 9, 25, tzinfo=timezone.utc)
+                combined = fmi_weather_client.weather_and_forecast_by_coordinates(67.583988, 29.742731, 1, 1)
+        finally:
+            fmi_weather_client.http.set_coordinate_precision()
+        unsnapped = fmi_weather_client.weather_by_coordinates(67.583988, 29.742731)
+
+        self.assertEqual(mock_get.call_args_list[0].kwargs['params']['latlon'], '67.58,29.74')
+        # Snapped results report the requested coordinates, others the point of the FMI response
+        for result in (weather, forecast, combined.weather, combined.forecast):
+            self.assertEqual((result.lat, result.lon), (67.583988, 29.742731))
+        self.assertEqual((unsnapped.lat, unsnapped.lon), (67.58399, 29.74273))
+
     @mock.patch('requests.get', side_effect=test_data.mock_coordinate_forecast_response)
     def test_async_get_forecast_by_coordinates(self, mock_get):
         loop = asyncio.get_event_loop()
         forecast = loop.run_until_complete(fmi_weather_client.async_forecast_by_coordinates(67.583988, 29.742731))
         self.assert_coordinate_forecast(forecast)
 
+    @mock.patch('requests.get', side_effect=test_data.mock_place_forecast_response)
+    def test_get_weather_and_forecast_by_place_name(self, mock_get):
+        now = datetime(2022, 9, 19, 9, 25, tzinfo=timezone.utc)
+        with mock.patch('fmi_weather_client.datetime') as mock_datetime:
+            mock_datetime.now.return_value = now
+            result = fmi_weather_client.weather_and_forecast_by_place_name('Iisalmi', 1, 2)
+
+        self.assertEqual(mock_get.call_count, 1)
+        params = mock_get.call_args.kwargs['params']
+        self.assertEqual(params['timestep'], 60)
+        self.assertEqual(params['starttime'], '2022-09-19T09:00:00+00:00')
+        self.assertEqual(params['endtime'], '2022-09-19T11:00:00+00:00')
+
+        # Same time points as separate weather and forecast requests: the latest 10 minutes and full hours
+        self.assertEqual(result.weather.place, 'Iisalmi')
+        self.assertEqual(result.weather.data.time.timestamp(), 1663579200)
+        self.assertEqual([f.time.timestamp() for f in result.forecast.forecasts], [1663581600, 1663585200])
+        self.assertEqual(result.forecast.lat, 63.55915)
+
+    @mock.patch('requests.get', side_effect=test_data.mock_coordinate_forecast_response)
+    def test_async_get_weather_and_forecast_by_coordinates(self, mock_get):
+        loop = asyncio.get_event_loop()
+        result = loop.run_until_complete(
+            fmi_weather_client.async_weather_and_forecast_by_coordinates(67.583988, 29.742731, 24, 4))
+
+        # All points of the test response are in the past
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertIsNone(result.weather)
+        self.assertEqual(result.forecast.forecasts, [])
+
     @mock.patch('requests.get', side_effect=test_data.mock_observation_by_station_id_response)
     def test_get_observation_by_station_id(self, mock_get):
         weather = fmi_weather_client.observation_by_station_id(101794)
@@ -77,6 +128,35 @@ class FMIWeatherTest(unittest.TestCase):
         weather = loop.run_until_complete(fmi_weather_client.async_observation_by_place("Tampere"))
         self.assert_observation_place(weather)
 
+    def test_observation_merges_missing_values(self):
+        # Newest row misses temperature and humidity
+        body = test_data.read('valid_observation_by_place_response.xml').replace(
+            '26.3 19.0 1010.2 64.0', 'NaN 19.0 1010.2 NaN')
+        with mock.patch('requests.get', return_value=test_data.MockResponse(body, 200)):
+            latest = fmi_weather_client.observation_by_place("Tampere")
+            weather = fmi_weather_client.observation_by_place("Tampere", merge_missing=True)
+
+        self.assertTrue(math.isnan(latest.data.temperature.value))
+        self.assertEqual(weather.data.time, latest.data.time)
+        self.assertEqual(weather.data.temperature.value, 26.3)
+        self.assertEqual(weather.data.humidity.value, 67.0)
+        self.assertEqual(weather.data.dew_point.value, 19.0)
+
+        older = datetime(2025, 7, 15, 14, 50, tzinfo=timezone.utc)
+        newest = datetime(2025, 7, 15, 15, 0, tzinfo=timezone.utc)
+        self.assertEqual(weather.times['temperature'], older)
+        self.assertEqual(weather.times['humidity'], older)
+        self.assertEqual(weather.times['dew_point'], newest)
+        self.assertNotIn('wind_max', weather.times)
+        self.assertIsNone(weather.data.wind_max.value)
+
+    @mock.patch('requests.get', side_effect=test_data.mock_observation_by_station_id_response)
+    def test_async_observation_merges_missing_values(self, mock_get):
+        loop = asyncio.get_event_loop()
+        weather = loop.run_until_complete(fmi_weather_client.async_observation_by_station_id(101794, True))
+        self.assertEqual(weather.data.temperature.value, -7.2)
+        self.assertEqual(weather.times['temperature'], weather.data.time)
+
     # CORNER CASES
     @mock.patch('requests.get', side_effect=test_data.mock_nan_response)
     def test_nil_weather_response(self, mock_get):
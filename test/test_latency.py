@@ -0,0 +1,31 @@
+import unittest
+
+from fmi_weather_client.latency import LatencyTracker
+
+
+class LatencyTrackerTest(unittest.TestCase):
+
+    def test_needs_enough_samples(self):
+        tracker = LatencyTracker(window=10, min_samples=3)
+        tracker.record(0.3)
+        tracker.record(0.1)
+        self.assertIsNone(tracker.percentile(0.5))
+
+        tracker.record(0.2)
+        self.assertEqual(tracker.percentile(0.5), 0.2)
+
+    def test_window(self):
+        tracker = LatencyTracker(window=2, min_samples=1)
+        for latency in (5.0, 0.1, 0.2):
+            tracker.record(latency)
+        self.assertEqual(tracker.percentile(1.0), 0.2)
+
+    def test_hedge_budget(self):
+        tracker = LatencyTracker()
+        for _ in range(20):
+            tracker.count_request()
+
+        self.assertTrue(tracker.try_hedge(0.1))
+        self.assertTrue(tracker.try_hedge(0.1))
+        self.assertFalse(tracker.try_hedge(0.1))
+        self.assertEqual(tracker.hedges(), 2)
@@ -0,0 +1,161 @@
+import math
+import threading
+import time
+import unittest
+from array import array
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import fmi_weather_client
+import test.test_data as test_data
+from fmi_weather_client import http, multimodel
+from fmi_weather_client.columns import ForecastColumns
+from fmi_weather_client.errors import ServerError
+from fmi_weather_client.multimodel import BLEND, EDITED, HARMONIE
+
+FIRST_POINT = datetime(2022, 9, 19, 9, 20, tzinfo=timezone.utc)
+TIMES = [FIRST_POINT + timedelta(hours=hour) for hour in range(3)]
+
+
+def mock_model_response(*args, **kwargs):
+    if kwargs['params']['storedquery_id'] == HARMONIE.query_id:
+        # The HARMONIE test response has the hourly precipitation as the accumulated parameter
+        body = test_data.read('valid_coordinate_forecast_response.xml')
+        return test_data.MockResponse(body.replace('"PrecipitationAmount"', '"Precipitation1h"'), 200)
+    return test_data.mock_place_forecast_response()
+
+
+def columns(times, **values):
+    return ForecastColumns('Iisalmi', 63.56, 27.19, times, {'temperature': '°C', 'wind_direction': '°'},
+                           {field: array('d', column) for field, column in values.items()})
+
+
+class MultiModelTest(unittest.TestCase):
+
+    @mock.patch('requests.get', side_effect=mock_model_response)
+    def test_models_are_fetched_in_parallel(self, mock_get):
+        # Both requests must be in flight at the same time to pass the barrier
+        barrier = threading.Barrier(2, timeout=5)
+
+        def wait_for_other_model(*args, **kwargs):
+            barrier.wait()
+            return mock_model_response(*args, **kwargs)
+
+        mock_get.side_effect = wait_for_other_model
+        result = multimodel.forecast_by_coordinates(63.56, 27.19, models=(EDITED, HARMONIE))
+
+        queries = sorted(call.kwargs['params']['storedquery_id'] for call in mock_get.call_args_list)
+        self.assertEqual(queries, sorted([EDITED.query_id, HARMONIE.query_id]))
+        self.assertEqual(len({call.kwargs['params']['starttime'] for call in mock_get.call_args_list}), 1)
+        self.assertEqual(result.errors, {})
+        self.assertIn('Precipitation1h', [call.kwargs['params']['parameters'] for call in mock_get.call_args_list
+                                          if call.kwargs['params']['storedquery_id'] == HARMONIE.query_id][0])
+
+        first = result.forecast.forecasts[0]
+        self.assertEqual(first.time, FIRST_POINT)
+        self.assertEqual(first.temperature.value, 12.3)
+        self.assertEqual(result.sources['temperature'][0], ('edited',))
+
+        # Precipitation of the edited forecast is missing, so it comes from HARMONIE
+        self.assertEqual(first.precipitation_amount.value, 0.04)
+        self.assertEqual(first.precipitation_amount.unit, 'mm/h')
+        self.assertEqual(result.sources['precipitation_amount'][0], ('harmonie',))
+
+    @mock.patch('requests.get', side_effect=mock_model_response)
+    def test_snapped_request_reports_requested_coordinates(self, _):
+        http.set_coordinate_precision(grid=0.01)
+        try:
+            result = multimodel.forecast_by_coordinates(63.5612, 27.1934, models=(EDITED, HARMONIE))
+        finally:
+            http.set_coordinate_precision()
+
+        self.assertEqual((result.forecast.lat, result.forecast.lon), (63.5612, 27.1934))
+
+    @mock.patch('requests.get', side_effect=mock_model_response)
+    def test_failed_model_is_left_out(self, mock_get):
+        def harmonie_fails(*args, **kwargs):
+            if kwargs['params']['storedquery_id'] == HARMONIE.query_id:
+                raise ServerError(503, 'Service unavailable')
+            return mock_model_response(*args, **kwargs)
+
+        mock_get.side_effect = harmonie_fails
+        with self.assertLogs('fmi_weather_client.multimodel', 'WARNING'):
+            result = multimodel.forecast_by_coordinates(63.56, 27.19, models=(EDITED, HARMONIE))
+
+        self.assertEqual(list(result.errors), ['harmonie'])
+        self.assertEqual(result.errors['harmonie'].status_code, 503)
+        self.assertEqual(result.sources['temperature'][0], ('edited',))
+        self.assertNotIn('harmonie', {name for sources in result.sources.values() for row in sources for name in row})
+
+        with self.assertRaises(ServerError):
+            multimodel.forecast_by_coordinates(63.56, 27.19, models=(EDITED, HARMONIE), fail_fast=True)
+        with self.assertRaises(ServerError), self.assertLogs('fmi_weather_client.multimodel', 'WARNING'):
+            multimodel.forecast_by_coordinates(63.56, 27.19, models=(HARMONIE,))
+
+    @mock.patch('requests.get', side_effect=mock_model_response)
+    def test_fail_fast_does_not_wait_for_other_models(self, mock_get):
+        released = threading.Event()
+        self.addCleanup(released.set)
+
+        def edited_hangs(*args, **kwargs):
+            if kwargs['params']['storedquery_id'] == HARMONIE.query_id:
+                raise ServerError(503, 'Service unavailable')
+            released.wait(5)
+            return mock_model_response(*args, **kwargs)
+
+        mock_get.side_effect = edited_hangs
+        started = time.perf_counter()
+        with self.assertRaises(ServerError):
+            multimodel.forecast_by_coordinates(63.56, 27.19, models=(EDITED, HARMONIE), fail_fast=True)
+        self.assertLess(time.perf_counter() - started, 2)
+
+    @mock.patch('requests.get', side_effect=mock_model_response)
+    def test_feels_like_of_merged_values(self, _):
+        result = multimodel.forecast_by_place_name('Iisalmi', models=(EDITED,))
+        with mock.patch('requests.get', side_effect=test_data.mock_place_forecast_response):
+            expected = fmi_weather_client.forecast_by_place_name('Iisalmi', 1, 24)
+
+        first = result.forecast.forecasts[0]
+        self.assertEqual(first.time, expected.forecasts[0].time)
+        self.assertIsNotNone(first.feels_like.value)
+        self.assertEqual(first.feels_like, expected.forecasts[0].feels_like)
+        self.assertEqual(result.sources['feels_like'][0], ('edited',))
+
+    @mock.patch('requests.get', side_effect=mock_model_response)
+    def test_blend_by_place_name(self, _):
+        result = multimodel.forecast_by_place_name('Iisalmi', models=(EDITED, HARMONIE), rule=BLEND,
+                                                   weights={'harmonie': 3})
+        first = result.forecast.forecasts[0]
+        self.assertAlmostEqual(first.temperature.value, (12.3 + 3 * 6.8) / 4)
+        self.assertEqual(result.sources['temperature'][0], ('edited', 'harmonie'))
+        self.assertEqual(result.forecast.place, 'Iisalmi')
+
+    def test_priority_merge_on_union_of_times(self):
+        merged, sources = multimodel.merge({
+            'short': columns(TIMES[:2], temperature=[1.0, math.nan]),
+            'long': columns(TIMES[1:], temperature=[5.0, 6.0], wind_direction=[90.0, 180.0]),
+        })
+
+        self.assertEqual(merged.times, TIMES)
+        self.assertEqual(list(merged.values['temperature']), [1.0, 5.0, 6.0])
+        self.assertEqual(sources['temperature'], [('short',), ('long',), ('long',)])
+        self.assertTrue(math.isnan(merged.values['wind_direction'][0]))
+        self.assertEqual(sources['wind_direction'], [(), ('long',), ('long',)])
+
+    def test_blend(self):
+        merged, sources = multimodel.merge({
+            'a': columns(TIMES[:2], temperature=[1.0, 2.0], wind_direction=[350.0, 90.0]),
+            'b': columns(TIMES[:2], temperature=[3.0, math.nan], wind_direction=[30.0, math.nan]),
+        }, BLEND, {'a': 1, 'b': 3})
+
+        self.assertEqual(list(merged.values['temperature']), [2.5, 2.0])
+        self.assertAlmostEqual(merged.values['wind_direction'][0], 20.0, delta=0.5)
+        self.assertEqual(sources['temperature'], [('a', 'b'), ('a',)])
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            multimodel.merge({'a': columns(TIMES, temperature=[1.0, 2.0, 3.0])}, 'median')
+        with self.assertRaises(ValueError):
+            multimodel.merge({})
+        with self.assertRaises(ValueError):
+            multimodel.fetch_models([], lat=63.56, lon=27.19)
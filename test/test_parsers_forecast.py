@@ -1,4 +1,10 @@
 import unittest
+from unittest import mock
+
+import test.test_data as test_data
+from fmi_weather_client.models import RequestType
+from fmi_weather_client.parsers.executor import ParseExecutor
+from fmi_weather_client.parsers.forecast import clear_cache, get_parse_executor, parse_fmi_response, set_parse_cache
 from fmi_weather_client.parsers.forecast import _float_or_none
 from fmi_weather_client.parsers.forecast import _feels_like
 
@@ -37,3 +43,74 @@ class ForecastParserTest(unittest.TestCase):
         self.assertAlmostEqual(
             _feels_like({"WindSpeedMS": 5, "Humidity": 50, "Temperature": 25, "RadiationGlobal": 425}),
             24.523, places=3)
+
+
+class ParseCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        set_parse_cache()
+
+    def tearDown(self):
+        set_parse_cache(None)
+
+    def test_unchanged_body_is_not_parsed_again(self):
+        body = test_data.read('valid_place_forecast_response.xml')
+        # Only the creation time of the response differs
+        later = body.replace('timeStamp="2022-09-19T13:03:18Z"', 'timeStamp="2022-09-19T13:13:18Z"')
+        self.assertNotEqual(body, later)
+
+        first = parse_fmi_response(body, RequestType.FORECAST)
+        with mock.patch('xmltodict.parse') as mock_parse:
+            second = parse_fmi_response(later, RequestType.FORECAST)
+
+        mock_parse.assert_not_called()
+        self.assertEqual(first, second)
+
+    def test_cached_forecast_is_not_shared(self):
+        body = test_data.read('valid_place_forecast_response.xml')
+        first = parse_fmi_response(body, RequestType.FORECAST)
+        rows = len(first.forecasts)
+        first.forecasts.clear()
+
+        second = parse_fmi_response(body, RequestType.FORECAST)
+        self.assertIsNot(first, second)
+        self.assertEqual(len(second.forecasts), rows)
+
+    def test_cache_is_disabled_by_default(self):
+        set_parse_cache(None)
+        body = test_data.read('valid_place_forecast_response.xml')
+        parse_fmi_response(body, RequestType.FORECAST)
+        with mock.patch('xmltodict.parse', side_effect=ValueError) as mock_parse:
+            with self.assertRaises(ValueError):
+                parse_fmi_response(body, RequestType.FORECAST)
+        mock_parse.assert_called_once()
+
+    def test_changed_body_is_parsed(self):
+        body = test_data.read('valid_place_forecast_response.xml')
+        changed = body.replace('12.3', '13.3', 1)
+
+        first = parse_fmi_response(body, RequestType.FORECAST)
+        second = parse_fmi_response(changed, RequestType.FORECAST)
+        self.assertIsNot(first, second)
+        self.assertEqual(second.forecasts[0].temperature.value, 13.3)
+
+
+class ParseExecutorTest(unittest.TestCase):
+
+    def test_parse_in_worker_process(self):
+        body = test_data.read('valid_coordinate_forecast_response.xml')
+        inline = parse_fmi_response(body, RequestType.FORECAST)
+
+        clear_cache()
+        with ParseExecutor(max_workers=1, threshold=0) as executor:
+            self.assertIs(get_parse_executor(), executor)
+            offloaded = parse_fmi_response(body, RequestType.FORECAST)
+
+        self.assertIsNone(get_parse_executor())
+        self.assertEqual(repr(offloaded), repr(inline))
+
+    def test_threshold(self):
+        executor = ParseExecutor(max_workers=1, threshold=100)
+        self.assertFalse(executor.offloads('x' * 99))
+        self.assertTrue(executor.offloads('x' * 100))
+        executor.shutdown()
@@ -0,0 +1,65 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import test.test_data as test_data
+from fmi_weather_client import http
+from fmi_weather_client.models import FMIPlace, RequestType
+from fmi_weather_client.parsers.forecast import parse_fmi_response
+from fmi_weather_client.parsers.stream import iter_station_batches, iter_weather_data
+from fmi_weather_client.standin import StandInConfig, StandInServer, multipointcoverage
+
+OBSERVATION_FIELDS = http.OBSERVATION_PARAMETERS.split(',')
+
+
+def small_chunks(body, size=7):
+    return (body[offset:offset + size] for offset in range(0, len(body), size))
+
+
+class StreamParserTest(unittest.TestCase):
+
+    def test_same_rows_as_full_parser(self):
+        for filename, request_type in (('valid_coordinate_forecast_response.xml', RequestType.FORECAST),
+                                       ('valid_observation_by_place_response.xml', RequestType.OBSERVATION)):
+            body = test_data.read(filename)
+            forecast = parse_fmi_response(body, request_type)
+
+            for source in (body, body.encode('utf-8'), small_chunks(body.encode('utf-8'))):
+                rows = list(iter_weather_data(source, request_type))
+                self.assertEqual(repr([weather_data for _, weather_data in rows]), repr(forecast.forecasts))
+                self.assertTrue(all(place == FMIPlace(forecast.place, forecast.lat, forecast.lon)
+                                    for place, _ in rows))
+
+    def test_nan_rows_are_skipped(self):
+        rows = list(iter_weather_data(test_data.read('corner_nan_response.xml'), RequestType.FORECAST))
+        self.assertEqual(rows, [])
+
+    def test_multiple_stations(self):
+        stations = [FMIPlace('A', 60.1, 24.9), FMIPlace('B', 61.2, 25.3), FMIPlace('C', 62.3, 26.4)]
+        times = list(range(1742545800, 1742545800 + 600 * 5, 600))
+        body = multipointcoverage(stations, times, OBSERVATION_FIELDS, observation=True)
+
+        rows = list(iter_weather_data(small_chunks(body, 100), RequestType.OBSERVATION))
+        self.assertEqual(len(rows), 15)
+        self.assertEqual([place.name for place, _ in rows[::5]], ['A', 'B', 'C'])
+        self.assertEqual(rows[6][1].time.timestamp(), times[1])
+
+        batches = list(iter_station_batches(body, RequestType.OBSERVATION, batch_size=3))
+        self.assertEqual([(place.name, len(batch)) for place, batch in batches],
+                         [('A', 3), ('A', 2), ('B', 3), ('B', 2), ('C', 3), ('C', 2)])
+
+    def test_unexpected_fields(self):
+        body = test_data.read('valid_observation_by_place_response.xml')
+        with self.assertRaises(ValueError):
+            list(iter_weather_data(body, RequestType.OBSERVATION, OBSERVATION_FIELDS[::-1]))
+
+    def test_request_observation_stream(self):
+        with StandInServer(config=StandInConfig(stations=2)) as server:
+            http.set_base_url(server.url)
+            self.addCleanup(http.set_base_url)
+            end_time = datetime(2025, 3, 21, 12, 0, tzinfo=timezone.utc)
+            chunks = http.request_observation_stream(end_time - timedelta(days=7), end_time,
+                                                     bbox=(24.0, 60.0, 26.0, 61.0))
+            batches = list(iter_station_batches(chunks, RequestType.OBSERVATION, batch_size=10000))
+
+        self.assertEqual([len(batch) for _, batch in batches], [7 * 144 + 1, 7 * 144 + 1])
+        self.assertEqual(batches[1][0].name, 'Stand-in 2')
@@ -0,0 +1,127 @@
+import unittest
+from unittest import mock
+
+import test.test_data as test_data
+from fmi_weather_client.errors import ServerError
+from fmi_weather_client.models import Lookup, RequestType
+from fmi_weather_client.refresh import RefreshScheduler, next_update
+
+
+class MockClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class RefreshSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = MockClock(1663585200.0)
+        self.scheduler = RefreshScheduler(clock=self.clock)
+        self.lookup = Lookup(RequestType.FORECAST, 'Iisalmi')
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def test_next_update(self):
+        self.assertEqual(next_update(1663585200, RequestType.FORECAST), 1663585500)
+        self.assertEqual(next_update(1663585500, RequestType.FORECAST), 1663589100)
+        self.assertEqual(next_update(1663585200, RequestType.OBSERVATION), 1663585380)
+        self.assertEqual(next_update(1663585201, RequestType.WEATHER), 1663585800)
+
+    @mock.patch('requests.get', side_effect=test_data.mock_place_forecast_response)
+    def test_first_get_waits_and_later_gets_are_cached(self, mock_get):
+        forecast = self.scheduler.get(self.lookup)
+        self.assertEqual(forecast.place, 'Iisalmi')
+        self.assertIs(self.scheduler.get(self.lookup), forecast)
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(self.scheduler.watched(), {self.lookup})
+
+    @mock.patch('requests.get', side_effect=test_data.mock_place_forecast_response)
+    def test_refreshes_when_new_data_is_published(self, mock_get):
+        self.scheduler.get(self.lookup)
+        self.assertEqual(self.scheduler.run_pending(), 0)
+
+        self.clock.now = 1663585500
+        self.assertEqual(self.scheduler.run_pending(), 1)
+        self.scheduler.stop()
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(self.scheduler.state(self.lookup).expires_at, 1663589100)
+
+    @mock.patch('requests.get', side_effect=test_data.mock_place_forecast_response)
+    def test_unchanged_refresh(self, mock_get):
+        self.assertTrue(self.scheduler.state(self.lookup).changed)
+
+        self.clock.now = 1663585500
+        self.scheduler.run_pending()
+        self.scheduler.stop()
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertFalse(self.scheduler.state(self.lookup).changed)
+
+    def test_keeps_last_good_value_on_failure(self):
+        with mock.patch('requests.get', side_effect=test_data.mock_place_forecast_response):
+            forecast = self.scheduler.get(self.lookup)
+
+        self.clock.now = 1663585500
+        with mock.patch('requests.get', side_effect=test_data.mock_server_error_response) as mock_get:
+            self.assertIs(self.scheduler.get(self.lookup), forecast)
+            self.scheduler.stop()
+            self.assertEqual(mock_get.call_count, 1)
+
+        state = self.scheduler.state(self.lookup)
+        self.assertIs(state.value, forecast)
+        self.assertIsInstance(state.error, ServerError)
+
+    def test_retry_delay_is_capped_at_next_update(self):
+        with mock.patch('requests.get', side_effect=test_data.mock_place_forecast_response):
+            self.scheduler.get(self.lookup)
+
+        with mock.patch('requests.get', side_effect=test_data.mock_server_error_response) as mock_get:
+            # Retries after 30, 60, 120, ... seconds
+            for offset in (0, 30, 90, 210, 450, 930, 1890):
+                self.clock.now = 1663585500 + offset
+                self.assertEqual(self.scheduler.run_pending(), 1)
+                self.scheduler.stop()
+
+            # Next retry would be after 3840 seconds, but the next update is already after 3600 seconds
+            self.clock.now = 1663589099
+            self.assertEqual(self.scheduler.run_pending(), 0)
+            self.clock.now = 1663589100
+            self.assertEqual(self.scheduler.run_pending(), 1)
+            self.scheduler.stop()
+            self.assertEqual(mock_get.call_count, 8)
+
+    @mock.patch('requests.get', side_effect=test_data.mock_place_forecast_response)
+    def test_restart_after_stop(self, mock_get):
+        self.scheduler.get(self.lookup)
+        self.scheduler.stop()
+
+        # Refreshes after stop get a new executor
+        self.clock.now = 1663585500
+        self.assertEqual(self.scheduler.run_pending(), 1)
+        self.scheduler.stop()
+        self.assertEqual(self.scheduler.state(self.lookup).expires_at, 1663589100)
+
+        self.scheduler.start()
+        self.scheduler.watch(Lookup(RequestType.FORECAST, 'Kajaani'))
+        self.assertEqual(self.scheduler.get(Lookup(RequestType.FORECAST, 'Kajaani'), timeout=5).place, 'Iisalmi')
+        self.scheduler.stop()
+        self.assertEqual(mock_get.call_count, 3)
+
+    @mock.patch('requests.get', side_effect=test_data.mock_server_error_response)
+    def test_first_failure_is_raised(self, mock_get):
+        with self.assertRaises(ServerError):
+            self.scheduler.get(self.lookup)
+
+    @mock.patch('requests.get', side_effect=test_data.mock_observation_by_station_id_response)
+    def test_background_thread(self, mock_get):
+        lookup = Lookup(RequestType.OBSERVATION, 101794)
+        self.scheduler.start()
+        self.scheduler.watch(lookup)
+        weather = self.scheduler.get(lookup, timeout=5)
+        self.assertEqual(weather.place, 'Oulu Vihreäsaari satama')
+
+        self.scheduler.unwatch(lookup)
+        self.assertEqual(self.scheduler.watched(), set())
@@ -0,0 +1,71 @@
+import pickle
+import unittest
+from unittest import mock
+
+import fmi_weather_client
+import test.test_data as test_data
+from fmi_weather_client import serialization
+
+
+class SerializationTest(unittest.TestCase):
+
+    def setUp(self):
+        with mock.patch('requests.get', side_effect=test_data.mock_place_forecast_response):
+            self.forecast = fmi_weather_client.forecast_by_place_name('Iisalmi')
+            self.weather = fmi_weather_client.weather_by_place_name('Iisalmi')
+
+    def test_forecast_round_trip(self):
+        data = serialization.dumps(self.forecast)
+        # NaN values are never equal, so compare representations
+        self.assertEqual(repr(serialization.loads(data)), repr(self.forecast))
+        self.assertLess(len(data), len(pickle.dumps(self.forecast)))
+
+    def test_weather_round_trip(self):
+        data = serialization.dumps(self.weather)
+        self.assertEqual(repr(serialization.loads(data)), repr(self.weather))
+
+    def test_list_round_trip(self):
+        weathers = [self.weather, self.weather._replace(place='Kajaani', lat=64.2, lon=27.7)]
+        self.assertEqual(repr(serialization.loads(serialization.dumps(weathers))), repr(weathers))
+        self.assertEqual(serialization.loads(serialization.dumps([])), [])
+
+        with self.assertRaises(TypeError):
+            serialization.dumps([self.weather, self.forecast])
+
+    def test_columns_are_read_in_place(self):
+        data = bytearray(serialization.dumps(self.forecast))
+        columns = serialization.loads_columns(data)[0]
+        temperature = columns.values['temperature']
+
+        self.assertIsInstance(temperature, memoryview)
+        self.assertEqual(temperature[0], self.forecast.forecasts[0].temperature.value)
+        self.assertEqual(columns.units['temperature'], '°C')
+        self.assertEqual(columns.times[0], self.forecast.forecasts[0].time)
+
+        temperature[0] = -5.0
+        self.assertEqual(serialization.loads(data).forecasts[0].temperature.value, -5.0)
+
+    def test_invalid_data(self):
+        data = serialization.dumps(self.forecast)
+        with self.assertRaises(ValueError):
+            serialization.loads(b'FMIB')
+        with self.assertRaises(ValueError):
+            serialization.loads(b'XXXX' + data[4:])
+        with self.assertRaises(ValueError):
+            serialization.loads(data[:4] + bytes([serialization.VERSION + 1]) + data[5:])
+
+    def test_truncated_data(self):
+        data = serialization.dumps([self.forecast, self.forecast])
+        for length in range(len(data)):
+            with self.assertRaises(ValueError):
+                serialization.loads(data[:length])
+        with self.assertRaises(ValueError):
+            serialization.loads(data[:4] + data[4:5] + bytes([99]) + data[6:])
+
+    def test_big_endian_host(self):
+        little = serialization.dumps(self.forecast)
+        with mock.patch.object(serialization, '_SWAP', True):
+            swapped = serialization.dumps(self.forecast)
+            decoded = serialization.loads(swapped)
+        self.assertNotEqual(swapped, little)
+        self.assertEqual(repr(decoded), repr(self.forecast))
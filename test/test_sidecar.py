@@ -0,0 +1,138 @@
+import json
+import os
+import socket
+import tempfile
+import unittest
+import urllib.error
+import urllib.request
+from contextlib import nullcontext
+from unittest import mock
+
+import requests
+
+import test.test_data as test_data
+from fmi_weather_client.errors import ClientError
+from fmi_weather_client.models import Lookup, RequestType
+from fmi_weather_client.sidecar import SidecarCache, SidecarServer
+
+
+def get_json(url):
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as err:
+        return err.code, json.loads(err.read())
+
+
+@mock.patch('requests.get', side_effect=test_data.mock_place_forecast_response)
+class SidecarServerTest(unittest.TestCase):
+
+    def test_weather_is_cached(self, mock_get):
+        with SidecarServer() as server:
+            status, weather = get_json(f'{server.url}/weather?place=Iisalmi')
+            get_json(f'{server.url}/weather?place=Iisalmi')
+            _, stats = get_json(f'{server.url}/stats')
+
+        self.assertEqual(status, 200)
+        self.assertEqual(weather['place'], 'Iisalmi')
+        self.assertEqual(weather['data']['temperature'], {'value': 12.0, 'unit': '°C'})
+        self.assertIsNone(weather['data']['wind_max']['value'])
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['upstream'], 1)
+        self.assertEqual(stats['entries'], 1)
+
+    def test_forecast(self, mock_get):
+        with SidecarServer() as server:
+            status, forecast = get_json(f'{server.url}/forecast?lat=63.56&lon=27.19&timestep_hours=1&forecast_points=2')
+
+        self.assertEqual(status, 200)
+        self.assertEqual(len(forecast['forecasts']), 12)
+        self.assertEqual(forecast['forecasts'][0]['time'], '2022-09-19T09:20:00+00:00')
+        self.assertEqual(mock_get.call_args.kwargs['params']['latlon'], '63.56,27.19')
+
+    def test_invalid_requests(self, mock_get):
+        with SidecarServer() as server:
+            self.assertEqual(get_json(f'{server.url}/weather?lat=abc&lon=1')[0], 400)
+            self.assertEqual(get_json(f'{server.url}/weather')[0], 400)
+            self.assertEqual(get_json(f'{server.url}/unknown')[0], 404)
+
+        mock_get.assert_not_called()
+
+    def test_unix_socket(self, mock_get):
+        path = os.path.join(tempfile.mkdtemp(), 'sidecar.sock')
+        with SidecarServer(unix_socket=path):
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.connect(path)
+                client.sendall(b'GET /weather?place=Iisalmi HTTP/1.0\r\n\r\n')
+                response = b''
+                while chunk := client.recv(65536):
+                    response += chunk
+
+        self.assertTrue(response.startswith(b'HTTP/1.0 200'))
+        self.assertEqual(json.loads(response.split(b'\r\n\r\n', 1)[1])['place'], 'Iisalmi')
+        self.assertFalse(os.path.exists(path))
+
+    def test_unix_socket_url(self, mock_get):
+        path = os.path.join(tempfile.mkdtemp(), 'sidecar.sock')
+        with SidecarServer(unix_socket=path) as server:
+            self.assertEqual(server.url, 'http+unix://' + path.replace('/', '%2F'))
+
+    def test_upstream_errors(self, mock_get):
+        errors = {
+            requests.ConnectionError('refused'): 502,
+            requests.Timeout('timed out'): 502,
+            ValueError('could not convert string to float'): 502,
+            RuntimeError('bug'): 500,
+        }
+        with SidecarServer() as server:
+            for error, expected in errors.items():
+                server.cache.clear()
+                with mock.patch('fmi_weather_client.sidecar.fetch', side_effect=error):
+                    with self.assertLogs('fmi_weather_client.sidecar', 'ERROR') if expected == 500 else nullcontext():
+                        status, body = get_json(f'{server.url}/weather?place=Iisalmi')
+                self.assertEqual(status, expected)
+                self.assertIn('error', body)
+
+
+class SidecarCacheTest(unittest.TestCase):
+
+    @mock.patch('fmi_weather_client.sidecar.fetch', side_effect=lambda lookup: lookup.location)
+    def test_rate_limit(self, mock_fetch):
+        clock = mock.Mock(return_value=1663585200.0)
+        cache = SidecarCache(rate_limit=1, clock=clock)
+        self.assertEqual(cache.get(Lookup(RequestType.WEATHER, 'Iisalmi')), 'Iisalmi')
+
+        # The expired value is used while throttled
+        clock.return_value += 3600
+        self.assertEqual(cache.get(Lookup(RequestType.WEATHER, 'Iisalmi')), 'Iisalmi')
+        with self.assertRaises(ClientError) as context:
+            cache.get(Lookup(RequestType.WEATHER, 'Kajaani'))
+
+        self.assertEqual(context.exception.status_code, 429)
+        self.assertEqual(mock_fetch.call_count, 1)
+        self.assertEqual(cache.stats().throttled, 2)
+
+    @mock.patch('fmi_weather_client.sidecar.fetch', side_effect=lambda lookup: lookup.location)
+    def test_rate_limit_below_one_per_second(self, mock_fetch):
+        with mock.patch('time.monotonic', return_value=100.0) as monotonic:
+            cache = SidecarCache(rate_limit=0.5)
+            self.assertEqual(cache.get(Lookup(RequestType.WEATHER, 'Iisalmi')), 'Iisalmi')
+            with self.assertRaises(ClientError):
+                cache.get(Lookup(RequestType.WEATHER, 'Kajaani'))
+
+            monotonic.return_value += 2
+            self.assertEqual(cache.get(Lookup(RequestType.WEATHER, 'Kajaani')), 'Kajaani')
+
+        self.assertEqual(mock_fetch.call_count, 2)
+
+    @mock.patch('fmi_weather_client.sidecar.fetch', side_effect=lambda lookup: lookup.location)
+    def test_max_entries(self, mock_fetch):
+        cache = SidecarCache(max_entries=2)
+        for place in ('A', 'B', 'C'):
+            cache.get(Lookup(RequestType.WEATHER, place))
+
+        self.assertEqual(cache.stats().entries, 2)
+        cache.get(Lookup(RequestType.WEATHER, 'C'))
+        self.assertEqual(mock_fetch.call_count, 3)
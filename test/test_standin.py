@@ -0,0 +1,87 @@
+import unittest
+
+import fmi_weather_client
+from fmi_weather_client import benchmark, http
+from fmi_weather_client.errors import ClientError, ServerError
+from fmi_weather_client.standin import StandInConfig, StandInServer
+
+
+class StandInServerTest(unittest.TestCase):
+
+    def start(self, config=StandInConfig()):
+        server = StandInServer(config=config).start()
+        http.set_base_url(server.url)
+        self.addCleanup(http.set_base_url)
+        self.addCleanup(server.stop)
+        return server
+
+    def test_forecast(self):
+        self.start()
+        forecast = fmi_weather_client.forecast_by_coordinates(60.17, 24.94, 1, 24)
+        self.assertEqual(forecast.place, 'Stand-in')
+        self.assertEqual(len(forecast.forecasts), 24)
+        self.assertEqual(forecast.forecasts[1].time.timestamp() - forecast.forecasts[0].time.timestamp(), 3600)
+        self.assertIsNotNone(forecast.forecasts[0].temperature.value)
+
+    def test_weather_and_forecast(self):
+        self.start()
+        result = fmi_weather_client.weather_and_forecast_by_coordinates(60.17, 24.94, 24, 4)
+        weather = fmi_weather_client.weather_by_coordinates(60.17, 24.94)
+        forecast = fmi_weather_client.forecast_by_coordinates(60.17, 24.94, 24, 4)
+
+        self.assertEqual(result.weather.data.time, weather.data.time)
+        self.assertIsNotNone(result.weather.data.temperature.value)
+        self.assertEqual([f.time for f in result.forecast.forecasts], [f.time for f in forecast.forecasts])
+        self.assertEqual(repr(result.forecast.forecasts), repr(forecast.forecasts))
+
+    def test_configured_size(self):
+        self.start(StandInConfig(points=500))
+        forecast = fmi_weather_client.forecast_by_place_name('Helsinki', 1, 4)
+        self.assertEqual(forecast.place, 'Helsinki')
+        self.assertEqual(len(forecast.forecasts), 500)
+
+    def test_weather_and_observation(self):
+        self.start()
+        weather = fmi_weather_client.weather_by_place_name('Helsinki')
+        observation = fmi_weather_client.observation_by_station_id(101004)
+        self.assertEqual(weather.place, 'Helsinki')
+        self.assertEqual(observation.place, 'Station 101004')
+        self.assertIsNotNone(observation.data.wind_gust.value)
+
+    def test_error_cases(self):
+        self.start()
+        with self.assertRaises(ClientError):
+            fmi_weather_client.weather_by_place_name('Unknown')
+        with self.assertRaises(ClientError):
+            fmi_weather_client.weather_by_coordinates(160.22, 124.83)
+        with self.assertRaises(ClientError):
+            fmi_weather_client.observation_by_station_id(0)
+
+    def test_error_rate(self):
+        server = self.start(StandInConfig(error_rate=1.0))
+        with self.assertRaises(ServerError):
+            fmi_weather_client.weather_by_coordinates(60.17, 24.94)
+        self.assertEqual(server.stats().errors, 1)
+
+    def test_throttling(self):
+        server = self.start(StandInConfig(rate_limit=1))
+        fmi_weather_client.weather_by_coordinates(60.17, 24.94)
+        with self.assertRaises(ClientError) as context:
+            fmi_weather_client.weather_by_coordinates(60.17, 24.94)
+        self.assertEqual(context.exception.status_code, 429)
+        self.assertEqual(server.stats().throttled, 1)
+
+    def test_benchmark(self):
+        server = self.start(StandInConfig(latency=0.01))
+        result = benchmark.run(*benchmark.create_calls('weather', 20), 4)
+        self.assertEqual(result.requests, 20)
+        # Every call reaches the server, none is merged with another one in flight
+        self.assertEqual(server.stats().requests, 20)
+        self.assertEqual(result.errors, 0)
+        self.assertGreaterEqual(result.p50, 0.01)
+        self.assertLessEqual(result.p95, result.p99)
+
+    def test_percentile(self):
+        self.assertEqual(benchmark.percentile([], 0.5), 0.0)
+        self.assertEqual(benchmark.percentile([1, 2, 3, 4], 0.5), 2)
+        self.assertEqual(benchmark.percentile([1, 2, 3, 4], 0.99), 4)
@@ -0,0 +1,77 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest import mock
+
+import fmi_weather_client
+import test.test_data as test_data
+from fmi_weather_client.errors import ClientError
+
+
+def slow_fetch(lookup):
+    # Later locations finish first
+    time.sleep(0.05 * (3 - lookup.location))
+    if lookup.location == 0:
+        raise ClientError(400, "Invalid station")
+    return lookup.location
+
+
+class StreamingTest(unittest.TestCase):
+
+    def collect(self, stream):
+        async def consume():
+            return [item async for item in stream]
+        return asyncio.run(consume())
+
+    @mock.patch('requests.get', side_effect=test_data.mock_coordinate_forecast_response)
+    def test_stream_weather(self, mock_get):
+        locations = [(67.58, 29.74), (67.59, 29.75), 'Sauoiva']
+        results = self.collect(fmi_weather_client.stream_weather(locations, concurrency=2))
+        self.assertCountEqual([location for location, _ in results], locations)
+        self.assertTrue(all(weather.place == 'Sauoiva' for _, weather in results))
+        self.assertEqual(mock_get.call_count, 3)
+
+    @mock.patch('requests.get', side_effect=test_data.mock_coordinate_forecast_response)
+    def test_stream_forecasts(self, mock_get):
+        results = self.collect(fmi_weather_client.stream_forecasts([(67.58, 29.74)], 1, 12))
+        self.assertEqual(len(results[0][1].forecasts), 12)
+        self.assertEqual(mock_get.call_args.kwargs['params']['timestep'], 60)
+
+    @mock.patch('fmi_weather_client.streaming.fetch', side_effect=slow_fetch)
+    def test_completion_order_and_errors(self, mock_fetch):
+        results = self.collect(fmi_weather_client.stream_observations([0, 1, 2], concurrency=3))
+        self.assertEqual([location for location, _ in results], [2, 1, 0])
+        self.assertEqual(results[0][1], 2)
+        self.assertIsInstance(results[2][1], ClientError)
+
+    def test_backpressure_and_cancellation(self):
+        fetched = []
+        lock = threading.Lock()
+
+        def fetch(lookup):
+            with lock:
+                fetched.append(lookup.location)
+            return lookup.location
+
+        async def consume():
+            stream = fmi_weather_client.stream_observations(range(100), concurrency=2)
+            received = []
+            async for location, _ in stream:
+                received.append(location)
+                await asyncio.sleep(0.01)
+                if len(received) == 3:
+                    break
+            await stream.aclose()
+            return received
+
+        with mock.patch('fmi_weather_client.streaming.fetch', side_effect=fetch):
+            received = asyncio.run(consume())
+
+        self.assertEqual(len(received), 3)
+        # Slow consumer keeps the workers waiting, so only a few more are fetched
+        self.assertLess(len(fetched), 10)
+
+    def test_invalid_concurrency(self):
+        with self.assertRaises(ValueError):
+            self.collect(fmi_weather_client.stream_weather([(60.1, 24.9)], concurrency=0))
@@ -0,0 +1,124 @@
+import asyncio
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+from fmi_weather_client.errors import ClientError
+from fmi_weather_client.models import Lookup, RequestType
+from fmi_weather_client.subscriptions import SubscriptionHub
+
+IISALMI = Lookup(RequestType.FORECAST, 'Iisalmi')
+KAJAANI = Lookup(RequestType.FORECAST, 'Kajaani')
+
+
+def fake_fetch(lookup):
+    if lookup.location == 'Unknown':
+        raise ClientError(400, "Unknown place")
+    return lookup.location
+
+
+@mock.patch('fmi_weather_client.subscriptions.fetch', side_effect=fake_fetch)
+class SubscriptionHubTest(unittest.TestCase):
+
+    def test_subscribers_share_polling(self, mock_fetch):
+        fast, slow = [], []
+
+        async def run():
+            async with SubscriptionHub() as hub:
+                hub.subscribe(IISALMI, 0.05, lambda lookup, value: fast.append(value))
+                hub.subscribe(IISALMI, timedelta(hours=1), lambda lookup, value: slow.append(value))
+                self.assertEqual(hub.polled(), {IISALMI})
+                await asyncio.sleep(0.22)
+
+        asyncio.run(run())
+        # Both subscribers get every poll at the tightest interval
+        self.assertEqual(fast, slow)
+        self.assertGreaterEqual(len(fast), 3)
+        self.assertEqual(mock_fetch.call_count, len(fast))
+
+    def test_last_subscriber_stops_polling(self, mock_fetch):
+        received = []
+
+        async def run():
+            async with SubscriptionHub() as hub:
+                first = hub.subscribe(IISALMI, 0.05, lambda lookup, value: received.append(lookup))
+                second = hub.subscribe(IISALMI, 0.05, lambda lookup, value: received.append(lookup))
+                hub.subscribe(KAJAANI, 60, lambda lookup, value: received.append(lookup))
+                await asyncio.sleep(0.01)
+
+                first.cancel()
+                self.assertEqual(hub.polled(), {IISALMI, KAJAANI})
+                second.cancel()
+                self.assertEqual(hub.polled(), {KAJAANI})
+                self.assertEqual(hub.subscriptions(), 1)
+
+                calls = mock_fetch.call_count
+                await asyncio.sleep(0.12)
+                self.assertEqual(mock_fetch.call_count, calls)
+
+        asyncio.run(run())
+        self.assertEqual(received.count(IISALMI), 2)
+        self.assertEqual(received.count(KAJAANI), 1)
+
+    def test_new_subscriber_gets_latest_value(self, mock_fetch):
+        received = []
+
+        async def callback(lookup, value):
+            received.append(value)
+
+        async def run():
+            async with SubscriptionHub() as hub:
+                hub.subscribe(IISALMI, 60, callback)
+                await asyncio.sleep(0.01)
+                hub.subscribe(IISALMI, 60, callback)
+                await asyncio.sleep(0.01)
+
+        asyncio.run(run())
+        self.assertEqual(received, ['Iisalmi', 'Iisalmi'])
+        self.assertEqual(mock_fetch.call_count, 1)
+
+    def test_restart_after_close(self, mock_fetch):
+        received = []
+
+        async def run():
+            hub = SubscriptionHub()
+            await hub.start()
+            hub.subscribe(IISALMI, 60, lambda lookup, value: received.append(value))
+            await asyncio.sleep(0.01)
+            await hub.close()
+
+            hub.subscribe(KAJAANI, 60, lambda lookup, value: received.append(value))
+            async with hub:
+                await asyncio.sleep(0.01)
+
+        asyncio.run(run())
+        # Iisalmi is not due yet, Kajaani is polled on the new executor
+        self.assertEqual(received, ['Iisalmi', 'Kajaani'])
+
+    def test_errors_are_delivered(self, mock_fetch):
+        received = []
+
+        async def run():
+            async with SubscriptionHub() as hub:
+                hub.subscribe(Lookup(RequestType.FORECAST, 'Unknown'), 60, lambda lookup, value: received.append(value))
+                await asyncio.sleep(0.01)
+
+        asyncio.run(run())
+        self.assertIsInstance(received[0], ClientError)
+
+    def test_many_subscriptions(self, mock_fetch):
+        received = []
+
+        async def run():
+            async with SubscriptionHub() as hub:
+                for idx in range(20000):
+                    hub.subscribe(Lookup(RequestType.FORECAST, f'Place {idx % 100}'), 60,
+                                  lambda lookup, value: received.append(value))
+                for _ in range(100):
+                    if len(received) == 20000:
+                        break
+                    await asyncio.sleep(0.05)
+
+        asyncio.run(run())
+        self.assertEqual(mock_fetch.call_count, 100)
+        self.assertEqual(len(received), 20000)
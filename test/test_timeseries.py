@@ -0,0 +1,139 @@
+import math
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import fmi_weather_client
+import test.test_data as test_data
+from fmi_weather_client import timeseries
+from fmi_weather_client.models import RequestType
+from fmi_weather_client.timeseries import TimeSeriesStore
+
+FIRST_POINT = datetime(2022, 9, 19, 9, 20, tzinfo=timezone.utc)
+
+
+class TimeSeriesStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        with mock.patch('requests.get', side_effect=test_data.mock_place_forecast_response):
+            self.forecast = fmi_weather_client.forecast_by_place_name('Iisalmi')
+
+    def test_round_trip(self):
+        store = TimeSeriesStore(self.path)
+        store.append(RequestType.FORECAST, 'Iisalmi', self.forecast)
+
+        result = store.query(RequestType.FORECAST, 'iisalmi')
+        self.assertEqual(repr(result), repr(self.forecast))
+        self.assertIsNone(store.query(RequestType.FORECAST, 'Kajaani'))
+        self.assertIsNone(store.query(RequestType.OBSERVATION, 'Iisalmi'))
+
+    def test_time_range(self):
+        store = TimeSeriesStore(self.path)
+        store.append(RequestType.FORECAST, 'Iisalmi', self.forecast)
+
+        columns = store.query_columns(RequestType.FORECAST, 'Iisalmi', start=FIRST_POINT + timedelta(minutes=10),
+                                      end=FIRST_POINT + timedelta(minutes=30), fields=['temperature'])
+        self.assertEqual(columns.times, [FIRST_POINT + timedelta(minutes=10), FIRST_POINT + timedelta(minutes=20)])
+        self.assertEqual(list(columns.values), ['temperature'])
+        self.assertEqual(list(columns.values['temperature']),
+                         [row.temperature.value for row in self.forecast.forecasts[1:3]])
+
+    def test_later_writes_win(self):
+        store = TimeSeriesStore(self.path)
+        store.append(RequestType.FORECAST, 'Iisalmi', self.forecast)
+        first = self.forecast.forecasts[0]
+        update = first._replace(temperature=first.temperature._replace(value=20.0),
+                                humidity=first.humidity._replace(value=None))
+        store.append(RequestType.FORECAST, 'Iisalmi', self.forecast._replace(forecasts=[update]))
+
+        for _ in range(2):
+            result = store.query(RequestType.FORECAST, 'Iisalmi')
+            self.assertEqual(len(result.forecasts), len(self.forecast.forecasts))
+            self.assertEqual(result.forecasts[0].temperature.value, 20.0)
+            # Missing values do not overwrite stored ones
+            self.assertEqual(result.forecasts[0].humidity, first.humidity)
+            store.compact()
+
+    def test_compaction(self):
+        store = TimeSeriesStore(self.path, compact_after=1)
+        for _ in range(3):
+            store.append(RequestType.FORECAST, 'Iisalmi', self.forecast)
+
+        path = os.path.join(self.path, 'forecast', 'place-iisalmi', 'temperature.f64')
+        self.assertEqual(os.path.getsize(path), len(self.forecast.forecasts) * 16)
+        self.assertEqual(repr(store.query(RequestType.FORECAST, 'Iisalmi')), repr(self.forecast))
+
+    def test_retention(self):
+        clock = mock.Mock(return_value=datetime(2022, 9, 19, 11, 10, tzinfo=timezone.utc).timestamp())
+        store = TimeSeriesStore(self.path, forecast_retention=timedelta(minutes=30), clock=clock)
+        store.append(RequestType.FORECAST, 'Iisalmi', self.forecast)
+
+        result = store.query(RequestType.FORECAST, 'Iisalmi')
+        self.assertEqual([row.time for row in result.forecasts], [row.time for row in self.forecast.forecasts[-4:]])
+
+        store.compact()
+        path = os.path.join(self.path, 'forecast', 'place-iisalmi', 'temperature.f64')
+        self.assertEqual(os.path.getsize(path), 4 * 16)
+
+    def test_downsample(self):
+        store = TimeSeriesStore(self.path)
+        store.append(RequestType.FORECAST, 'Iisalmi', self.forecast)
+
+        columns = store.query_columns(RequestType.FORECAST, 'Iisalmi', step=timedelta(hours=1))
+        rows = self.forecast.forecasts
+        self.assertEqual(columns.times, [datetime(2022, 9, 19, hour, tzinfo=timezone.utc) for hour in (9, 10, 11)])
+        self.assertAlmostEqual(columns.values['temperature'][0],
+                               sum(row.temperature.value for row in rows[:4]) / 4)
+        self.assertTrue(math.isnan(columns.values['symbol'][0]))
+        self.assertEqual(columns.values['symbol'][1], 31.0)
+
+    def test_downsample_wind_direction(self):
+        columns = timeseries.ForecastColumns('Iisalmi', 63.56, 27.19, [FIRST_POINT, FIRST_POINT + timedelta(minutes=10)],
+                                             {'wind_direction': '°'}, {'wind_direction': [350.0, 30.0]})
+        result = timeseries.downsample(columns, timedelta(hours=1))
+        self.assertAlmostEqual(result.values['wind_direction'][0], 10.0)
+
+        with self.assertRaises(ValueError):
+            timeseries.downsample(columns, timedelta(0))
+
+
+class RecordTest(unittest.TestCase):
+
+    def setUp(self):
+        self.store = TimeSeriesStore(tempfile.mkdtemp())
+        timeseries.set_store(self.store)
+
+    def tearDown(self):
+        timeseries.set_store(None)
+
+    @mock.patch('requests.get', side_effect=test_data.mock_observation_by_station_id_response)
+    def test_observations_are_recorded(self, _):
+        fmi_weather_client.observation_by_station_id(101004)
+
+        result = self.store.query(RequestType.OBSERVATION, 101004)
+        self.assertEqual(len(result.forecasts), 1)
+        self.assertEqual(result.forecasts[0].temperature.value, -7.2)
+
+    @mock.patch('requests.get', side_effect=test_data.mock_coordinate_forecast_response)
+    def test_forecasts_are_recorded(self, _):
+        forecast = fmi_weather_client.forecast_by_coordinates(63.56, 27.19)
+        self.assertEqual(repr(self.store.query(RequestType.FORECAST, (63.56, 27.19))), repr(forecast))
+
+    @mock.patch('requests.get', side_effect=test_data.mock_coordinate_forecast_response)
+    def test_failed_writes_do_not_fail_lookups(self, _):
+        with mock.patch.object(self.store, 'append', side_effect=OSError("No space left on device")):
+            with self.assertLogs('fmi_weather_client.timeseries', 'WARNING'):
+                self.assertIsNotNone(fmi_weather_client.forecast_by_coordinates(63.56, 27.19))
+
+    @mock.patch('requests.get', side_effect=test_data.mock_coordinate_forecast_response)
+    def test_corrupted_series_does_not_fail_lookups(self, _):
+        fmi_weather_client.forecast_by_coordinates(63.56, 27.19)
+        meta = os.path.join(self.store.path, 'forecast', 'latlon-63.56%2C27.19', 'meta.json')
+        with open(meta, 'w', encoding='utf-8') as file:
+            file.write('{"units": ')
+
+        with self.assertLogs('fmi_weather_client.timeseries', 'WARNING'):
+            self.assertIsNotNone(fmi_weather_client.forecast_by_coordinates(63.56, 27.19))
@@ -0,0 +1,71 @@
+import math
+import unittest
+from array import array
+from unittest import mock
+
+import fmi_weather_client
+import test.test_data as test_data
+from fmi_weather_client import units
+from fmi_weather_client.columns import to_columns
+from fmi_weather_client.units import IMPERIAL, METRIC, Conversion
+
+
+class UnitsTest(unittest.TestCase):
+
+    def setUp(self):
+        with mock.patch('requests.get', side_effect=test_data.mock_place_forecast_response):
+            self.forecast = fmi_weather_client.forecast_by_place_name('Iisalmi')
+            self.weather = fmi_weather_client.weather_by_place_name('Iisalmi')
+
+    def test_imperial_forecast(self):
+        forecast = units.convert(self.forecast, IMPERIAL)
+        original = self.forecast.forecasts[0]
+        row = forecast.forecasts[0]
+
+        self.assertEqual(len(forecast.forecasts), len(self.forecast.forecasts))
+        self.assertEqual(row.time, original.time)
+        self.assertEqual(row.temperature.unit, '°F')
+        self.assertAlmostEqual(row.temperature.value, original.temperature.value * 1.8 + 32)
+        self.assertEqual(row.wind_speed.unit, 'mph')
+        self.assertAlmostEqual(row.wind_speed.value, original.wind_speed.value * 2.2369363)
+        self.assertEqual(row.pressure.unit, 'inHg')
+        self.assertEqual(row.feels_like.unit, '°F')
+
+        # Fields without a conversion keep their values
+        self.assertIs(row.humidity, original.humidity)
+        self.assertIsNone(row.wind_max.value)
+        self.assertEqual(row.wind_max.unit, 'mph')
+        self.assertTrue(math.isnan(row.symbol.value))
+
+    def test_weather_and_lists(self):
+        weather = units.convert(self.weather, IMPERIAL)
+        self.assertEqual(weather.place, 'Iisalmi')
+        self.assertEqual(weather.data.temperature.unit, '°F')
+
+        converted = units.convert([self.weather, self.forecast], IMPERIAL)
+        self.assertEqual(repr(converted), repr([weather, units.convert(self.forecast, IMPERIAL)]))
+
+    def test_columns_match_rows(self):
+        columns = units.convert(to_columns(self.forecast), IMPERIAL)
+        expected = to_columns(units.convert(self.forecast, IMPERIAL))
+
+        self.assertEqual(columns.units, expected.units)
+        self.assertEqual(set(columns.values), set(expected.values))
+        self.assertIsInstance(columns.values['temperature'], array)
+        for field, column in columns.values.items():
+            for value, expected_value in zip(column, expected.values[field]):
+                if not math.isnan(expected_value):
+                    self.assertAlmostEqual(value, expected_value)
+
+    def test_custom_profile(self):
+        profile = {'m/s': Conversion('km/h', 3.6)}
+        row = units.convert(self.forecast, profile).forecasts[0]
+        self.assertEqual(row.wind_gust.unit, 'km/h')
+        self.assertAlmostEqual(row.wind_gust.value, self.forecast.forecasts[0].wind_gust.value * 3.6)
+        self.assertEqual(row.temperature, self.forecast.forecasts[0].temperature)
+
+        self.assertEqual(repr(units.convert(self.forecast, METRIC)), repr(self.forecast))
+
+    def test_converting_twice_keeps_units(self):
+        once = units.convert(self.forecast, IMPERIAL)
+        self.assertEqual(repr(units.convert(once, IMPERIAL)), repr(once))
@@ -0,0 +1,151 @@
+import unittest
+from array import array
+from datetime import date, datetime, timedelta, timezone
+from unittest import mock
+
+import fmi_weather_client
+import test.test_data as test_data
+from fmi_weather_client import http
+from fmi_weather_client.columns import ForecastColumns, from_columns, to_columns
+from fmi_weather_client.standin import StandInServer
+from fmi_weather_client.views import ForecastView, interpolate, subsample
+
+# Time of the first point in the forecast test responses
+FIRST_POINT = datetime(2022, 9, 19, 9, 20, tzinfo=timezone.utc)
+
+
+class ForecastViewTest(unittest.TestCase):
+
+    @mock.patch('requests.get', side_effect=test_data.mock_place_forecast_response)
+    def test_variants_share_one_request(self, mock_get):
+        view = ForecastView(clock=lambda: FIRST_POINT)
+        six_hourly = view.forecast_by_place_name('Iisalmi', 6, 2)
+        hourly = view.forecast_by_place_name('Iisalmi', 1, 4)
+        two_hourly = view.forecast_by_place_name('Iisalmi', 2, 1)
+
+        # Points are on the timestep grid of FMI, e.g. full hours. The next six hour point, 12:00, is not in the response.
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual([f.time.timestamp() for f in hourly.forecasts], [1663581600, 1663585200])
+        self.assertEqual(six_hourly.forecasts, [])
+        self.assertEqual(repr(two_hourly.forecasts), repr(hourly.forecasts[:1]))
+        self.assertEqual(hourly.forecasts[1].temperature.value, 12.0)
+
+    @mock.patch('requests.get', side_effect=test_data.mock_coordinate_forecast_response)
+    def test_snapped_request_reports_requested_coordinates(self, _):
+        view = ForecastView(clock=lambda: FIRST_POINT + timedelta(minutes=5))
+        http.set_coordinate_precision(grid=0.01)
+        try:
+            forecast = view.forecast_by_coordinates(67.583988, 29.742731, 1, 2)
+            weather = view.weather_by_coordinates(67.583988, 29.742731)
+        finally:
+            http.set_coordinate_precision()
+
+        self.assertEqual((forecast.lat, forecast.lon), (67.583988, 29.742731))
+        self.assertEqual((weather.lat, weather.lon), (67.583988, 29.742731))
+
+    def test_same_points_as_forecast_request(self):
+        server = StandInServer().start()
+        http.set_base_url(server.url)
+        self.addCleanup(http.set_base_url)
+        self.addCleanup(server.stop)
+
+        view = ForecastView()
+        for timestep_hours, forecast_points in ((24, 4), (3, 5), (1, 3)):
+            expected = fmi_weather_client.forecast_by_coordinates(60.17, 24.94, timestep_hours, forecast_points)
+            forecast = view.forecast_by_coordinates(60.17, 24.94, timestep_hours, forecast_points)
+            self.assertEqual([f.time for f in forecast.forecasts], [f.time for f in expected.forecasts])
+
+    @mock.patch('requests.get', side_effect=test_data.mock_place_forecast_response)
+    def test_longer_variant_refetches(self, mock_get):
+        view = ForecastView(clock=lambda: FIRST_POINT)
+        view.forecast_by_place_name('Iisalmi', 1, 4)
+        view.forecast_by_place_name('Iisalmi', 24, 2)
+        view.forecast_by_place_name('Iisalmi', 1, 4)
+
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(mock_get.call_args.kwargs['params']['timestep'], 60)
+
+    @mock.patch('requests.get', side_effect=test_data.mock_place_forecast_response)
+    def test_expired_series_refetches(self, mock_get):
+        view = ForecastView(max_age=timedelta(0), clock=lambda: FIRST_POINT)
+        view.forecast_by_place_name('Iisalmi', 1, 2)
+        view.forecast_by_place_name('Iisalmi', 1, 2)
+
+        self.assertEqual(mock_get.call_count, 2)
+
+    @mock.patch('requests.get', side_effect=test_data.mock_coordinate_forecast_response)
+    def test_daily_summaries(self, mock_get):
+        view = ForecastView(clock=lambda: FIRST_POINT)
+        summaries = view.daily_by_coordinates(67.583988, 29.742731, 1)
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(len(summaries), 1)
+        self.assertEqual(summaries[0].date, date(2022, 9, 19))
+        self.assertEqual(summaries[0].temperature_min.value, 6.6)
+        self.assertEqual(summaries[0].temperature_max.value, 6.8)
+        self.assertEqual(summaries[0].temperature_max.unit, '°C')
+        self.assertEqual(summaries[0].precipitation_amount.unit, 'mm')
+        self.assertEqual(summaries[0].wind_gust_max.value, 9.6)
+        self.assertIsNone(summaries[0].precipitation_amount.value)
+
+    @mock.patch('requests.get', side_effect=test_data.mock_place_forecast_response)
+    def test_series_starts_at_current_hour(self, mock_get):
+        view = ForecastView(clock=lambda: FIRST_POINT)
+        view.forecast_by_place_name('Iisalmi', 1, 4)
+
+        params = mock_get.call_args.kwargs['params']
+        self.assertEqual(params['starttime'], '2022-09-19T09:00:00+00:00')
+        self.assertEqual(params['endtime'], '2022-09-19T14:00:00+00:00')
+
+    @mock.patch('requests.get', side_effect=test_data.mock_place_forecast_response)
+    def test_weather_from_cached_series(self, mock_get):
+        view = ForecastView(clock=lambda: FIRST_POINT + timedelta(minutes=5))
+        view.forecast_by_place_name('Iisalmi', 1, 4)
+        weather = view.weather_by_place_name('Iisalmi')
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(weather.place, 'Iisalmi')
+        self.assertEqual(weather.data.time, FIRST_POINT + timedelta(minutes=5))
+        self.assertEqual(weather.data.temperature.value, 12.3)
+        self.assertAlmostEqual(weather.data.humidity.value, 78.4)
+        self.assertAlmostEqual(weather.data.wind_speed.value, 3.035)
+        self.assertEqual(weather.data.humidity.unit, '%')
+        self.assertTrue(9.78 < weather.data.feels_like.value < 9.81)
+
+    @mock.patch('requests.get', side_effect=test_data.mock_place_forecast_response)
+    def test_weather_fetches_series_once(self, mock_get):
+        view = ForecastView(clock=lambda: FIRST_POINT)
+        view.weather_by_place_name('Iisalmi')
+        weather = view.weather_by_place_name('Iisalmi')
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(mock_get.call_args.kwargs['params']['timestep'], 60)
+        self.assertEqual(weather.data.time, FIRST_POINT)
+
+    @mock.patch('requests.get', side_effect=test_data.mock_place_forecast_response)
+    def test_weather_falls_back_to_request(self, mock_get):
+        # The series does not cover the current time
+        view = ForecastView(clock=lambda: FIRST_POINT + timedelta(days=30))
+        weather = view.weather_by_place_name('Iisalmi')
+
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(mock_get.call_args.kwargs['params']['timestep'], 10)
+        self.assertEqual(weather.place, 'Iisalmi')
+
+    def test_interpolate_wind_direction(self):
+        times = [FIRST_POINT, FIRST_POINT + timedelta(hours=1)]
+        columns = ForecastColumns('Test', 60.0, 25.0, times, {'wind_direction': '°', 'symbol': ''},
+                                  {'wind_direction': array('d', [350, 30]), 'symbol': array('d', [1, 3])})
+
+        weather_data = interpolate(columns, FIRST_POINT + timedelta(minutes=45))
+        self.assertAlmostEqual(weather_data.wind_direction.value, 20.0)
+        self.assertEqual(weather_data.symbol.value, 3)
+        self.assertIsNone(interpolate(columns, FIRST_POINT - timedelta(minutes=1)))
+        self.assertIsNone(interpolate(columns, FIRST_POINT + timedelta(hours=2)))
+
+    @mock.patch('requests.get', side_effect=test_data.mock_coordinate_forecast_response)
+    def test_columns_round_trip(self, mock_get):
+        forecast = fmi_weather_client.forecast_by_coordinates(67.583988, 29.742731)
+        # NaN values are never equal, so compare representations
+        self.assertEqual(repr(from_columns(to_columns(forecast))), repr(forecast))
+        self.assertEqual(len(subsample(to_columns(forecast), 1, 100).times), 2)